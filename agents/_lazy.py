@@ -0,0 +1,35 @@
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access.
+
+    Lets heavy dependencies (pandas, matplotlib, prophet, plotly) be named at
+    module level while only being loaded by the code paths that use them.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        # Cache each attribute so later lookups skip this hook entirely
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a LazyModule for ``name``; nothing is imported until it is used."""
+    return LazyModule(name)
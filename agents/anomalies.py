@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from agents._lazy import lazy_import
+from agents.resampling import _fill_down, default_season_length, infer_frequency
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+ANOMALY_METHODS = ['iqr', 'rolling_mad', 'seasonal', 'forecast_band']
+
+# |score| above which a point is an anomaly, per method
+DEFAULT_THRESHOLDS = {'iqr': 1.5, 'rolling_mad': 3.5, 'seasonal': 3.5, 'forecast_band': 1.0}
+
+# Makes the median absolute deviation a consistent estimate of a normal standard deviation
+_MAD_SCALE = 1.4826
+# Elements per chunk of the sliding-window view used for rolling medians
+_WINDOW_CHUNK = 1 << 22
+
+
+def _as_matrix(values) -> np.ndarray:
+    values = np.asarray(values, dtype='float64')
+    return values[:, None] if values.ndim == 1 else values
+
+
+def _sorted_quantile(ordered: np.ndarray, counts: np.ndarray, q: float, axis: int) -> np.ndarray:
+    """Linear-interpolated quantile of sorted slices whose ``counts`` valid values come first.
+
+    ``counts`` keeps ``axis`` with length one; slices without values give NaN.
+    """
+    last = np.maximum(counts - 1, 0)
+    position = q * last
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, last)
+    low = np.take_along_axis(ordered, lower, axis)
+    return low + (np.take_along_axis(ordered, upper, axis) - low) * (position - lower)
+
+
+def _quantiles(values: np.ndarray, qs, axis: int = 0) -> list:
+    """NaN-ignoring quantiles along ``axis`` from one sort.
+
+    np.nanquantile loops over slices in Python once NaNs are present.
+    """
+    ordered = np.sort(values, axis=axis)  # NaN sorts last
+    counts = np.sum(~np.isnan(values), axis=axis, keepdims=True)
+    return [np.squeeze(_sorted_quantile(ordered, counts, q, axis), axis) for q in qs]
+
+
+def _robust_scale(values: np.ndarray, axis: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Median and MAD-based standard deviation along ``axis``."""
+    center = _quantiles(values, [0.5], axis)[0]
+    deviations = np.abs(values - np.expand_dims(center, axis))
+    return center, _MAD_SCALE * _quantiles(deviations, [0.5], axis)[0]
+
+
+def _scores(values: np.ndarray, expected: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = (values - expected) / scale
+    # Without any spread an exact match scores 0 and any deviation infinitely far
+    return np.where((scale == 0) & (values == expected), 0.0, score)
+
+
+def iqr_scores(values) -> Tuple[np.ndarray, np.ndarray]:
+    """Distance outside the interquartile range, in IQRs, against the median.
+
+    ``|score| > 1.5`` is the global rule of ``detect_outliers``. ``values``
+    is a series or a ``(dates, series)`` matrix; returns the expected values
+    and scores as ``(dates, series)`` matrices.
+    """
+    values = _as_matrix(values)
+    q1, median, q3 = _quantiles(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    outside = np.where(values > q3, values - q3, np.where(values < q1, values - q1, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.where(outside == 0, 0.0, outside / iqr)
+    score[np.isnan(values)] = np.nan
+    return np.broadcast_to(median, values.shape).copy(), score
+
+
+def _sorted_windows(values: np.ndarray, window: int, before: int):
+    """Yield ``(start, windows, sorted windows, counts)`` over chunks of rows.
+
+    Row ``i`` gets the ``window`` rows from ``i - before`` on, NaN-padded at
+    the ends. The windows are strided views of all series at once, sorted in
+    chunks of bounded size: linear in the series length with no per-point
+    Python. ``counts`` are the valid values per window, keeping the window
+    axis with length one.
+    """
+    n, k = values.shape
+    padded = np.full((n + window - 1, k), np.nan)
+    padded[before:before + n] = values
+    view = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)  # (n, k, window)
+    step = max(_WINDOW_CHUNK // (window * k), 1)
+    for start in range(0, n, step):
+        windows = view[start:start + step]
+        yield start, windows, np.sort(windows, axis=-1), np.sum(~np.isnan(windows), axis=-1, keepdims=True)
+
+
+def _rolling_median(values: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    """Centered rolling median of every column; windows under ``min_periods`` values give NaN."""
+    median = np.empty(values.shape)
+    for start, _, ordered, counts in _sorted_windows(values, window, window // 2):
+        chunk = _sorted_quantile(ordered, counts, 0.5, -1)[..., 0]
+        chunk[counts[..., 0] < min_periods] = np.nan
+        median[start:start + len(chunk)] = chunk
+    return median
+
+
+def rolling_mad_scores(values, window: int = 25, center: bool = True,
+                       min_periods: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Robust z-scores against a rolling median and MAD (Hampel filter).
+
+    Each point is compared with the median of the ``window`` points around
+    it (``center``) or ending at it, scaled by 1.4826 times their median
+    absolute deviation; a window without spread falls back to the series'
+    overall MAD. Windows with fewer than ``min_periods`` observations (half
+    the window by default) score NaN. See ``_sorted_windows`` for the cost.
+    """
+    if window < 3:
+        raise ValueError("The rolling window needs at least 3 points")
+    values = _as_matrix(values)
+    min_periods = max(window // 2, 1) if min_periods is None else min_periods
+    before = window // 2 if center else window - 1
+
+    expected = np.empty(values.shape)
+    scale = np.empty(values.shape)
+    for start, windows, ordered, counts in _sorted_windows(values, window, before):
+        median = _sorted_quantile(ordered, counts, 0.5, -1)
+        deviations = np.sort(np.abs(windows - median), axis=-1)
+        mad = _sorted_quantile(deviations, counts, 0.5, -1)[..., 0]
+        median = median[..., 0]
+        median[counts[..., 0] < min_periods] = np.nan
+        expected[start:start + len(median)] = median
+        scale[start:start + len(median)] = _MAD_SCALE * mad
+    overall = _robust_scale(values)[1]
+    scale = np.where(scale > 0, scale, overall)
+    return expected, _scores(values, expected, scale)
+
+
+def _trend_window(season_length: int) -> int:
+    """Odd window spanning one season (m + 1 points for even m)."""
+    return season_length + 1 - season_length % 2
+
+
+def _flat_ends(trend: np.ndarray) -> np.ndarray:
+    """Extend the first and last estimates over missing rows at either end (and fill gaps)."""
+    return _fill_down(_fill_down(trend)[::-1])[::-1]
+
+
+def _median_trend(values: np.ndarray, season_length: int) -> np.ndarray:
+    """Centered moving median over one season: a first trend that spikes do not pull."""
+    window = _trend_window(season_length)
+    return _flat_ends(_rolling_median(values, window, (window + 1) // 2))
+
+
+def _robustness_weights(residual: np.ndarray) -> np.ndarray:
+    """STL's bisquare weights: 0 beyond six times the median absolute residual of each series."""
+    h = 6 * _quantiles(np.abs(residual), [0.5])[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u = np.abs(residual) / h
+    weights = np.where(u < 1, (1 - u * u) ** 2, 0.0)
+    # Series without any spread keep full weight
+    weights[:, h == 0] = 1.0
+    return np.where(np.isnan(residual), 0.0, weights)
+
+
+def _weighted_trend(values: np.ndarray, weights: np.ndarray, season_length: int) -> np.ndarray:
+    """Centered moving weighted mean over one season, from cumulative sums.
+
+    Windows are cut short at the ends of the series; windows with fewer
+    than half their points observed give NaN, later filled from neighbours.
+    """
+    window = _trend_window(season_length)
+    half = window // 2
+    n, k = values.shape
+    weights = np.where(np.isnan(values), 0.0, weights)
+    padded = np.zeros((n + 2 * half + 1, 3, k))
+    np.cumsum(np.stack([weights * np.nan_to_num(values), weights, ~np.isnan(values)], axis=1),
+              axis=0, out=padded[half + 1:half + 1 + n])
+    padded[half + 1 + n:] = padded[half + n]
+    sums = padded[window:] - padded[:-window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend = sums[:, 0] / sums[:, 1]
+    trend[(sums[:, 2] < (window + 1) // 2) | (sums[:, 1] == 0)] = np.nan
+    return _flat_ends(trend)
+
+
+def _seasonal_component(detrended: np.ndarray, m: int) -> np.ndarray:
+    """Median detrended value of every phase of the season, centered on zero, repeated over the rows."""
+    n, k = detrended.shape
+    cycles = -(-n // m)
+    phases = np.full((cycles * m, k), np.nan)
+    phases[:n] = detrended
+    seasonal = _quantiles(phases.reshape(cycles, m, k), [0.5], axis=0)[0]
+    # Phases never observed get no seasonal effect
+    observed = ~np.isnan(seasonal)
+    mean = np.where(observed, seasonal, 0.0).sum(axis=0) / np.maximum(observed.sum(axis=0), 1)
+    seasonal = np.where(observed, seasonal - mean, 0.0)
+    return np.tile(seasonal, (cycles, 1))[:n]
+
+
+def seasonal_scores(values, season_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Robust z-scores of the residual of a seasonal-trend decomposition.
+
+    The seasonal component is the median detrended value of each phase of
+    the season. As in STL's robustness loop, a first trend (a moving median
+    over one season) gives residuals whose bisquare weights drop outliers,
+    and the trend is then re-estimated as a weighted moving mean of the
+    deseasonalized series, so spikes do not leak into the expected value of
+    their neighbours and windows cut short by gaps are not biased by the
+    part of the season they miss. The residual is scored against its median
+    and MAD. The whole ``(dates, series)`` matrix is decomposed at once in
+    time linear in its length, and seasonal peaks are part of the expected
+    value instead of being flagged.
+    """
+    values = _as_matrix(values)
+    n = len(values)
+    m = season_length
+    if m is None or m < 2:
+        raise ValueError("A season length of at least 2 is needed for seasonal anomaly detection")
+    if n < 2 * m:
+        raise ValueError(f"At least two seasons ({2 * m} points) are needed for seasonal anomaly detection")
+    trend = _median_trend(values, m)
+    seasonal = _seasonal_component(values - trend, m)
+    weights = _robustness_weights(values - trend - seasonal)
+    trend = _weighted_trend(values - seasonal, weights, m)
+    seasonal = _seasonal_component(values - trend, m)
+    expected = trend + seasonal
+    center, scale = _robust_scale(values - expected)
+    expected = expected + center
+    return expected, _scores(values, expected, scale)
+
+
+def forecast_band_scores(values, yhat, yhat_lower, yhat_upper) -> Tuple[np.ndarray, np.ndarray]:
+    """Position of each value relative to the forecast's uncertainty interval.
+
+    0 is the forecast and +-1 the interval bounds, so ``|score| > 1`` lies
+    outside the interval; each side is scaled by its own half-width.
+    """
+    values, yhat = _as_matrix(values), _as_matrix(yhat)
+    upper, lower = _as_matrix(yhat_upper) - yhat, yhat - _as_matrix(yhat_lower)
+    return yhat, _scores(values, yhat, np.where(values >= yhat, upper, lower))
+
+
+def score_matrix(values, method: str = 'rolling_mad', season_length: Optional[int] = None,
+                 forecast: Optional[tuple] = None, window: int = 25,
+                 center: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Expected values and anomaly scores of a series or ``(dates, series)`` matrix.
+
+    ``forecast`` is the ``(yhat, yhat_lower, yhat_upper)`` matrices aligned
+    with ``values`` for 'forecast_band'; ``season_length`` is needed for
+    'seasonal'.
+    """
+    if method not in ANOMALY_METHODS:
+        raise ValueError(f"Invalid anomaly method. Please choose one of {ANOMALY_METHODS}.")
+    if method == 'iqr':
+        return iqr_scores(values)
+    if method == 'rolling_mad':
+        return rolling_mad_scores(values, window=window, center=center)
+    if method == 'seasonal':
+        return seasonal_scores(values, season_length)
+    if forecast is None:
+        raise ValueError("Forecast-band anomaly detection needs forecast results")
+    return forecast_band_scores(values, *forecast)
+
+
+def _season_length(season_length: Optional[int], freq: Optional[str], ticks: np.ndarray) -> Optional[int]:
+    if season_length is not None:
+        return season_length
+    season_length = default_season_length(freq or infer_frequency(ticks))
+    if season_length is None:
+        raise ValueError("No default season length for this frequency. Please pass season_length.")
+    return season_length
+
+
+def _align(grid: np.ndarray, ticks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of ``ticks`` in the sorted int64 ``grid`` and which of them match exactly."""
+    positions = np.minimum(np.searchsorted(grid, ticks), max(len(grid) - 1, 0))
+    return positions, (grid[positions] == ticks) if len(grid) else np.zeros(len(ticks), dtype=bool)
+
+
+def detect_anomalies(data: pd.DataFrame, method: str = 'rolling_mad', threshold: Optional[float] = None,
+                     date_column: str = 'ds', value_column: str = 'y', forecast: Optional[pd.DataFrame] = None,
+                     freq: Optional[str] = None, season_length: Optional[int] = None, window: int = 25,
+                     center: bool = True, keep_all: bool = False) -> pd.DataFrame:
+    """Score every point of a series and return the anomalies.
+
+    Methods: 'iqr' (the global rule of ``detect_outliers``), 'rolling_mad'
+    (local median/MAD over ``window`` points), 'seasonal' (residual of a
+    seasonal-trend decomposition; ``season_length`` defaults from the
+    frequency, e.g. 7 for daily data) and 'forecast_band' (outside the
+    uncertainty interval of ``forecast``, a frame with ds, yhat, yhat_lower
+    and yhat_upper such as ``forecast_results``). A point is an anomaly when
+    ``|score|`` exceeds ``threshold`` (DEFAULT_THRESHOLDS by default).
+    Windows and seasons count points, so the series should be regular (see
+    ``TimeSeriesAgent.regularize``).
+
+    Returns the anomalous rows (every row with ``keep_all``, plus an
+    ``anomaly`` flag) with the date, value, ``expected`` value, ``score`` and
+    ``method``, keeping the index of ``data``.
+    """
+    if method not in ANOMALY_METHODS:
+        raise ValueError(f"Invalid anomaly method. Please choose one of {ANOMALY_METHODS}.")
+    threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+    dates = data[date_column].to_numpy(dtype='datetime64[ns]')
+    values = data[value_column].to_numpy(dtype='float64', na_value=np.nan)
+    # Windows and seasons follow time order
+    order = np.argsort(dates, kind='stable') if np.any(dates[1:] < dates[:-1]) else None
+    if order is not None:
+        dates, values = dates[order], values[order]
+    ticks = dates.view('i8')
+
+    bands = None
+    if method == 'seasonal':
+        season_length = _season_length(season_length, freq, ticks)
+    elif method == 'forecast_band':
+        if forecast is None:
+            raise ValueError("Forecast-band anomaly detection needs forecast results")
+        forecast_ticks = forecast['ds'].to_numpy(dtype='datetime64[ns]').view('i8')
+        sorted_ticks = np.argsort(forecast_ticks, kind='stable')
+        positions, matched = _align(forecast_ticks[sorted_ticks], ticks)
+        rows = sorted_ticks[positions]
+        bands = tuple(np.where(matched, forecast[column].to_numpy(dtype='float64')[rows], np.nan)
+                      for column in ['yhat', 'yhat_lower', 'yhat_upper'])
+    expected, score = score_matrix(values, method, season_length=season_length, forecast=bands,
+                                   window=window, center=center)
+    expected, score = expected[:, 0], score[:, 0]
+    if order is not None:
+        # Back to the row order of ``data``
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        expected, score = expected[inverse], score[inverse]
+
+    flagged = np.abs(score) > threshold
+    result = pd.DataFrame({
+        date_column: data[date_column].to_numpy(dtype='datetime64[ns]'),
+        value_column: data[value_column].to_numpy(dtype='float64', na_value=np.nan),
+        'expected': expected,
+        'score': score,
+        'method': method,
+    }, index=data.index)
+    if keep_all:
+        result['anomaly'] = flagged
+        return result
+    return result[flagged]
+
+
+def detect_anomalies_batch(data: pd.DataFrame, method: str = 'rolling_mad', threshold: Optional[float] = None,
+                           series_column: str = 'series_id', date_column: str = 'ds', value_column: str = 'y',
+                           forecasts: Optional[pd.DataFrame] = None, season_length: Optional[int] = None,
+                           window: int = 25, center: bool = True) -> pd.DataFrame:
+    """Anomalies of many series in one long frame, scored as one matrix.
+
+    The series are laid out on their shared regular date grid (see
+    ``TimeSeriesAgent.regularize``), so every method runs once over a
+    ``(dates, series)`` matrix instead of once per series. ``forecasts`` is
+    a long frame with the series column, ds, yhat, yhat_lower and yhat_upper
+    (e.g. from ``forecast_batch``) for 'forecast_band'. Returns one row per
+    anomaly with the series, date, value, ``expected``, ``score`` and
+    ``method``, ordered by series and date.
+    """
+    # Imported here: agents.batch imports the agent, which imports this module
+    from agents.batch import grid_matrix, series_codes
+
+    if method not in ANOMALY_METHODS:
+        raise ValueError(f"Invalid anomaly method. Please choose one of {ANOMALY_METHODS}.")
+    threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+    codes, uniques = series_codes(data, series_column)
+    grid, freq, matrix = grid_matrix(codes, len(uniques), data[date_column], data[value_column])
+
+    bands = None
+    if method == 'seasonal':
+        season_length = _season_length(season_length, freq, grid)
+    elif method == 'forecast_band':
+        if forecasts is None:
+            raise ValueError("Forecast-band anomaly detection needs forecast results")
+        columns = uniques.get_indexer(forecasts[series_column])
+        positions, matched = _align(grid, forecasts['ds'].to_numpy(dtype='datetime64[ns]').view('i8'))
+        keep = matched & (columns >= 0)
+        bands = []
+        for column in ['yhat', 'yhat_lower', 'yhat_upper']:
+            band = np.full(matrix.shape, np.nan)
+            band[positions[keep], columns[keep]] = forecasts[column].to_numpy(dtype='float64')[keep]
+            bands.append(band)
+    expected, score = score_matrix(matrix, method, season_length=season_length, forecast=bands,
+                                   window=window, center=center)
+
+    # Transposed, so the anomalies come out ordered by series, then date
+    series, rows = np.nonzero((np.abs(score) > threshold).T)
+    return pd.DataFrame({
+        series_column: uniques[series],
+        date_column: grid[rows].view('datetime64[ns]'),
+        value_column: matrix[rows, series],
+        'expected': expected[rows, series],
+        'score': score[rows, series],
+        'method': method,
+    })
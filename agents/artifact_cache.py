@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+# Part of every key; bump it when stage outputs change so old entries are ignored
+ARTIFACT_VERSION = 1
+
+_META = 'meta.json'
+_READ_SIZE = 1 << 20
+
+
+class ArtifactCache:
+    """Content-addressed on-disk cache of pipeline stage outputs.
+
+    An entry is a directory of output files (plots, cleaned data, JSON, ...)
+    plus metadata, stored under a key. Keys hash the stage name, the key of
+    the stage's input (``file_key`` of the raw input for the first stage)
+    and the stage parameters. Every stage key therefore depends on
+    everything upstream of it: when the input or an upstream parameter
+    changes, only the affected stages miss.
+
+    Entries are published atomically, so concurrent runs never see a partial
+    entry. Eviction is least-recently-used, bounded by ``max_entries`` and
+    ``max_bytes``, and entries unused for ``max_age_days`` are dropped.
+    """
+
+    def __init__(self, cache_dir: str = '.artifact_cache', max_entries: int = 10000,
+                 max_bytes: int = 2 * 1024 * 1024 * 1024, max_age_days: float = 30):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 3600
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Stable hash of a stage name, upstream keys and parameters."""
+        payload = json.dumps([ARTIFACT_VERSION, *parts], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def file_key(file_path: str) -> str:
+        """Hash of a file's contents, the root of a pipeline's stage keys."""
+        h = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(_READ_SIZE), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Metadata of an entry, or None if it is missing, expired or unreadable."""
+        path = os.path.join(self._entry_dir(key), _META)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            os.utime(path)  # mark as recently used
+            return record
+        except (OSError, ValueError):
+            return None
+
+    def path(self, key: str, name: str) -> str:
+        """Path of a file stored in an entry."""
+        return os.path.join(self._entry_dir(key), name)
+
+    def restore(self, key: str, directory: str) -> Optional[List[str]]:
+        """Copy an entry's files into ``directory``; returns their paths, or None on a miss."""
+        record = self.get(key)
+        if record is None:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        try:
+            for name in record['files']:
+                paths.append(shutil.copyfile(self.path(key, name), os.path.join(directory, name)))
+        except OSError:
+            # Evicted by another process while copying
+            return None
+        return paths
+
+    def read(self, key: str, name: str) -> Optional[bytes]:
+        """Contents of a stored blob, or None on a miss."""
+        if self.get(key) is None:
+            return None
+        try:
+            with open(self.path(key, name), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, files: Iterable[str] = (), blobs: Optional[Dict[str, bytes]] = None,
+            meta: Optional[dict] = None) -> None:
+        """Store copies of ``files``, named ``blobs`` and JSON ``meta`` under ``key``.
+
+        The entry is built in a temporary directory and renamed into place;
+        if another process stored the key first, its entry is kept.
+        """
+        final_dir = self._entry_dir(key)
+        tmp_dir = f'{final_dir}.{os.getpid()}.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            names = []
+            for file_path in files:
+                names.append(os.path.basename(file_path))
+                shutil.copyfile(file_path, os.path.join(tmp_dir, names[-1]))
+            for name, data in (blobs or {}).items():
+                with open(os.path.join(tmp_dir, name), 'wb') as f:
+                    f.write(data)
+            with open(os.path.join(tmp_dir, _META), 'w', encoding='utf-8') as f:
+                json.dump({'files': names, 'meta': meta or {}}, f, default=str)
+            os.rename(tmp_dir, final_dir)
+        except OSError:
+            if not os.path.exists(os.path.join(final_dir, _META)):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def evict(self) -> None:
+        """Drop expired entries, then least-recently-used ones until within bounds."""
+        entries = []
+        now = time.time()
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.is_dir() or entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    used = os.path.getmtime(os.path.join(entry.path, _META))
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                except OSError:
+                    continue
+                if now - used > self.max_age_seconds:
+                    self._remove(entry.path)
+                else:
+                    entries.append((used, size, entry.path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_bytes -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        shutil.rmtree(path, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Remove every cached artifact."""
+        for name in os.listdir(self.cache_dir):
+            self._remove(os.path.join(self.cache_dir, name))
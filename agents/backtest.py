@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from agents._lazy import lazy_import
+from agents.forecasters import ProphetForecaster, get_forecaster, quiet_stan_logging
+from agents.model_cache import ModelCache
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# The prepared series, set once per worker process by _init_fold_worker
+_SERIES = None
+
+
+def rolling_cutoffs(dates: np.ndarray, horizon: int, freq: str = 'D', initial: Optional[int] = None,
+                    period: Optional[int] = None) -> List[pd.Timestamp]:
+    """Rolling-origin cutoffs, oldest first, as Prophet's cross_validation places them.
+
+    The last cutoff leaves ``horizon`` periods of history after it; earlier
+    ones step back ``period`` periods (half the horizon by default) while at
+    least ``initial`` periods (three horizons by default) precede them.
+    """
+    offset = pd.tseries.frequencies.to_offset(freq)
+    initial = 3 * horizon if initial is None else initial
+    period = max(horizon // 2, 1) if period is None else period
+    first, last = pd.Timestamp(np.min(dates)), pd.Timestamp(np.max(dates))
+    earliest = first + initial * offset
+    cutoff = last - horizon * offset
+    cutoffs = []
+    while cutoff >= earliest:
+        cutoffs.append(cutoff)
+        cutoff = cutoff - period * offset
+    if not cutoffs:
+        raise ValueError("Not enough history for a backtest. Please use a shorter horizon or initial window.")
+    return cutoffs[::-1]
+
+
+def _make_forecaster(forecaster, profile: str, cache_dir: Optional[str]):
+    if forecaster is None or forecaster == 'prophet':
+        return ProphetForecaster(cache=ModelCache(cache_dir) if cache_dir else None, profile=profile)
+    if profile != 'default':
+        raise ValueError("Prophet profiles only apply to the 'prophet' forecaster")
+    return get_forecaster(forecaster)
+
+
+def _fit_fold(ds: np.ndarray, y: np.ndarray, cutoff, horizon: int, freq: str, forecaster,
+              profile: str, cache_dir: Optional[str]) -> pd.DataFrame:
+    """Fit on the history up to ``cutoff`` and score the next ``horizon`` periods."""
+    train = ds <= cutoff.to_datetime64()
+    if train.sum() < 2:
+        raise ValueError("At least two observations are needed before the cutoff")
+    model = _make_forecaster(forecaster, profile, cache_dir).fit(pd.DataFrame({'ds': ds[train], 'y': y[train]}))
+    forecast = model.predict(horizon, freq=freq)
+    columns = [c for c in ['ds', 'yhat', 'yhat_lower', 'yhat_upper'] if c in forecast.columns]
+    future = forecast.loc[forecast['ds'] > cutoff, columns].head(horizon)
+    future = future.assign(horizon=np.arange(1, len(future) + 1))
+    actual = pd.DataFrame({'ds': ds[~train], 'y': y[~train]}).dropna()
+    fold = future.merge(actual, on='ds', how='inner')
+    fold.insert(0, 'cutoff', cutoff)
+    return fold
+
+
+def _init_fold_worker(ds: np.ndarray, y: np.ndarray) -> None:
+    """Receive the prepared series once per worker instead of once per fold."""
+    global _SERIES
+    quiet_stan_logging()
+    _SERIES = (ds, y)
+
+
+def _fold_task(cutoff, horizon: int, freq: str, forecaster, profile: str,
+               cache_dir: Optional[str]) -> Tuple[object, Optional[pd.DataFrame], Optional[str]]:
+    """Worker entry point: score one cutoff and never let an error escape."""
+    try:
+        return cutoff, _fit_fold(*_SERIES, cutoff, horizon, freq, forecaster, profile, cache_dir), None
+    except Exception as e:
+        return cutoff, None, f"{type(e).__name__}: {str(e)}"
+
+
+def horizon_metrics(predictions: pd.DataFrame) -> pd.DataFrame:
+    """MAE, MAPE, RMSE and interval coverage for every forecast horizon.
+
+    MAPE is a fraction and skips zero actuals; coverage is the share of
+    actuals inside ``[yhat_lower, yhat_upper]`` (NaN without intervals).
+    """
+    y = predictions['y'].to_numpy(dtype='float64')
+    errors = y - predictions['yhat'].to_numpy(dtype='float64')
+    if 'yhat_lower' in predictions.columns:
+        covered = ((y >= predictions['yhat_lower'].to_numpy()) &
+                   (y <= predictions['yhat_upper'].to_numpy())).astype('float64')
+    else:
+        covered = np.full(len(y), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ape = np.where(y != 0, np.abs(errors / y), np.nan)
+    grouped = pd.DataFrame({'horizon': predictions['horizon'].to_numpy(), 'abs': np.abs(errors),
+                            'sq': errors * errors, 'ape': ape, 'covered': covered}).groupby('horizon')
+    metrics = pd.DataFrame({
+        'mae': grouped['abs'].mean(),
+        'mape': grouped['ape'].mean(),
+        'rmse': np.sqrt(grouped['sq'].mean()),
+        'coverage': grouped['covered'].mean(),
+        'count': grouped.size(),
+    })
+    return metrics.reset_index()
+
+
+def rolling_backtest(prepared: pd.DataFrame, horizon: int, freq: str = 'D', initial: Optional[int] = None,
+                     period: Optional[int] = None, cutoffs: Optional[list] = None, forecaster='prophet',
+                     profile: str = 'default', max_workers: Optional[int] = None,
+                     cache_dir: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Rolling-origin backtest of a prepared ``ds/y`` frame.
+
+    The model is refitted at every cutoff (see ``rolling_cutoffs``, or pass
+    ``cutoffs`` explicitly) and scored on the following ``horizon`` periods.
+    Folds run in a process pool that receives the series once per worker;
+    ``max_workers=1`` runs them in-process, which is also the default for
+    the cheap batch-capable forecasters. With ``cache_dir`` set, Prophet fits
+    go through a ModelCache there, so repeated backtests reuse them.
+
+    Returns ``(predictions, metrics, errors)``: one row per scored forecast
+    with its ``cutoff`` and ``horizon``, ``horizon_metrics`` of those rows,
+    and one row per failed cutoff with its error message.
+    """
+    if horizon <= 0:
+        raise ValueError("Number of periods must be positive")
+    forecaster = forecaster or 'prophet'
+    ds = prepared['ds'].to_numpy(dtype='datetime64[ns]')
+    y = prepared['y'].to_numpy(dtype='float64', na_value=np.nan)
+    if cutoffs is None:
+        cutoffs = rolling_cutoffs(ds, horizon, freq, initial, period)
+    cutoffs = [pd.Timestamp(cutoff) for cutoff in cutoffs]
+
+    if max_workers is None and get_forecaster(forecaster).supports_batch:
+        max_workers = 1
+    frames = []
+    errors = []
+    if max_workers == 1 or len(cutoffs) == 1:
+        for cutoff in cutoffs:
+            try:
+                frames.append(_fit_fold(ds, y, cutoff, horizon, freq, forecaster, profile, cache_dir))
+            except Exception as e:
+                errors.append({'cutoff': cutoff, 'error': f"{type(e).__name__}: {str(e)}"})
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_fold_worker,
+                                 initargs=(ds, y)) as executor:
+            futures = {executor.submit(_fold_task, cutoff, horizon, freq, forecaster, profile, cache_dir): cutoff
+                       for cutoff in cutoffs}
+            for future in as_completed(futures):
+                try:
+                    cutoff, fold, error = future.result()
+                except Exception as e:
+                    # The worker itself died (e.g. killed by the OS); keep the backtest going
+                    cutoff, fold, error = futures[future], None, f"{type(e).__name__}: {str(e)}"
+                if error is not None:
+                    errors.append({'cutoff': cutoff, 'error': error})
+                else:
+                    frames.append(fold)
+
+    if not frames:
+        raise ValueError(f"Every backtest fold failed: {errors[0]['error'] if errors else 'no cutoffs'}")
+    predictions = pd.concat(frames, ignore_index=True).sort_values(['cutoff', 'ds'], kind='stable',
+                                                                    ignore_index=True)
+    errors = pd.DataFrame(errors, columns=['cutoff', 'error']).sort_values('cutoff', ignore_index=True)
+    return predictions, horizon_metrics(predictions), errors
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import os
+import glob
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, List, Optional, Tuple
+
+from agents._lazy import lazy_import
+from agents.data_io import read_series
+from agents.forecasters import get_forecaster, quiet_stan_logging
+from agents.parsing import parse_dates, parse_numeric
+from agents.resampling import infer_frequency
+from agents.time_series_agent import TimeSeriesAgent, FORECAST_COLUMNS
+from agents.model_cache import ModelCache
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+
+class SeriesTimeoutError(Exception):
+    """Raised inside a worker when a single series exceeds its time budget."""
+
+
+def _raise_timeout(signum, frame):
+    raise SeriesTimeoutError("Series exceeded its time budget")
+
+
+def _run_agent(agent: TimeSeriesAgent, periods: int, columns: Optional[List[str]],
+               cache_dir: Optional[str], forecaster: str = 'prophet',
+               profile: str = 'default') -> pd.DataFrame:
+    """Fit and forecast a single prepared agent."""
+    agent.set_forecast_periods(periods)
+    agent.train_prophet_model(cache=ModelCache(cache_dir) if cache_dir else None, forecaster=forecaster,
+                              profile=profile)
+    forecast = agent.make_forecast()
+    if columns is not None:
+        forecast = forecast[[c for c in columns if c in forecast.columns]]
+    return forecast
+
+
+def _forecast_task(series_id, source, periods: int, timeout: Optional[float],
+                   columns: Optional[List[str]], cache_dir: Optional[str],
+                   forecaster: str = 'prophet',
+                   profile: str = 'default') -> Tuple[object, Optional[pd.DataFrame], Optional[str]]:
+    """Worker entry point: forecast one series and never let an error escape."""
+    use_alarm = timeout is not None and hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        agent = TimeSeriesAgent()
+        if isinstance(source, str):
+            # Directory mode: each worker parses its own file
+            agent.load_data(source)
+            agent.select_columns('ds', 'y')
+            agent.correct_formats()
+        else:
+            ds, y = source
+            agent.data = pd.DataFrame({'ds': ds, 'y': y})
+            agent.date_column = 'ds'
+            agent.value_column = 'y'
+            agent.correct_formats()
+        return series_id, _run_agent(agent, periods, columns, cache_dir, forecaster, profile), None
+    except Exception as e:
+        return series_id, None, f"{type(e).__name__}: {str(e)}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def series_codes(data: pd.DataFrame, series_column: str) -> Tuple[np.ndarray, pd.Index]:
+    """Number the series of a long-format frame: ``(codes, series ids)``.
+
+    Rows without a series id would otherwise get code -1 and be attributed
+    to another series, so they are rejected.
+    """
+    unlabeled = data[series_column].isnull()
+    if unlabeled.any():
+        raise ValueError(f"{int(unlabeled.sum())} rows have no '{series_column}'; "
+                         "drop or label them first")
+    return pd.factorize(data[series_column], sort=True)
+
+
+def _split_long_frame(data: pd.DataFrame, series_column: str, date_column: str,
+                      value_column: str) -> Iterable[Tuple[object, tuple]]:
+    """Split a long-format frame into per-series (ds, y) arrays in one groupby pass."""
+    codes, uniques = series_codes(data, series_column)
+    order = np.argsort(codes, kind='stable')
+    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+    ds = data[date_column].to_numpy()[order]
+    y = data[value_column].to_numpy()[order]
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(order)]))
+    for start, end in zip(starts, ends):
+        if end > start:
+            yield uniques[codes[order[start]]], (ds[start:end], y[start:end])
+
+
+def _series_from_directory(directory: str, pattern: str) -> Iterable[Tuple[str, str]]:
+    """Yield (series_id, path) for every CSV in a directory; the file stem is the id."""
+    for path in sorted(glob.glob(os.path.join(directory, pattern))):
+        yield os.path.splitext(os.path.basename(path))[0], path
+
+
+def grid_matrix(codes: np.ndarray, n_series: int, dates: pd.Series,
+                values: pd.Series) -> Tuple[np.ndarray, str, np.ndarray]:
+    """Lay long-format observations out as a ``(dates, series)`` matrix on one regular grid.
+
+    ``codes`` numbers the series of every row. Dates and values are parsed
+    like ``correct_formats``; rows without a date are dropped and missing
+    observations are NaN. Returns the grid as int64 nanoseconds, its
+    frequency and the matrix.
+    """
+    if len(codes) and (codes.min() < 0 or codes.max() >= n_series):
+        raise ValueError("Every row needs a series code between 0 and n_series - 1")
+    dates, _ = parse_dates(dates)
+    values, _ = parse_numeric(values)
+    ticks = dates.view('i8')
+    known = ~np.isnat(dates)
+    codes, ticks, values = codes[known], ticks[known], values[known]
+
+    freq = infer_frequency(ticks)
+    grid = pd.date_range(pd.Timestamp(ticks.min()), pd.Timestamp(ticks.max()), freq=freq).asi8
+    positions = np.minimum(np.searchsorted(grid, ticks), len(grid) - 1)
+    if not np.array_equal(grid[positions], ticks):
+        raise ValueError(f"Series dates do not fall on one regular '{freq}' grid. Please regularize them first.")
+    matrix = np.full((len(grid), n_series), np.nan)
+    matrix[positions, codes] = values
+    return grid, freq, matrix
+
+
+def _forecast_batched(data: pd.DataFrame, periods: int, forecaster, series_column: str,
+                      date_column: str, value_column: str,
+                      columns: Optional[List[str]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Fit every series of a long frame as one matrix on a shared date grid.
+
+    Dates are parsed like ``correct_formats`` and must fall on one regular
+    grid (see ``TimeSeriesAgent.regularize``). Each series keeps the rows of
+    its own observations and gets ``periods`` forecast rows after its own
+    last observation.
+    """
+    codes, uniques = series_codes(data, series_column)
+    grid, freq, matrix = grid_matrix(codes, len(uniques), data[date_column], data[value_column])
+
+    model = get_forecaster(forecaster).fit_batch(grid.view('datetime64[ns]'), matrix)
+    forecast_dates, components = model.predict_batch(periods, freq)
+
+    # History rows where a series has data, then its own forecast horizon
+    counts = (~np.isnan(matrix)).sum(axis=0)
+    last = len(grid) - 1 - np.argmax(~np.isnan(matrix[::-1]), axis=0)
+    rows = np.arange(len(forecast_dates))[:, None]
+    keep = (rows > last) & (rows <= last + periods)
+    keep[:len(grid)] |= ~np.isnan(matrix)
+    keep[:, counts < 2] = False
+    series, row = np.nonzero(keep.T)
+
+    forecasts = pd.DataFrame({'series_id': uniques[series], 'ds': forecast_dates[row]})
+    for name, component in components.items():
+        forecasts[name] = component[row, series]
+    if columns is not None:
+        forecasts = forecasts[['series_id'] + [c for c in columns if c in forecasts.columns and c != 'series_id']]
+    errors = [{'series_id': uniques[s], 'error': "ValueError: At least two observations are needed"}
+              for s in np.flatnonzero(counts < 2)]
+    return forecasts, pd.DataFrame(errors, columns=['series_id', 'error'])
+
+
+def forecast_batch(source, periods: int, series_column: str = 'series_id',
+                   date_column: str = 'ds', value_column: str = 'y',
+                   max_workers: Optional[int] = None, timeout: Optional[float] = None,
+                   columns: Optional[List[str]] = FORECAST_COLUMNS,
+                   pattern: str = '*.csv', cache_dir: Optional[str] = None,
+                   forecaster: str = 'prophet', profile: str = 'default') -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Forecast many series in parallel across a process pool.
+
+    ``source`` is either a long-format DataFrame (``series_id, ds, y``) or a
+    directory of per-series CSV files with ``ds``/``y`` columns. Each series is
+    fitted in its own task; ``timeout`` bounds the seconds spent per series and
+    failures are isolated so one bad series never aborts the batch. With
+    ``cache_dir`` set, fitted models are shared through a ModelCache there.
+
+    ``forecaster`` picks the model (see FORECASTERS). Batch-capable models
+    ('fourier', 'seasonal_naive') skip the process pool and fit all series
+    together as one matrix on a shared date grid. ``profile`` selects the
+    Prophet speed settings (see PROPHET_PROFILES).
+
+    Returns ``(forecasts, errors)``: all forecasts concatenated with a leading
+    ``series_id`` column, and one row per failed series with its error message.
+    """
+    if periods <= 0:
+        raise ValueError("Number of periods must be positive")
+
+    if isinstance(source, pd.DataFrame):
+        missing = {series_column, date_column, value_column} - set(source.columns)
+        if missing:
+            raise ValueError(f"Columns not found in the dataset: {sorted(missing)}")
+        tasks = _split_long_frame(source, series_column, date_column, value_column)
+    elif isinstance(source, str) and os.path.isdir(source):
+        tasks = _series_from_directory(source, pattern)
+    else:
+        raise ValueError("Source must be a long-format DataFrame or a directory of CSV files")
+
+    if get_forecaster(forecaster).supports_batch:
+        if isinstance(source, pd.DataFrame):
+            data = source
+        else:
+            frames = [read_series(path).assign(series_id=series_id) for series_id, path in tasks]
+            data = pd.concat(frames, ignore_index=True)
+            series_column, date_column, value_column = 'series_id', 'ds', 'y'
+        return _forecast_batched(data, periods, forecaster, series_column, date_column, value_column, columns)
+
+    frames = []
+    errors = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=quiet_stan_logging) as executor:
+        futures = {
+            executor.submit(_forecast_task, series_id, payload, periods, timeout,
+                            columns, cache_dir, forecaster, profile): series_id
+            for series_id, payload in tasks
+        }
+        for future in as_completed(futures):
+            try:
+                series_id, forecast, error = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed by the OS); keep the batch going
+                series_id, forecast, error = futures[future], None, f"{type(e).__name__}: {str(e)}"
+            if error is not None:
+                errors.append({'series_id': series_id, 'error': error})
+            else:
+                forecast.insert(0, 'series_id', series_id)
+                frames.append(forecast)
+
+    forecasts = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['series_id'])
+    if len(forecasts):
+        forecasts = forecasts.sort_values(['series_id', 'ds'], kind='stable', ignore_index=True)
+    return forecasts, pd.DataFrame(errors, columns=['series_id', 'error'])
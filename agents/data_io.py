@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Tuple
+
+from agents._lazy import lazy_import
+from agents.parsing import detect_date_format, parse_dates, parse_numeric
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# How partial aggregates from different chunks combine into the final bucket value
+_PARTIAL_AGGREGATES = {
+    'sum': 'sum',
+    'count': 'sum',
+    'min': 'min',
+    'max': 'max',
+    'first': 'first',
+    'last': 'last',
+}
+RESAMPLE_AGGREGATIONS = ['mean', 'sum', 'count', 'min', 'max', 'first', 'last']
+
+
+def _reduce_partials(partials: pd.DataFrame) -> pd.DataFrame:
+    """Merge partial aggregates that share a bucket."""
+    return partials.groupby(level=0, sort=True).agg(_PARTIAL_AGGREGATES)
+
+
+def read_csv_chunked(file_path: str, date_column: str, value_column: str,
+                     chunksize: int = 1_000_000, value_dtype: str = 'float64',
+                     resample_rule: Optional[str] = None, agg: str = 'mean') -> Tuple[pd.DataFrame, dict]:
+    """Stream a CSV in chunks into a compact two-column frame.
+
+    Only ``date_column`` and ``value_column`` are read. Each chunk is parsed
+    straight into ``datetime64[ns]`` and ``value_dtype`` arrays so raw text is
+    never held for more than one chunk. With ``resample_rule`` (a fixed
+    frequency such as ``'D'``, ``'h'`` or ``'15min'``) every chunk is reduced to
+    per-bucket partial aggregates that are merged incrementally, so peak memory
+    follows the number of output buckets rather than the input rows.
+
+    The date format is detected on the first chunk; later entries that do not
+    match it are parsed one by one, as ``parse_dates`` does past its sample.
+    Returns ``(frame, parse_report)``, the report counting the rows that
+    failed to parse in each column as ``correct_formats`` does.
+    """
+    if chunksize <= 0:
+        raise ValueError("Chunk size must be positive")
+    if agg not in RESAMPLE_AGGREGATIONS:
+        raise ValueError(f"Invalid aggregation. Please choose one of {RESAMPLE_AGGREGATIONS}.")
+
+    reader = pd.read_csv(
+        file_path,
+        usecols=[date_column, value_column],
+        dtype={date_column: str, value_column: str},
+        chunksize=chunksize,
+    )
+
+    date_parts, value_parts = [], []
+    partials = []
+    date_format = None
+    report = {'date_failures': 0, 'value_failures': 0}
+    for chunk in reader:
+        if date_format is None:
+            # Detect the date format once and reuse it for every later chunk
+            date_format = detect_date_format(chunk[date_column])
+        dates, date_failures = parse_dates(chunk[date_column], date_format, to_day=False, fallback=True)
+        values, value_failures = parse_numeric(chunk[value_column], dtype=value_dtype)
+        report['date_failures'] += date_failures
+        report['value_failures'] += value_failures
+        if resample_rule is None:
+            date_parts.append(dates)
+            value_parts.append(values)
+            continue
+
+        buckets = pd.DatetimeIndex(dates).floor(resample_rule)
+        chunk_partials = pd.Series(values, index=buckets).groupby(level=0, sort=True).agg(
+            list(_PARTIAL_AGGREGATES))
+        # Each chunk shrinks to one row per bucket; in time-ordered files only
+        # the buckets straddling chunk boundaries appear twice
+        partials.append(chunk_partials[chunk_partials.index.notna()])
+
+    if resample_rule is None:
+        dates = np.concatenate(date_parts) if date_parts else np.array([], dtype='datetime64[ns]')
+        values = np.concatenate(value_parts) if value_parts else np.array([], dtype=value_dtype)
+        return pd.DataFrame({date_column: dates, value_column: values}), report
+
+    if not partials:
+        return pd.DataFrame({date_column: np.array([], dtype='datetime64[ns]'),
+                             value_column: np.array([], dtype=value_dtype)}), report
+    partials = _reduce_partials(pd.concat(partials))
+    if agg == 'mean':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = partials['sum'] / partials['count'].where(partials['count'] > 0)
+    else:
+        result = partials[agg]
+    return pd.DataFrame({
+        date_column: partials.index.to_numpy(dtype='datetime64[ns]'),
+        value_column: result.to_numpy(dtype=value_dtype),
+    }), report
+
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.feather', '.arrow', '.ipc')
+NUMPY_EXTENSIONS = ('.npy',)
+CSV_EXTENSIONS = ('.csv',)
+
+
+def _extension(file_path: str) -> str:
+    return os.path.splitext(file_path)[1].lower()
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Arrow support requires pyarrow. Install it with 'pip install pyarrow'.")
+    return pyarrow
+
+
+def is_columnar(file_path: str) -> bool:
+    """Whether the file is in one of the typed columnar formats."""
+    return _extension(file_path) in PARQUET_EXTENSIONS + ARROW_EXTENSIONS + NUMPY_EXTENSIONS
+
+
+def read_series(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a frame from Parquet, Arrow IPC/Feather, ``.npy`` or CSV.
+
+    Only ``columns`` are read when given. Arrow files are memory-mapped, so
+    uncompressed files written by ``write_series`` reopen without copying or
+    re-parsing; ``.npy`` files hold a structured array and are memory-mapped
+    too, so only the projected fields are ever paged in.
+    """
+    extension = _extension(file_path)
+    if extension in PARQUET_EXTENSIONS:
+        _require_pyarrow()
+        return pd.read_parquet(file_path, columns=columns)
+    if extension in ARROW_EXTENSIONS:
+        pa = _require_pyarrow()
+        import pyarrow.ipc
+
+        with pa.memory_map(file_path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+    if extension in NUMPY_EXTENSIONS:
+        records = np.load(file_path, mmap_mode='r')
+        if records.dtype.names is None:
+            raise ValueError("Expected a structured array with named fields in the .npy file")
+        names = columns if columns is not None else list(records.dtype.names)
+        missing = set(names) - set(records.dtype.names)
+        if missing:
+            raise ValueError(f"Columns not found in the dataset: {sorted(missing)}")
+        return pd.DataFrame({name: np.asarray(records[name]) for name in names})
+    if extension in CSV_EXTENSIONS:
+        return pd.read_csv(file_path, usecols=columns)
+    raise ValueError(f"Unsupported file format: {extension}")
+
+
+def write_series(frame: pd.DataFrame, file_path: str, columns: Optional[List[str]] = None) -> None:
+    """Write a frame as Parquet, Arrow IPC/Feather, ``.npy`` or CSV.
+
+    Arrow files are written uncompressed so they can be memory-mapped back.
+    """
+    if columns is not None:
+        frame = frame[columns]
+    extension = _extension(file_path)
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if extension in PARQUET_EXTENSIONS:
+        _require_pyarrow()
+        frame.to_parquet(file_path, index=False)
+    elif extension in ARROW_EXTENSIONS:
+        _require_pyarrow()
+        import pyarrow.feather
+
+        pyarrow.feather.write_feather(frame.reset_index(drop=True), file_path,
+                                      compression='uncompressed')
+    elif extension in NUMPY_EXTENSIONS:
+        records = np.empty(len(frame), dtype=[(str(name), frame[name].to_numpy().dtype)
+                                              for name in frame.columns])
+        for name in frame.columns:
+            records[str(name)] = frame[name].to_numpy()
+        np.save(file_path, records)
+    elif extension in CSV_EXTENSIONS:
+        frame.to_csv(file_path, index=False)
+    else:
+        raise ValueError(f"Unsupported file format: {extension}")
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from agents._lazy import lazy_import
+
+np = lazy_import('numpy')
+
+DECIMATION_METHODS = ['minmax', 'lttb']
+
+
+def _as_numeric(x: np.ndarray) -> np.ndarray:
+    """View datetime x values as int64 nanoseconds so they can be bucketed."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').view('i8').astype('float64')
+    return x.astype('float64')
+
+
+def _break_at_gaps(selected: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Add the first missing row between consecutive selected points that a gap separates.
+
+    Lines are drawn through the selected rows only, so without a NaN row
+    between them a decimated line would run straight across missing data.
+    Adds at most one row per selected point.
+    """
+    missing = np.flatnonzero(~np.isfinite(y))
+    if len(missing) == 0 or len(selected) < 2:
+        return selected
+    following = np.searchsorted(missing, selected[:-1])
+    candidates = missing[np.minimum(following, len(missing) - 1)]
+    gaps = (following < len(missing)) & (candidates < selected[1:])
+    return np.sort(np.concatenate((selected, candidates[gaps])))
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, n_bins: int) -> np.ndarray:
+    """Indices of the min and max point in each of ``n_bins`` equal-width x bins.
+
+    Keeps every local extreme, so spikes survive at any zoom level; at most
+    ``2 * n_bins + 2`` points are returned, plus one missing row at each gap
+    between them so the line breaks there. ``x`` must be sorted. Fully
+    vectorized and O(n).
+    """
+    x = _as_numeric(x)
+    y = np.asarray(y, dtype='float64')
+    finite = np.flatnonzero(np.isfinite(y) & np.isfinite(x))
+    if len(finite) <= 2 * n_bins + 2:
+        return _break_at_gaps(finite, y)
+    xf, yf = x[finite], y[finite]
+    span = xf[-1] - xf[0]
+    if span == 0:
+        bins = np.zeros(len(xf), dtype=np.int64)
+    else:
+        bins = np.minimum(((xf - xf[0]) / span * n_bins).astype(np.int64), n_bins - 1)
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bins)) + 1))
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.concatenate((starts, [len(bins)]))))
+    minima = np.minimum.reduceat(yf, starts)
+    maxima = np.maximum.reduceat(yf, starts)
+    # First position in each segment that attains its min / max
+    _, first_min = np.unique(segment[yf == minima[segment]], return_index=True)
+    _, first_max = np.unique(segment[yf == maxima[segment]], return_index=True)
+    min_positions = np.flatnonzero(yf == minima[segment])[first_min]
+    max_positions = np.flatnonzero(yf == maxima[segment])[first_max]
+
+    keep = np.unique(np.concatenate(([0, len(xf) - 1], min_positions, max_positions)))
+    return _break_at_gaps(finite[keep], y)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets selection of ``n_out`` point indices.
+
+    Preserves the visual shape of the line with a fixed number of points,
+    plus one missing row at each gap between them so the line breaks there.
+    The loop runs once per output bucket, with vectorized work inside, so the
+    cost is O(n) with only ``n_out`` Python iterations.
+    """
+    x = _as_numeric(x)
+    y = np.asarray(y, dtype='float64')
+    finite = np.flatnonzero(np.isfinite(y) & np.isfinite(x))
+    n = len(finite)
+    if n_out >= n or n_out < 3:
+        return _break_at_gaps(finite, y)
+    xf, yf = x[finite], y[finite]
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        next_x = xf[next_start:next_end].mean()
+        next_y = yf[next_start:next_end].mean()
+        bucket_x = xf[start:end]
+        bucket_y = yf[start:end]
+        areas = np.abs((xf[previous] - next_x) * (bucket_y - yf[previous])
+                       - (xf[previous] - bucket_x) * (next_y - yf[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return _break_at_gaps(finite[selected], y)
+
+
+def decimate(x: np.ndarray, y: np.ndarray, max_points: int, method: str = 'minmax') -> np.ndarray:
+    """Indices of at most about ``max_points`` points that draw the same line.
+
+    Returns every index when the series is already small enough. Gaps in
+    ``y`` keep one missing row, so the decimated line still breaks at them.
+    """
+    if method not in DECIMATION_METHODS:
+        raise ValueError(f"Invalid decimation method. Please choose one of {DECIMATION_METHODS}.")
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    if method == 'minmax':
+        # Two points per bin, so half as many bins as points
+        return minmax_indices(x, y, max(max_points // 2 - 1, 1))
+    return lttb_indices(x, y, max_points)
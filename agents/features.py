@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional, Sequence
+
+from agents._lazy import lazy_import
+from agents.resampling import forward_fill
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+ROLLING_STATISTICS = ['mean', 'std', 'min', 'max', 'ewm', 'quantile']
+
+# Elements per chunk of the sliding-window view used for rolling quantiles
+_QUANTILE_CHUNK = 1 << 22
+# Largest exponent of the EWMA decay used inside one block, keeps d**-k finite and accurate
+_EWM_BLOCK_EXPONENT = 50.0
+
+
+class _Blocks:
+    """Series cut into blocks of ``window`` values, shared by the window's statistics.
+
+    A trailing window always covers the tail of one block and the head of
+    the next. Extremes combine a suffix and a prefix accumulation per block
+    (van Herk/Gil-Werman). Moments use running sums of values centered on
+    their block mean: the sums return to zero at every block end, so
+    precision does not degrade along long or trending series the way one
+    global cumulative sum of raw values does.
+    """
+
+    def __init__(self, values: np.ndarray, valid: np.ndarray, window: int):
+        n = len(values)
+        self.n = n
+        self.window = window
+        self.values = np.zeros(n + (-n) % window)
+        self.values[:n] = np.where(valid, values, 0.0)
+        self.valid = np.zeros(len(self.values), dtype=bool)
+        self.valid[:n] = valid
+        # Padding counts as a gap too
+        self.gaps = not self.valid.all()
+
+    def moments(self) -> tuple:
+        """Per window: the mean and the sum of squared deviations (M2).
+
+        Computed for every position of the padded (blocks, window) layout so
+        that block-level terms broadcast instead of being gathered.
+        """
+        w, n = self.window, self.n
+        blocks = self.values.reshape(-1, w)
+        valid = self.valid.reshape(-1, w)
+        counts = np.maximum(valid.sum(axis=1), 1)
+        centers = blocks.sum(axis=1) / counts
+        centered = blocks - centers[:, None]
+        if self.gaps:
+            centered[~valid] = 0.0
+        # Running sums with ``window`` leading zeros: sums[w + i] covers values 0..i.
+        # Each block's deviations sum to zero, so the sums stay small.
+        sums = np.zeros(len(self.values) + w)
+        np.cumsum(centered, out=sums[w:])
+        # Squared deviations are centered on their block mean the same way
+        centered *= centered
+        spreads = centered.sum(axis=1) / counts
+        centered -= spreads[:, None]
+        if self.gaps:
+            centered[~valid] = 0.0
+        squares = np.zeros(len(self.values) + w)
+        np.cumsum(centered, out=squares[w:])
+
+        shape = blocks.shape
+        window_sums = (sums[w:] - sums[:-w]).reshape(shape)
+        window_squares = (squares[w:] - squares[:-w]).reshape(shape)
+        # Part of each window in the previous block, which was centered on that
+        # block's mean: shift it to the current block's center before combining
+        tail_n = np.arange(w - 1, -1, -1, dtype='float64')
+        previous = np.concatenate(([0], np.arange(len(centers) - 1)))
+        window_squares += tail_n * spreads[previous, None] + (w - tail_n) * spreads[:, None]
+        tail_sums = sums.reshape(-1, w)[:-1, -1:] - sums[:-w].reshape(shape)
+        offset = (centers[previous] - centers)[:, None]
+        window_squares += offset * (2 * tail_sums + tail_n * offset)
+        window_sums += tail_n * offset
+        mean = window_sums / w + centers[:, None]
+        m2 = window_squares - window_sums * window_sums / w
+        np.maximum(m2, 0.0, out=m2)
+        return mean.ravel()[w - 1:n], m2.ravel()[w - 1:n]
+
+    def extreme(self, maximum: bool = True) -> np.ndarray:
+        """Rolling max (or min) in O(n) whatever the window length."""
+        ufunc = np.maximum if maximum else np.minimum
+        w, n = self.window, self.n
+        padded = np.where(self.valid, self.values, -np.inf if maximum else np.inf)
+        forward = ufunc.accumulate(padded.reshape(-1, w), axis=1).ravel()
+        # The reversed array holds the blocks in reverse order, each reversed
+        backward = ufunc.accumulate(padded[::-1].reshape(-1, w), axis=1).ravel()[::-1]
+        return ufunc(backward[:n - w + 1], forward[w - 1:n])
+
+
+def _complete(counts: np.ndarray, window: int) -> np.ndarray:
+    """Windows with no missing value; pandas' default ``min_periods=window``."""
+    return counts[window:] - counts[:-window] == window
+
+
+def _emit(window: int, body: np.ndarray, complete: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Write window results ending at positions ``window - 1 ..`` into ``out``."""
+    out[:window - 1] = np.nan
+    out[window - 1:] = body
+    if not complete.all():
+        out[window - 1:][~complete] = np.nan
+    return out
+
+
+def rolling_quantile(values: np.ndarray, window: int, q: float, out: np.ndarray) -> np.ndarray:
+    """Rolling quantile with linear interpolation over a strided window view.
+
+    The view shares memory with ``values``; rows are processed in chunks so
+    the partition buffers stay bounded.
+    """
+    view = np.lib.stride_tricks.sliding_window_view(values, window)
+    step = max(_QUANTILE_CHUNK // window, 1)
+    out[:window - 1] = np.nan
+    for start in range(0, len(view), step):
+        # Windows holding a NaN yield NaN, matching min_periods=window
+        out[window - 1 + start:window - 1 + start + step] = np.quantile(view[start:start + step], q, axis=1)
+    return out
+
+
+def _decaying_sum(u: np.ndarray, decay: float) -> np.ndarray:
+    """Solve ``r[t] = decay * r[t - 1] + u[t]`` for the whole array.
+
+    Inside blocks short enough for ``decay ** -k`` to stay well conditioned
+    the recurrence is a scaled cumulative sum; only one carry per block is
+    propagated in Python.
+    """
+    n = len(u)
+    block = max(int(_EWM_BLOCK_EXPONENT / -np.log(decay)), 1)
+    padded = np.zeros(n + (-n) % block)
+    padded[:n] = u
+    powers = decay ** np.arange(block)
+    partial = np.cumsum(padded.reshape(-1, block) / powers, axis=1)
+    partial *= powers
+    step = decay ** block
+    carries = np.zeros(len(partial))
+    for b in range(1, len(partial)):
+        carries[b] = step * carries[b - 1] + partial[b - 1, -1]
+    partial += carries[:, None] * (powers * decay)
+    return partial.ravel()[:n]
+
+
+def ewm_mean(values: np.ndarray, span: float, out: np.ndarray) -> np.ndarray:
+    """Exponentially weighted mean, equal to pandas ``ewm(span=span).mean()``.
+
+    Uses the adjusted weights and treats NaNs as absent observations: the
+    mean is a decaying sum of the values over a decaying sum of the weights.
+    """
+    decay = 1.0 - 2.0 / (span + 1.0)
+    if decay <= 0:
+        # span 1: no smoothing, missing values keep the last observation
+        out[:] = forward_fill(values)
+        return out
+    valid = ~np.isnan(values)
+    if valid.all():
+        # Weight sums have a closed form without gaps
+        weights = -np.expm1(np.arange(1, len(values) + 1) * np.log(decay)) / (1.0 - decay)
+    else:
+        weights = _decaying_sum(valid.astype('float64'), decay)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.divide(_decaying_sum(np.where(valid, values, 0.0), decay), weights, out=out)
+    out[weights == 0] = np.nan
+    return out
+
+
+def feature_names(windows: Sequence[int], statistics: Sequence[str] = ('mean',),
+                  quantiles: Sequence[float] = (0.5,)) -> list:
+    """Column names produced by ``rolling_features``, e.g. ``mean_10`` or ``q90_30``."""
+    names = []
+    for stat in statistics:
+        if stat not in ROLLING_STATISTICS:
+            raise ValueError(f"Invalid statistic. Please choose one of {ROLLING_STATISTICS}.")
+        for window in windows:
+            if stat == 'quantile':
+                names.extend(f'q{q * 100:g}_{window}' for q in quantiles)
+            else:
+                names.append(f'{stat}_{window}')
+    return names
+
+
+def rolling_features(values: np.ndarray, windows: Iterable[int] = (10, 50),
+                     statistics: Sequence[str] = ('mean',), quantiles: Sequence[float] = (0.5,),
+                     shift: int = 0, dtype: str = 'float64',
+                     index: Optional[pd.Index] = None) -> pd.DataFrame:
+    """Compute every window/statistic combination into one feature matrix.
+
+    ``statistics`` are taken from ROLLING_STATISTICS; for 'ewm' each window
+    is used as the span and for 'quantile' each of ``quantiles`` is
+    computed. Mean, std, min and max of one window share one block layout
+    of the series. Windows follow pandas' trailing,
+    ``min_periods=window`` convention. ``shift`` lags every feature so row t
+    only uses values up to t - shift, which makes them safe to use as
+    forecasting regressors.
+
+    The columns are views into a single (features, rows) array of ``dtype``.
+    """
+    values = np.asarray(values, dtype='float64')
+    windows = [int(w) for w in windows]
+    if any(w < 1 for w in windows):
+        raise ValueError("Windows must be positive integers.")
+    names = feature_names(windows, statistics, quantiles)
+    rows = {name: row for row, name in enumerate(names)}
+    n = len(values)
+    matrix = np.full((len(names), n), np.nan, dtype=dtype)
+    valid = ~np.isnan(values)
+    counts = np.concatenate(([0], np.cumsum(valid, dtype=np.int64)))
+
+    for window in windows:
+        if 'ewm' in statistics:
+            ewm_mean(values, window, matrix[rows[f'ewm_{window}']])
+        if window > n:
+            continue
+        complete = _complete(counts, window)
+        if set(statistics) & {'mean', 'std', 'min', 'max'}:
+            blocks = _Blocks(values, valid, window)
+        if 'mean' in statistics or 'std' in statistics:
+            mean, m2 = blocks.moments()
+            if 'mean' in statistics:
+                _emit(window, mean, complete, matrix[rows[f'mean_{window}']])
+            if 'std' in statistics and window > 1:
+                # Sample standard deviation (ddof=1), as pandas computes it
+                _emit(window, np.sqrt(m2 / (window - 1)), complete, matrix[rows[f'std_{window}']])
+        for stat in ('min', 'max'):
+            if stat in statistics:
+                _emit(window, blocks.extreme(stat == 'max'), complete, matrix[rows[f'{stat}_{window}']])
+        if 'quantile' in statistics:
+            for q in quantiles:
+                rolling_quantile(values, window, q, matrix[rows[f'q{q * 100:g}_{window}']])
+
+    if shift:
+        matrix[:, shift:] = matrix[:, :-shift].copy()
+        matrix[:, :shift] = np.nan
+    return pd.DataFrame(matrix.T, columns=names, index=index, copy=False)
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import logging
+from abc import ABC, abstractmethod
+from statistics import NormalDist
+from typing import Optional, Tuple
+
+from agents._lazy import lazy_import
+from agents.resampling import default_season_length, infer_frequency
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+FORECASTERS = ['prophet', 'fourier', 'seasonal_naive']
+
+# Prophet speed/accuracy trade-offs. Constructor options go to Prophet(),
+# 'algorithm' and 'iter' to the Stan optimizer (ignored when sampling)
+PROPHET_PROFILES = {
+    'default': {},
+    # MAP fit with fewer changepoints and optimizer iterations, and 200
+    # instead of 1000 simulated paths for the uncertainty intervals
+    'fast': {'uncertainty_samples': 200, 'n_changepoints': 10, 'daily_seasonality': False,
+             'algorithm': 'LBFGS', 'iter': 1000},
+    # Full posterior by MCMC: parameter uncertainty in the intervals, much slower
+    'mcmc': {'mcmc_samples': 300},
+}
+_PROPHET_MODEL_OPTIONS = ['uncertainty_samples', 'yearly_seasonality', 'weekly_seasonality',
+                          'daily_seasonality', 'n_changepoints', 'changepoint_range',
+                          'mcmc_samples', 'stan_backend']
+_PROPHET_FIT_OPTIONS = ['algorithm', 'iter']
+
+_DAY_NS = 24 * 3600 * 10**9
+# Seasonality periods in days, as Prophet defines them
+_YEAR_DAYS = 365.25
+_WEEK_DAYS = 7.0
+# Rows per chunk when accumulating per-series Gram matrices
+_GRAM_CHUNK = 4096
+
+
+def _epoch_days(dates: np.ndarray) -> np.ndarray:
+    return np.asarray(dates).astype('datetime64[ns]').view('i8') / _DAY_NS
+
+
+def _future_dates(last, periods: int, freq: str) -> np.ndarray:
+    """The ``periods`` dates after ``last``, as Prophet's make_future_dataframe builds them."""
+    return pd.date_range(start=last, periods=periods + 1, freq=freq)[1:].to_numpy(dtype='datetime64[ns]')
+
+
+def _z_score(interval_width: float) -> float:
+    return NormalDist().inv_cdf(0.5 + interval_width / 2)
+
+
+def _last_valid(values: np.ndarray) -> np.ndarray:
+    """Row index of the last non-NaN value of every column (-1 when empty)."""
+    valid = ~np.isnan(values)
+    last = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+    return np.where(valid.any(axis=0), last, -1)
+
+
+def _fill_down(values: np.ndarray) -> np.ndarray:
+    """Forward fill every column of a 2-D array."""
+    last = np.where(~np.isnan(values), np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(last, axis=0, out=last)
+    return values[last, np.arange(values.shape[1])]
+
+
+def quiet_stan_logging() -> None:
+    """Silence per-fit Stan/Prophet logging, e.g. in worker processes."""
+    for name in ('prophet', 'cmdstanpy'):
+        logger = logging.getLogger(name)
+        # A handler of our own stops cmdstanpy from installing its INFO handler
+        logger.addHandler(logging.NullHandler())
+        logger.setLevel(logging.WARNING)
+
+
+class Forecaster(ABC):
+    """Interface of the models behind ``train_prophet_model``/``make_forecast``.
+
+    ``fit`` takes a prepared ``ds/y`` frame; ``predict`` returns the history
+    and ``periods`` future dates with at least the ``ds``, ``yhat``,
+    ``yhat_lower``, ``yhat_upper``, ``trend`` and ``yearly`` columns.
+    Forecasters with ``supports_batch`` also fit many series at once from a
+    shared date grid through ``fit_batch``/``predict_batch``.
+    """
+
+    name = None
+    supports_batch = False
+
+    @abstractmethod
+    def fit(self, prepared: pd.DataFrame) -> 'Forecaster':
+        """Fit the model to a prepared ``ds/y`` frame and return it."""
+
+    @abstractmethod
+    def predict(self, periods: int, freq: str = 'D') -> pd.DataFrame:
+        """History and ``periods`` future dates with the forecast columns."""
+
+
+def prophet_profile(profile: str = 'default', **overrides) -> Tuple[dict, dict]:
+    """Prophet constructor and fit arguments for a name in PROPHET_PROFILES.
+
+    Keyword arguments override single settings of the profile, e.g.
+    ``prophet_profile('fast', uncertainty_samples=0, stan_backend='CMDSTANPY')``.
+    With ``uncertainty_samples=0`` no intervals are simulated at all and the
+    forecast has no ``yhat_lower``/``yhat_upper`` columns.
+    """
+    if profile not in PROPHET_PROFILES:
+        raise ValueError(f"Unknown Prophet profile: {profile}. Available profiles: {list(PROPHET_PROFILES)}")
+    options = {**PROPHET_PROFILES[profile], **overrides}
+    unknown = set(options) - set(_PROPHET_MODEL_OPTIONS + _PROPHET_FIT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown Prophet options: {sorted(unknown)}. "
+                         f"Available options: {_PROPHET_MODEL_OPTIONS + _PROPHET_FIT_OPTIONS}")
+    model_kwargs = {name: value for name, value in options.items() if name in _PROPHET_MODEL_OPTIONS}
+    fit_kwargs = {name: value for name, value in options.items() if name in _PROPHET_FIT_OPTIONS}
+    if model_kwargs.get('mcmc_samples'):
+        # The sampler takes no optimizer arguments
+        fit_kwargs = {}
+    return model_kwargs, fit_kwargs
+
+
+class ProphetForecaster(Forecaster):
+    """Prophet, optionally through a ModelCache.
+
+    ``profile`` starts from a PROPHET_PROFILES preset; explicit
+    ``model_kwargs``/``fit_kwargs`` are applied on top of it.
+    """
+
+    name = 'prophet'
+
+    def __init__(self, model_kwargs: Optional[dict] = None, fit_kwargs: Optional[dict] = None, cache=None,
+                 profile: str = 'default'):
+        profile_model_kwargs, profile_fit_kwargs = prophet_profile(profile)
+        self.profile = profile
+        self.model_kwargs = {**profile_model_kwargs, **(model_kwargs or {})}
+        self.fit_kwargs = {**profile_fit_kwargs, **(fit_kwargs or {})}
+        self.cache = cache
+        self.model = None
+        self.cache_status = None
+
+    def fit(self, prepared: pd.DataFrame) -> 'ProphetForecaster':
+        if self.cache is not None:
+            self.model, self.cache_status = self.cache.fit(prepared, self.model_kwargs, self.fit_kwargs)
+            return self
+        from prophet import Prophet
+
+        self.model = Prophet(**self.model_kwargs)
+        self.model.fit(prepared, **self.fit_kwargs)
+        self.cache_status = None
+        return self
+
+    def predict(self, periods: int, freq: str = 'D') -> pd.DataFrame:
+        future_dates = self.model.make_future_dataframe(periods=periods, freq=freq)
+        return self.model.predict(future_dates)
+
+
+class _BatchForecaster(Forecaster):
+    """Shared single-series wrappers around ``fit_batch``/``predict_batch``."""
+
+    supports_batch = True
+
+    def __init__(self, interval_width: float = 0.8):
+        self.interval_width = interval_width
+        self.dates = None
+
+    def fit(self, prepared: pd.DataFrame) -> '_BatchForecaster':
+        return self.fit_batch(prepared['ds'].to_numpy(), prepared['y'].to_numpy(dtype='float64')[:, None])
+
+    def predict(self, periods: int, freq: str = 'D') -> pd.DataFrame:
+        dates, components = self.predict_batch(periods, freq)
+        return pd.DataFrame({'ds': dates, **{name: values[:, 0] for name, values in components.items()}})
+
+    @abstractmethod
+    def fit_batch(self, dates: np.ndarray, values: np.ndarray) -> '_BatchForecaster':
+        """Fit every column of ``values`` against the shared ``dates``."""
+
+    @abstractmethod
+    def predict_batch(self, periods: int, freq: str = 'D') -> Tuple[np.ndarray, dict]:
+        """Future dates and a dict of forecast columns, one value column per series."""
+
+
+class FourierForecaster(_BatchForecaster):
+    """Linear trend plus Fourier yearly/weekly seasonality, fitted by least squares.
+
+    The same seasonal terms as Prophet's defaults, without changepoints:
+    yearly seasonality needs two years of history and weekly seasonality
+    sub-weekly data, as in Prophet's automatic mode. Intervals are normal
+    with the residual standard deviation.
+
+    All series of a batch share one design matrix; the per-series normal
+    equations come from matrix products over all series (NaNs get zero
+    weight) and are solved together, so thousands of series cost little
+    more than one.
+    """
+
+    name = 'fourier'
+
+    def __init__(self, yearly_order: int = 10, weekly_order: int = 3, interval_width: float = 0.8,
+                 ridge: float = 1e-6):
+        super().__init__(interval_width)
+        self.yearly_order = yearly_order
+        self.weekly_order = weekly_order
+        self.ridge = ridge
+
+    def _design(self, dates: np.ndarray) -> Tuple[np.ndarray, slice, slice]:
+        days = _epoch_days(dates)
+        columns = [np.ones(len(days)), (days - self.start) / self.scale]
+        yearly = weekly = slice(2, 2)
+        for period, order, enabled in ((_YEAR_DAYS, self.yearly_order, self.use_yearly),
+                                       (_WEEK_DAYS, self.weekly_order, self.use_weekly)):
+            if not enabled or order == 0:
+                continue
+            angles = 2 * np.pi * days[:, None] * np.arange(1, order + 1) / period
+            first = len(columns)
+            columns.extend(np.sin(angles).T)
+            columns.extend(np.cos(angles).T)
+            if period == _YEAR_DAYS:
+                yearly = slice(first, len(columns))
+            else:
+                weekly = slice(first, len(columns))
+        return np.column_stack(columns), yearly, weekly
+
+    def fit_batch(self, dates: np.ndarray, values: np.ndarray) -> 'FourierForecaster':
+        """Fit one model per column of ``values`` (rows follow ``dates``)."""
+        days = _epoch_days(dates)
+        self.dates = np.asarray(dates).astype('datetime64[ns]')
+        self.start = days.min()
+        self.scale = max(days.max() - self.start, 1.0)
+        self.use_yearly = days.max() - days.min() >= 2 * _YEAR_DAYS
+        self.use_weekly = days.max() - days.min() >= 2 * _WEEK_DAYS and np.median(np.diff(days)) < _WEEK_DAYS
+        X, self.yearly, self.weekly = self._design(self.dates)
+
+        weights = (~np.isnan(values)).astype('float64')
+        targets = np.where(weights > 0, values, 0.0)
+        p = X.shape[1]
+        moments = X.T @ targets
+        ridge = self.ridge * np.eye(p)
+        if weights.all():
+            # Complete series share one Gram matrix: a single multi-RHS solve
+            self.coef = np.linalg.solve(X.T @ X + ridge, moments).T
+        else:
+            # Per-series X' W_s X, accumulated over row chunks to bound memory
+            gram = np.zeros((p * p, values.shape[1]))
+            for start in range(0, len(X), _GRAM_CHUNK):
+                rows = X[start:start + _GRAM_CHUNK]
+                outer = (rows[:, :, None] * rows[:, None, :]).reshape(len(rows), p * p)
+                gram += outer.T @ weights[start:start + _GRAM_CHUNK]
+            gram = gram.T.reshape(-1, p, p) + ridge
+            self.coef = np.linalg.solve(gram, moments.T[:, :, None])[:, :, 0]
+
+        residuals = (targets - X @ self.coef.T) * weights
+        dof = np.maximum(weights.sum(axis=0) - p, 1)
+        self.sigma = np.sqrt((residuals * residuals).sum(axis=0) / dof)
+        return self
+
+    def predict_batch(self, periods: int, freq: str = 'D') -> Tuple[np.ndarray, dict]:
+        dates = np.concatenate((self.dates, _future_dates(self.dates[-1], periods, freq)))
+        X, _, _ = self._design(dates)
+        trend = X[:, :2] @ self.coef[:, :2].T
+        yearly = X[:, self.yearly] @ self.coef[:, self.yearly].T
+        weekly = X[:, self.weekly] @ self.coef[:, self.weekly].T
+        yhat = trend + yearly + weekly
+        band = _z_score(self.interval_width) * self.sigma
+        return dates, {'yhat': yhat, 'yhat_lower': yhat - band, 'yhat_upper': yhat + band,
+                       'trend': trend, 'yearly': yearly, 'weekly': weekly}
+
+
+class SeasonalNaiveForecaster(_BatchForecaster):
+    """Repeat the last observed season of every series.
+
+    ``season_length`` defaults to the natural season of the data frequency
+    (7 for daily data, 12 for monthly, ...). Each series continues from its
+    own last observation; gaps are forward filled. Intervals widen with
+    every full season ahead, using the spread of the seasonal differences.
+    ``trend`` is the trailing mean over one season.
+    """
+
+    name = 'seasonal_naive'
+
+    def __init__(self, season_length: Optional[int] = None, interval_width: float = 0.8):
+        super().__init__(interval_width)
+        self.season_length = season_length
+
+    def fit_batch(self, dates: np.ndarray, values: np.ndarray) -> 'SeasonalNaiveForecaster':
+        """Fit one model per column of ``values`` (rows follow ``dates``)."""
+        self.dates = np.asarray(dates).astype('datetime64[ns]')
+        season = self.season_length
+        if season is None:
+            season = default_season_length(infer_frequency(self.dates.view('i8'))) or 7
+        self.season = season
+        valid = ~np.isnan(values)
+        self.first = np.argmax(valid, axis=0)
+        self.last = _last_valid(values)
+        self.values = _fill_down(values)
+        changes = values[season:] - values[:-season]
+        counts = (~np.isnan(changes)).sum(axis=0)
+        deviations = changes - np.nansum(changes, axis=0) / np.maximum(counts, 1)
+        self.sigma = np.sqrt(np.nansum(deviations * deviations, axis=0) / np.maximum(counts - 1, 1))
+        return self
+
+    def predict_batch(self, periods: int, freq: str = 'D') -> Tuple[np.ndarray, dict]:
+        dates = np.concatenate((self.dates, _future_dates(self.dates[-1], periods, freq)))
+        m, n = self.season, len(self.dates)
+        series = np.arange(self.values.shape[1])
+        rows = np.arange(len(dates))[:, None]
+        # Steps past each series' last observation; negative inside its history
+        ahead = rows - self.last[None, :] - 1
+        source = np.where(ahead >= 0, self.last - m + 1 + ahead % m, rows - m)
+        valid = (source >= 0) & (self.last >= 0)
+        yhat = np.where(valid, self.values[np.clip(source, 0, n - 1), series], np.nan)
+
+        # Trailing one-season mean, held at its last value beyond the history
+        sums = np.vstack((np.zeros((1, len(series))), np.nancumsum(self.values, axis=0)))
+        level_rows = np.clip(np.minimum(rows, self.last[None, :]), m - 1, n - 1)
+        trend = (sums[level_rows + 1, series] - sums[level_rows - m + 1, series]) / m
+        trend[rows - m + 1 < self.first[None, :]] = np.nan
+        band = _z_score(self.interval_width) * self.sigma * np.sqrt(np.maximum(ahead, 0) // m + 1)
+        return dates, {'yhat': yhat, 'yhat_lower': yhat - band, 'yhat_upper': yhat + band,
+                       'trend': trend, 'yearly': np.zeros_like(yhat)}
+
+
+_FORECASTER_CLASSES = {
+    'prophet': ProphetForecaster,
+    'fourier': FourierForecaster,
+    'seasonal_naive': SeasonalNaiveForecaster,
+}
+
+
+def get_forecaster(forecaster='prophet', **kwargs) -> Forecaster:
+    """Return a Forecaster instance from a name in FORECASTERS or an instance."""
+    if isinstance(forecaster, Forecaster):
+        return forecaster
+    if forecaster not in _FORECASTER_CLASSES:
+        raise ValueError(f"Unknown forecaster: {forecaster}. Available forecasters: {FORECASTERS}")
+    return _FORECASTER_CLASSES[forecaster](**kwargs)
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import copy
+from typing import List, Optional, Tuple
+
+from agents._lazy import lazy_import
+from agents.batch import grid_matrix
+from agents.forecasters import _future_dates, get_forecaster
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+sparse = lazy_import('scipy.sparse')
+splinalg = lazy_import('scipy.sparse.linalg')
+
+RECONCILIATION_METHODS = ['bottom_up', 'top_down', 'ols', 'wls', 'mint']
+
+TOTAL = 'total'
+
+
+class Hierarchy:
+    """Bottom-level series and the sparse summing matrix of their aggregation levels.
+
+    ``levels`` are the grouping columns from the top down, e.g.
+    ``['region', 'store']``; every distinct combination is a bottom series.
+    The levels are ``'total'`` followed by ``levels``, and every node of a
+    level sums the bottom series below it: ``S`` has one row per node and
+    one column per bottom series, so all node values are ``Y_bottom @ S.T``.
+
+    Bottom series must share one regular date grid; missing bottom
+    observations count as zero in the aggregates.
+    """
+
+    def __init__(self, data: pd.DataFrame, levels: List[str], date_column: str = 'ds',
+                 value_column: str = 'y'):
+        missing = set(levels + [date_column, value_column]) - set(data.columns)
+        if missing:
+            raise ValueError(f"Columns not found in the dataset: {sorted(missing)}")
+        unlabeled = data[levels].isnull().any(axis=1)
+        if unlabeled.any():
+            raise ValueError(f"{int(unlabeled.sum())} rows have missing level values; "
+                             f"drop or label them before building the hierarchy")
+        self.levels = [TOTAL] + list(levels)
+        codes = data.groupby(levels, sort=True, observed=True).ngroup().to_numpy()
+        self.bottom = data[levels].drop_duplicates().sort_values(levels, ignore_index=True)
+        grid, self.freq, self.values = grid_matrix(codes, len(self.bottom), data[date_column], data[value_column])
+        self.dates = grid.view('datetime64[ns]')
+
+        n_bottom = len(self.bottom)
+        blocks, names, node_levels = [], [], []
+        self.slices = {}
+        for depth, level in enumerate(self.levels):
+            if level == TOTAL:
+                node_codes = np.zeros(n_bottom, dtype='int64')
+                labels = [TOTAL]
+            else:
+                keys = levels[:depth]
+                node_codes = self.bottom.groupby(keys, sort=True, observed=True).ngroup().to_numpy()
+                prefixes = self.bottom[keys].drop_duplicates().sort_values(keys)
+                columns = [prefixes[key].astype(str) for key in keys]
+                labels = columns[0].str.cat(columns[1:], sep='/').tolist()
+            blocks.append(sparse.csr_matrix((np.ones(n_bottom), (node_codes, np.arange(n_bottom))),
+                                            shape=(len(labels), n_bottom)))
+            self.slices[level] = slice(len(names), len(names) + len(labels))
+            names.extend(labels)
+            node_levels.extend([level] * len(labels))
+        self.S = sparse.vstack(blocks, format='csr')
+        self.nodes = pd.DataFrame({'level': node_levels, 'node': names})
+
+    @property
+    def bottom_level(self) -> str:
+        return self.levels[-1]
+
+    def aggregate(self, bottom: np.ndarray) -> np.ndarray:
+        """Sum a ``(dates, bottom series)`` matrix up to every node."""
+        return np.asarray(self.S @ np.nan_to_num(bottom).T).T
+
+    def level_values(self, level: str) -> np.ndarray:
+        """History of every node of ``level`` as a ``(dates, nodes)`` matrix."""
+        if level == self.bottom_level:
+            return self.values
+        return np.asarray(self.S[self.slices[level]] @ np.nan_to_num(self.values).T).T
+
+    def forecast_level(self, level: str, forecaster, periods: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Fitted and forecast ``yhat`` of every node of ``level``, ``(dates, nodes)``.
+
+        Batch-capable forecasters fit the whole level as one matrix; others
+        are fitted node by node, so they suit the upper levels with few nodes.
+        """
+        values = self.level_values(level)
+        dates = np.concatenate((self.dates, _future_dates(self.dates[-1], periods, self.freq)))
+        model = get_forecaster(forecaster)
+        if model.supports_batch:
+            return dates, model.fit_batch(self.dates, values).predict_batch(periods, self.freq)[1]['yhat']
+
+        yhat = np.full((len(dates), values.shape[1]), np.nan)
+        for node in range(values.shape[1]):
+            node_model = get_forecaster(forecaster) if isinstance(forecaster, str) else copy.deepcopy(model)
+            known = ~np.isnan(values[:, node])
+            prepared = pd.DataFrame({'ds': self.dates[known], 'y': values[known, node]})
+            forecast = node_model.fit(prepared).predict(periods, freq=self.freq)
+            ticks = forecast['ds'].to_numpy(dtype='datetime64[ns]')
+            positions = np.minimum(np.searchsorted(dates, ticks), len(dates) - 1)
+            matched = dates[positions] == ticks
+            yhat[positions[matched], node] = forecast['yhat'].to_numpy()[matched]
+        return dates, yhat
+
+    def reconcile(self, base: dict, method: str = 'bottom_up',
+                  residual_variance: Optional[dict] = None) -> np.ndarray:
+        """Coherent bottom-level forecasts from base forecasts of some levels.
+
+        ``base`` maps a level to its ``(horizon, nodes)`` forecasts.
+        'bottom_up' uses the bottom level, 'top_down' splits the total by the
+        historical share of every bottom series. 'ols', 'wls' (structural
+        scaling by the number of bottom series below a node) and 'mint'
+        (MinT with a diagonal covariance from ``residual_variance``) combine
+        every forecast level by generalized least squares and need the bottom
+        level among them. The normal equations are never formed over the
+        bottom series: their weights are diagonal, so by the Woodbury identity
+        only a system of the size of the upper nodes is solved, once for all
+        horizons, and tens of thousands of bottom series need memory linear in
+        their number. Returns the ``(horizon, bottom series)`` forecasts;
+        ``aggregate`` sums them to every node.
+        """
+        if method not in RECONCILIATION_METHODS:
+            raise ValueError(f"Invalid reconciliation method. Please choose one of {RECONCILIATION_METHODS}.")
+        if method == 'bottom_up':
+            if self.bottom_level not in base:
+                raise ValueError("Bottom-up reconciliation needs a forecast of the bottom level")
+            return base[self.bottom_level]
+        if method == 'top_down':
+            if TOTAL not in base:
+                raise ValueError("Top-down reconciliation needs a forecast of the total")
+            shares = np.nansum(self.values, axis=0)
+            return base[TOTAL][:, :1] * (shares / shares.sum())[None, :]
+
+        if self.bottom_level not in base:
+            raise ValueError(f"'{method}' reconciliation needs a forecast of the bottom level")
+        levels = [level for level in self.levels if level in base]
+        S = sparse.vstack([self.S[self.slices[level]] for level in levels], format='csr')
+        forecasts = np.hstack([base[level] for level in levels])
+        if method == 'ols':
+            weights = np.ones(S.shape[0])
+        elif method == 'wls':
+            weights = 1.0 / np.asarray(S.sum(axis=1)).ravel()
+        else:
+            if residual_variance is None:
+                raise ValueError("MinT reconciliation needs the residual variance of every forecast level")
+            variance = np.concatenate([residual_variance[level] for level in levels])
+            fallback = np.nanmedian(variance[variance > 0]) if (variance > 0).any() else 1.0
+            weights = 1.0 / np.where(np.isfinite(variance) & (variance > 0), variance, fallback)
+        # Nodes without a base forecast (e.g. too short to fit) get no weight; a
+        # tiny ridge keeps the system solvable, so their bottom series follow
+        # from the forecasts of the levels above
+        weights = np.where(np.isnan(forecasts).any(axis=0), 0.0, weights)
+        forecasts = np.nan_to_num(forecasts)
+
+        # The bottom rows of S are the identity: with A the upper rows and D the
+        # bottom weights, S'WS = D + A'W_aA and its inverse needs A D^-1 A' only
+        n_upper = S.shape[0] - S.shape[1]
+        A, upper_weights, bottom_weights = S[:n_upper], weights[:n_upper], weights[n_upper:]
+        diagonal = bottom_weights + A.T @ upper_weights
+        bottom_weights = bottom_weights + 1e-9 * diagonal.mean()
+        shares = weights[n_upper:] / bottom_weights
+        bottom = forecasts[:, n_upper:] * shares[None, :]
+        if n_upper == 0:
+            return bottom
+        # Multipliers of the upper forecasts' disagreement with the aggregated bottom ones
+        spread = A.multiply(1.0 / bottom_weights[None, :]).tocsr()
+        system = (sparse.identity(n_upper) + sparse.diags(upper_weights) @ spread @ A.T).tocsc()
+        disagreement = upper_weights[:, None] * (forecasts[:, :n_upper].T - A @ bottom.T)
+        multipliers = splinalg.splu(system).solve(np.asarray(disagreement))
+        return bottom + np.asarray(spread.T @ multipliers).T
+
+
+def forecast_hierarchy(data: pd.DataFrame, levels: List[str], periods: int, forecasters: Optional[dict] = None,
+                       method: str = 'bottom_up', date_column: str = 'ds',
+                       value_column: str = 'y') -> pd.DataFrame:
+    """Forecast a hierarchy of series and reconcile the forecasts.
+
+    ``data`` is long format with the ``levels`` grouping columns (top down),
+    dates and values of the bottom series. ``forecasters`` maps a level
+    (``'total'`` or a column of ``levels``) to the model for its nodes, e.g.
+    ``{'total': 'prophet', 'region': 'fourier', 'store': 'seasonal_naive'}``;
+    by default the levels ``method`` needs use 'fourier'. See
+    ``Hierarchy.reconcile`` for the methods.
+
+    Returns one row per node and forecast date with ``level``, ``node``,
+    ``ds``, the reconciled ``yhat`` and the ``base_yhat`` of forecast levels.
+    """
+    if periods <= 0:
+        raise ValueError("Number of periods must be positive")
+    if method not in RECONCILIATION_METHODS:
+        raise ValueError(f"Invalid reconciliation method. Please choose one of {RECONCILIATION_METHODS}.")
+    hierarchy = Hierarchy(data, levels, date_column, value_column)
+    if forecasters is None:
+        needed = {'bottom_up': [hierarchy.bottom_level], 'top_down': [TOTAL]}.get(method, hierarchy.levels)
+        forecasters = {level: 'fourier' for level in needed}
+    unknown = set(forecasters) - set(hierarchy.levels)
+    if unknown:
+        raise ValueError(f"Unknown levels: {sorted(unknown)}. Available levels: {hierarchy.levels}")
+
+    history = len(hierarchy.dates)
+    base, residual_variance = {}, {}
+    for level in hierarchy.levels:
+        if level not in forecasters:
+            continue
+        _, yhat = hierarchy.forecast_level(level, forecasters[level], periods)
+        base[level] = yhat[history:]
+        residual_variance[level] = np.nanvar(hierarchy.level_values(level) - yhat[:history], axis=0)
+
+    reconciled = hierarchy.aggregate(hierarchy.reconcile(base, method, residual_variance))
+    base_all = np.full_like(reconciled, np.nan)
+    for level, forecasts in base.items():
+        base_all[:, hierarchy.slices[level]] = forecasts
+
+    # Nodes in hierarchy order (total first), each with its forecast dates
+    future = _future_dates(hierarchy.dates[-1], periods, hierarchy.freq)
+    return pd.DataFrame({
+        'level': np.repeat(hierarchy.nodes['level'].to_numpy(), periods),
+        'node': np.repeat(hierarchy.nodes['node'].to_numpy(), periods),
+        'ds': np.tile(future, len(hierarchy.nodes)),
+        'yhat': reconciled.T.ravel(),
+        'base_yhat': base_all.T.ravel(),
+    })
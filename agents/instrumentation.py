@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss is in bytes on macOS and in KiB elsewhere
+_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, or None where unsupported."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+class Tracer:
+    """Record wall time, CPU time, memory and input rows of agent methods and pipeline stages.
+
+    Every span becomes one record in ``spans``. Peak RSS is the process-wide
+    high-water mark when the span ends. With ``memory=True`` tracemalloc also
+    measures the peak Python allocation inside each span (including nested
+    spans); it slows allocation-heavy code noticeably, so it is off by default.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._stack = []
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def span(self, name: str, category: str = 'agent', rows: Optional[int] = None):
+        """Time the enclosed block; the yielded record can be updated (e.g. ``rows``) inside it."""
+        record = {'name': name, 'category': category, 'depth': len(self._stack), 'rows': rows,
+                  'start': time.perf_counter() - self._origin, 'error': None}
+        if self.memory:
+            base = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+                tracemalloc.reset_peak()
+        # Largest peak seen in nested spans, which reset tracemalloc's peak themselves
+        self._stack.append(0)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall
+            record['cpu_seconds'] = time.process_time() - cpu
+            record['peak_rss_bytes'] = peak_rss()
+            child_peak = self._stack.pop()
+            record['peak_traced_bytes'] = None
+            if self.memory:
+                peak = max(tracemalloc.get_traced_memory()[1], child_peak)
+                record['peak_traced_bytes'] = max(peak - base, 0)
+                if self._stack:
+                    self._stack[-1] = max(self._stack[-1], peak)
+            self.spans.append(record)
+
+    def summary(self) -> dict:
+        """Totals per ``(category, name)``: calls, wall/CPU seconds, rows and peak memory."""
+        totals = {}
+        for record in self.spans:
+            key = (record['category'], record['name'])
+            total = totals.setdefault(key, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows': 0,
+                                            'peak_rss_bytes': None, 'peak_traced_bytes': None})
+            total['calls'] += 1
+            total['wall_seconds'] += record['wall_seconds']
+            total['cpu_seconds'] += record['cpu_seconds']
+            total['rows'] += record['rows'] or 0
+            for name in ['peak_rss_bytes', 'peak_traced_bytes']:
+                if record[name] is not None:
+                    total[name] = max(total[name] or 0, record[name])
+        return totals
+
+    def to_json(self, file_path: str) -> str:
+        """Write the spans in Chrome trace event format (chrome://tracing, Perfetto)."""
+        events = [{
+            'name': record['name'],
+            'cat': record['category'],
+            'ph': 'X',
+            'ts': record['start'] * 1e6,
+            'dur': record['wall_seconds'] * 1e6,
+            'pid': os.getpid(),
+            'tid': 0,
+            'args': {name: record[name] for name in ['cpu_seconds', 'rows', 'peak_rss_bytes',
+                                                     'peak_traced_bytes', 'error']},
+        } for record in self.spans]
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, indent=1)
+        return file_path
+
+    def to_prometheus(self, file_path: str, prefix: str = 'time_series_agent') -> str:
+        """Write the span totals in the Prometheus text exposition format."""
+        metrics = [
+            ('wall_seconds_total', 'counter', 'Wall time spent in the span.', 'wall_seconds'),
+            ('cpu_seconds_total', 'counter', 'CPU time spent in the span.', 'cpu_seconds'),
+            ('calls_total', 'counter', 'Number of times the span ran.', 'calls'),
+            ('rows_total', 'counter', 'Input rows processed by the span.', 'rows'),
+            ('peak_rss_bytes', 'gauge', 'Process peak resident set size at the end of the span.',
+             'peak_rss_bytes'),
+            ('peak_traced_bytes', 'gauge', 'Peak Python allocation inside the span (tracemalloc).',
+             'peak_traced_bytes'),
+        ]
+        totals = self.summary()
+        lines = []
+        for metric, kind, description, field in metrics:
+            lines.append(f'# HELP {prefix}_{metric} {description}')
+            lines.append(f'# TYPE {prefix}_{metric} {kind}')
+            for (category, name), total in totals.items():
+                if total[field] is not None:
+                    lines.append(f'{prefix}_{metric}{{category="{category}",name="{name}"}} {total[field]}')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return file_path
+
+    def export(self, file_path: str) -> str:
+        """Write a Prometheus text file for ``.prom``/``.txt`` paths, a JSON trace otherwise."""
+        if file_path.endswith(('.prom', '.txt')):
+            return self.to_prometheus(file_path)
+        return self.to_json(file_path)
+
+
+def traced(method):
+    """Record calls of a TimeSeriesAgent method on ``self.tracer`` when one is set.
+
+    Without a tracer the only cost is one attribute check. ``rows`` is the
+    length of the data when the call starts, or when it ends for calls that
+    load the data.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        tracer = self.tracer
+        if tracer is None:
+            return method(self, *args, **kwargs)
+        with tracer.span(name, rows=None if self._data is None else len(self._data)) as record:
+            result = method(self, *args, **kwargs)
+            if record['rows'] is None and self._data is not None:
+                record['rows'] = len(self._data)
+            return result
+    return wrapper
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+from typing import Iterable, List, Optional
+
+from agents._lazy import lazy_import
+
+np = lazy_import('numpy')
+plotly = lazy_import('plotly')
+go = lazy_import('plotly.graph_objects')
+
+INTERACTIVE_PLOTS = ['raw_data', 'moving_averages', 'forecast', 'trend', 'seasonality']
+
+
+def _epoch_ms(dates: np.ndarray) -> np.ndarray:
+    """Dates as float milliseconds since the epoch.
+
+    Plotly reads numbers on a date axis as epoch milliseconds, and numeric
+    NumPy arrays are embedded as compact base64 typed arrays (plotly>=6)
+    or plain numbers rather than one ISO string per point.
+    """
+    ticks = np.asarray(dates).astype('datetime64[ns]').view('i8')
+    ms = ticks / 1e6
+    ms[ticks == np.iinfo(np.int64).min] = np.nan
+    return ms
+
+
+def _layout(fig: go.Figure, title: str, value_column: str) -> go.Figure:
+    fig.update_layout(title=title, xaxis_title='Date', yaxis_title=value_column,
+                      xaxis_type='date', hovermode='x unified', template='plotly_white')
+    return fig
+
+
+def _value_dtype() -> str:
+    """Dtype of embedded trace values.
+
+    float32 is plenty for on-screen values and halves the base64 typed arrays
+    of plotly>=6. Older versions write JSON number lists, where float32
+    values print with spurious digits (9.590761184692383) and grow the file,
+    so they keep float64.
+    """
+    return 'float32' if int(plotly.__version__.split('.')[0]) >= 6 else 'float64'
+
+
+def _line(x: np.ndarray, y: np.ndarray, name: str, **kwargs) -> go.Scattergl:
+    return go.Scattergl(x=x, y=np.asarray(y, dtype=_value_dtype()), mode='lines', name=name, **kwargs)
+
+
+def raw_data_figure(dates, values, value_column: str) -> go.Figure:
+    fig = go.Figure([_line(_epoch_ms(dates), values, 'Raw Data')])
+    return _layout(fig, 'Raw Data', value_column)
+
+
+def moving_averages_figure(dates, values, averages: dict, value_column: str) -> go.Figure:
+    x = _epoch_ms(dates)
+    fig = go.Figure([_line(x, values, 'Raw Data', opacity=0.5)]
+                    + [_line(x, average, label) for label, average in averages.items()])
+    return _layout(fig, 'Raw Data with Moving Averages', value_column)
+
+
+def forecast_figure(dates, values, forecast_dates, yhat, yhat_lower, yhat_upper,
+                    value_column: str) -> go.Figure:
+    fx = _epoch_ms(forecast_dates)
+    fig = go.Figure([
+        _line(_epoch_ms(dates), values, 'Actual', line=dict(color='blue'), opacity=0.5),
+        # Band drawn as the upper bound filled down to the lower bound
+        _line(fx, yhat_lower, 'Lower Bound', line=dict(width=0), showlegend=False),
+        _line(fx, yhat_upper, 'Confidence Interval', line=dict(width=0),
+              fill='tonexty', fillcolor='rgba(255, 0, 0, 0.2)'),
+        _line(fx, yhat, 'Forecast', line=dict(color='red')),
+    ])
+    return _layout(fig, 'Time Series with Forecast', value_column)
+
+
+def trend_figure(forecast_dates, trend, value_column: str) -> go.Figure:
+    fig = go.Figure([_line(_epoch_ms(forecast_dates), trend, 'Trend', line=dict(color='green'))])
+    return _layout(fig, 'Trend Component', value_column)
+
+
+def seasonality_figure(forecast_dates, yearly, value_column: str) -> go.Figure:
+    fig = go.Figure([_line(_epoch_ms(forecast_dates), yearly, 'Yearly Seasonality',
+                           line=dict(color='blue'))])
+    return _layout(fig, 'Yearly Seasonality Component', value_column)
+
+
+_BUILDERS = {
+    'raw_data': raw_data_figure,
+    'moving_averages': moving_averages_figure,
+    'forecast': forecast_figure,
+    'trend': trend_figure,
+    'seasonality': seasonality_figure,
+}
+
+
+def build_interactive_figures(agent, plots: Optional[Iterable[str]] = None) -> List[go.Figure]:
+    """Build the WebGL figures for an agent from the same payloads as the PNG plots.
+
+    Forecast figures are only included once a forecast has been made.
+    """
+    if plots is None:
+        plots = INTERACTIVE_PLOTS if agent.forecast_results is not None else INTERACTIVE_PLOTS[:2]
+    figures = []
+    for name in plots:
+        if name not in _BUILDERS:
+            raise ValueError(f"Unknown interactive plot: {name}. Available plots: {INTERACTIVE_PLOTS}")
+        payload = agent.plot_payload(name)
+        payload.pop('stats', None)  # summary lines are a static-plot feature
+        figures.append(_BUILDERS[name](**payload))
+    return figures
+
+
+def write_html_report(figures: List[go.Figure], file_path: str,
+                      title: str = 'Time Series Analysis') -> str:
+    """Write all figures into a single self-contained HTML file.
+
+    plotly.js is embedded once with the first figure; the rest reuse it.
+    """
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    divs = [
+        fig.to_html(full_html=False, include_plotlyjs=(i == 0))
+        for i, fig in enumerate(figures)
+    ]
+    html = (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        f'<title>{title}</title>\n</head>\n<body>\n'
+        + '\n'.join(divs)
+        + '\n</body>\n</html>\n'
+    )
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return file_path
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import hashlib
+from typing import Optional, Tuple
+
+from agents._lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part)
+    return h.hexdigest()
+
+
+def row_hashes(prepared: pd.DataFrame) -> np.ndarray:
+    """Hash every row of a prepared ``ds/y`` frame into a uint64 array."""
+    return pd.util.hash_pandas_object(prepared[['ds', 'y']], index=False).to_numpy()
+
+
+def config_hash(model_kwargs: Optional[dict] = None, fit_kwargs: Optional[dict] = None) -> str:
+    """Stable hash of the Prophet constructor and fit arguments."""
+    config = {'model': model_kwargs or {}, 'fit': fit_kwargs or {}}
+    return _digest(json.dumps(config, sort_keys=True, default=str).encode())
+
+
+def warm_start_params(model) -> dict:
+    """Extract fitted parameters from a Prophet model to initialise a refit."""
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        if model.mcmc_samples == 0:
+            params[name] = model.params[name][0][0]
+        else:
+            params[name] = np.mean(model.params[name])
+    for name in ['delta', 'beta']:
+        if model.mcmc_samples == 0:
+            params[name] = model.params[name][0]
+        else:
+            params[name] = np.mean(model.params[name], axis=0)
+    return params
+
+
+class ModelCache:
+    """Persistent on-disk cache of fitted Prophet models.
+
+    Entries are keyed by a hash of the prepared ``ds/y`` frame plus the model
+    configuration, so an unchanged series skips fitting entirely. For each
+    series lineage (same config and same first row) the cache also remembers
+    the latest fitted entry; when new data only appends rows to it, the model
+    is refitted warm-started from the cached parameters.
+
+    Eviction is least-recently-used, bounded by ``max_entries`` and
+    ``max_bytes``, and entries unused for ``max_age_days`` are dropped along
+    with the lineage records pointing at them.
+    """
+
+    def __init__(self, cache_dir: str = '.model_cache', max_entries: int = 1000,
+                 max_bytes: int = 512 * 1024 * 1024, max_age_days: float = 30):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.models_dir = os.path.join(cache_dir, 'models')
+        self.lineage_dir = os.path.join(cache_dir, 'lineage')
+        os.makedirs(self.models_dir, exist_ok=True)
+        os.makedirs(self.lineage_dir, exist_ok=True)
+
+    def _model_path(self, key: str) -> str:
+        return os.path.join(self.models_dir, f'{key}.json')
+
+    def _lineage_path(self, key: str) -> str:
+        return os.path.join(self.lineage_dir, f'{key}.json')
+
+    @staticmethod
+    def _write_atomic(path: str, text: str) -> None:
+        # Write then rename so concurrent workers never read a partial file
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _load(self, key: str):
+        """Load a cached model, or None if it is missing, expired or unreadable."""
+        from prophet.serialize import model_from_json
+
+        path = self._model_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                model = model_from_json(f.read())
+            os.utime(path)  # mark as recently used
+            return model
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, model) -> None:
+        from prophet.serialize import model_to_json
+
+        self._write_atomic(self._model_path(key), model_to_json(model))
+        self.evict()
+
+    def fit(self, prepared: pd.DataFrame, model_kwargs: Optional[dict] = None,
+            fit_kwargs: Optional[dict] = None) -> Tuple[object, str]:
+        """Return a fitted Prophet model for ``prepared``, fitting only if needed.
+
+        The second element of the result is ``'hit'`` when the cached model was
+        reused, ``'warm'`` when it was refitted from cached parameters, and
+        ``'miss'`` when it was fitted from scratch.
+        """
+        from prophet import Prophet
+
+        model_kwargs = model_kwargs or {}
+        fit_kwargs = fit_kwargs or {}
+        cfg_hash = config_hash(model_kwargs, fit_kwargs)
+        hashes = row_hashes(prepared)
+        data_hash = _digest(hashes.tobytes())
+        key = _digest(cfg_hash.encode(), data_hash.encode())
+
+        model = self._load(key)
+        if model is not None:
+            return model, 'hit'
+
+        lineage_key = _digest(cfg_hash.encode(), hashes[:1].tobytes())
+        previous = self._previous_model(lineage_key, hashes)
+
+        status = 'miss'
+        model = None
+        if previous is not None:
+            try:
+                model = Prophet(**model_kwargs)
+                model.fit(prepared, init=warm_start_params(previous), **fit_kwargs)
+                status = 'warm'
+            except Exception:
+                # Parameter shapes can change (e.g. yearly seasonality switching on)
+                model = None
+        if model is None:
+            model = Prophet(**model_kwargs)
+            model.fit(prepared, **fit_kwargs)
+
+        self._store(key, model)
+        self._write_atomic(self._lineage_path(lineage_key),
+                           json.dumps({'key': key, 'n_rows': len(hashes), 'data_hash': data_hash}))
+        return model, status
+
+    def _previous_model(self, lineage_key: str, hashes: np.ndarray):
+        """Find the cached model whose data is a strict prefix of ``hashes``."""
+        try:
+            with open(self._lineage_path(lineage_key), 'r', encoding='utf-8') as f:
+                lineage = json.load(f)
+        except (OSError, ValueError):
+            return None
+        n_rows = lineage['n_rows']
+        if n_rows >= len(hashes) or _digest(hashes[:n_rows].tobytes()) != lineage['data_hash']:
+            return None
+        return self._load(lineage['key'])
+
+    def evict(self) -> None:
+        """Drop expired entries, then least-recently-used ones until within bounds.
+
+        Lineage records pointing at a dropped model are removed with it.
+        """
+        entries = []
+        removed = False
+        now = time.time()
+        with os.scandir(self.models_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    self._remove(entry.path)
+                    removed = True
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_bytes -= size
+            removed = True
+        if removed:
+            self._evict_lineage()
+
+    def _evict_lineage(self) -> None:
+        """Remove lineage records whose model is no longer cached."""
+        with os.scandir(self.lineage_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        key = json.load(f)['key']
+                except (OSError, ValueError, KeyError):
+                    key = None
+                if key is None or not os.path.exists(self._model_path(key)):
+                    self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Remove every cached model and lineage record."""
+        for directory in (self.models_dir, self.lineage_dir):
+            for name in os.listdir(directory):
+                self._remove(os.path.join(directory, name))
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from agents._lazy import lazy_import
+from agents.statistics import central_sums, shape_from_sums
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+
+def _merge_sums(a: tuple, b: tuple) -> tuple:
+    """Combine two ``(n, mean, m2, m3, m4)`` tuples (Chan/Pebay pairwise update).
+
+    With a single new observation this reduces to Welford's update; with a
+    batch it folds all new rows in at once.
+    """
+    na, mean_a, m2a, m3a, m4a = a
+    nb, mean_b, m2b, m3b, m4b = b
+    if na == 0:
+        return b
+    if nb == 0:
+        return a
+    n = na + nb
+    delta = mean_b - mean_a
+    delta_n = delta / n
+    mean = mean_a + delta_n * nb
+    m2 = m2a + m2b + delta * delta_n * na * nb
+    m3 = (m3a + m3b + delta * delta_n * delta_n * na * nb * (na - nb)
+          + 3 * delta_n * (na * m2b - nb * m2a))
+    m4 = (m4a + m4b + delta * delta_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+          + 6 * delta_n * delta_n * (na * na * m2b + nb * nb * m2a)
+          + 4 * delta_n * (na * m3b - nb * m3a))
+    return n, mean, m2, m3, m4
+
+
+class RunningMoments:
+    """Running count, extremes, mean, variance and higher moments."""
+
+    def __init__(self):
+        self.sums = (0, np.nan, 0.0, 0.0, 0.0)
+        self.min = np.nan
+        self.max = np.nan
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.sums = _merge_sums(self.sums, central_sums(values))
+        self.min = np.fmin(self.min, values.min())
+        self.max = np.fmax(self.max, values.max())
+
+    @property
+    def count(self) -> int:
+        return self.sums[0]
+
+    @property
+    def mean(self) -> float:
+        return self.sums[1]
+
+    def summary(self) -> dict:
+        n, mean, m2, m3, m4 = self.sums
+        result = {'count': int(n), 'min': float(self.min), 'max': float(self.max), 'mean': float(mean)}
+        result.update(shape_from_sums(n, m2, m3, m4))
+        return result
+
+
+class QuantileSketch:
+    """Mergeable t-digest style sketch for streaming quantiles.
+
+    Centroids are kept sorted; new values are merged in as unit-weight
+    centroids and the whole set is re-clustered in one vectorized pass using
+    the arcsine scale function, which keeps clusters small in the tails.
+    While fewer than ``compression`` points have been seen the sketch is exact.
+    """
+
+    def __init__(self, compression: int = 200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        means = np.concatenate((self.means, values))
+        weights = np.concatenate((self.weights, np.ones(len(values))))
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        if len(means) <= self.compression:
+            self.means, self.weights = means, weights
+            return
+
+        # Cluster id = integer part of the scale function at each centroid's mid-quantile
+        total = weights.sum()
+        mid_q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * mid_q - 1)
+        clusters = np.floor(k - k[0]).astype(np.int64)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(clusters)) + 1))
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def count_outside(self, lower: float, upper: float) -> int:
+        """Approximate number of values below ``lower`` or above ``upper``."""
+        return int(round(self.weights[(self.means < lower) | (self.means > upper)].sum()))
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile with pandas' linear interpolation convention."""
+        if len(self.means) == 0:
+            return np.nan
+        positions = np.cumsum(self.weights) - self.weights / 2
+        target = q * (self.weights.sum() - 1) + 0.5
+        return float(np.interp(target, positions, self.means))
+
+
+class GroupedMoments:
+    """Running count, mean and variance per integer key (e.g. month or year)."""
+
+    def __init__(self):
+        self.groups = {}
+
+    def update(self, keys: np.ndarray, values: np.ndarray) -> None:
+        valid = ~np.isnan(values)
+        keys, values = keys[valid], values[valid]
+        if len(keys) == 0:
+            return
+        unique, codes = np.unique(keys, return_inverse=True)
+        counts = np.bincount(codes)
+        means = np.bincount(codes, weights=values) / counts
+        deviations = values - means[codes]
+        m2s = np.bincount(codes, weights=deviations * deviations)
+        # Loop over the distinct keys of this batch only
+        for key, n, mean, m2 in zip(unique, counts, means, m2s):
+            previous = self.groups.get(int(key), (0, np.nan, 0.0, 0.0, 0.0))
+            self.groups[int(key)] = _merge_sums(previous, (int(n), float(mean), float(m2), 0.0, 0.0))
+
+    def summary(self) -> dict:
+        result = {'mean': {}, 'std': {}, 'count': {}}
+        for key in sorted(self.groups):
+            n, mean, m2, _, _ = self.groups[key]
+            result['mean'][key] = float(mean)
+            result['std'][key] = float(np.sqrt(m2 / (n - 1))) if n > 1 else np.nan
+            result['count'][key] = int(n)
+        return result
+
+
+class ValueCounts:
+    """Exact running mode: occurrences of every distinct value seen.
+
+    Memory grows with the number of distinct values, so this is only worth
+    it alongside a series that is kept in memory anyway.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.mode = np.nan
+        self.mode_count = 0
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        unique, counts = np.unique(values, return_counts=True)
+        if not self.counts:
+            # First batch (e.g. the whole history): argmax picks the smallest most frequent value
+            self.counts = dict(zip(unique.tolist(), counts.tolist()))
+            self.mode, self.mode_count = float(unique[np.argmax(counts)]), int(counts.max())
+            return
+        # Loop over the distinct values of this batch only; counts never shrink,
+        # so the smallest most frequent value only changes to an updated one
+        for value, n in zip(unique.tolist(), counts.tolist()):
+            n += self.counts.get(value, 0)
+            self.counts[value] = n
+            if n > self.mode_count or (n == self.mode_count and value < self.mode):
+                self.mode, self.mode_count = value, n
+
+
+class OnlineStatistics:
+    """Sufficient statistics of a growing series, updated in O(new rows).
+
+    Tracks running moments, a quantile sketch for the median, IQR bounds and
+    outlier count, null counts and per-month/per-year accumulators.
+    ``summary`` returns the same keys as ``compute_statistics``; the mode,
+    which cannot be maintained exactly in bounded memory, only with
+    ``track_mode``.
+    """
+
+    def __init__(self, compression: int = 200, track_mode: bool = False):
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch(compression)
+        self.monthly = GroupedMoments()
+        self.yearly = GroupedMoments()
+        self.values = ValueCounts() if track_mode else None
+        self.total = 0
+        self.date_min = pd.NaT
+        self.date_max = pd.NaT
+
+    def update(self, values: np.ndarray, dates: Optional[np.ndarray] = None) -> None:
+        values = np.asarray(values, dtype='float64')
+        self.total += len(values)
+        self.moments.update(values)
+        self.sketch.update(values)
+        if self.values is not None:
+            self.values.update(values)
+        if dates is not None and len(dates):
+            index = pd.DatetimeIndex(dates)
+            valid = ~index.isna()
+            if valid.any():
+                self.date_min = min(d for d in (self.date_min, index.min()) if not pd.isna(d))
+                self.date_max = max(d for d in (self.date_max, index.max()) if not pd.isna(d))
+                self.monthly.update(index.month.to_numpy()[valid].astype('int64'), values[valid])
+                self.yearly.update(index.year.to_numpy()[valid].astype('int64'), values[valid])
+
+    def bounds(self) -> tuple:
+        """Current IQR outlier bounds ``(lower, upper)``."""
+        q1 = self.sketch.quantile(0.25)
+        q3 = self.sketch.quantile(0.75)
+        iqr = q3 - q1
+        return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    def summary(self) -> dict:
+        stats = self.moments.summary()
+        q1 = self.sketch.quantile(0.25)
+        q3 = self.sketch.quantile(0.75)
+        lower_bound, upper_bound = self.bounds()
+        stats.update({
+            'total': int(self.total),
+            'nulls': int(self.total - stats['count']),
+            'median': self.sketch.quantile(0.5),
+            'q1': q1,
+            'q3': q3,
+            'iqr': q3 - q1,
+            'lower_bound': lower_bound,
+            'upper_bound': upper_bound,
+            'outlier_count': self.sketch.count_outside(lower_bound, upper_bound),
+            'date_min': self.date_min,
+            'date_max': self.date_max,
+            'monthly': self.monthly.summary(),
+            'yearly': self.yearly.summary()['mean'],
+        })
+        if self.values is not None:
+            stats['mode'] = float(self.values.mode)
+        return stats
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from agents._lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Candidate formats tried, in order, when the date format is not given
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y/%m/%d',
+    '%Y%m%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%d.%m.%Y',
+    '%d-%m-%Y',
+]
+
+# Cell values treated as missing rather than as parse failures
+NULL_TOKENS = {'', 'null', 'none', 'nan', 'na', 'n/a'}
+
+_DAY_NS = 24 * 3600 * 10**9
+_NAT = -2**63  # int64 view of NaT
+
+
+def detect_date_format(values: pd.Series, sample_size: int = 1000) -> Optional[str]:
+    """Return the first candidate format that parses a sample of the values.
+
+    Returns None when no candidate parses the whole sample, in which case the
+    caller should fall back to pandas' own inference.
+    """
+    sample = values.dropna()
+    sample = sample[sample.astype(str).str.len() > 0].head(sample_size)
+    if len(sample) == 0:
+        return None
+    for date_format in DATE_FORMATS:
+        parsed = pd.to_datetime(sample, format=date_format, errors='coerce')
+        if parsed.notna().all():
+            return date_format
+    return None
+
+
+def floor_to_day(dates: np.ndarray) -> np.ndarray:
+    """Floor datetime64[ns] values to midnight with integer arithmetic."""
+    ticks = dates.astype('datetime64[ns]').view('i8')
+    floored = np.where(ticks == _NAT, _NAT, ticks - ticks % _DAY_NS)
+    return floored.view('datetime64[ns]')
+
+
+def _failures(values: pd.Series, unparsed: np.ndarray) -> np.ndarray:
+    """Mask of unparsed cells that were not simply empty or a null token."""
+    failed = unparsed & values.notna().to_numpy()
+    if failed.any():
+        tokens = values[failed].astype(str).str.strip(' \t"\'').str.lower()
+        failed[failed] = ~tokens.isin(NULL_TOKENS).to_numpy()
+    return failed
+
+
+def _count_failures(values: pd.Series, unparsed: np.ndarray) -> int:
+    """Count unparsed cells that were not simply empty or a null token."""
+    return int(_failures(values, unparsed).sum())
+
+
+def _wall_time(dates) -> np.ndarray:
+    """datetime64[ns] values, keeping the local wall time of timezone-aware dates."""
+    dates = pd.Series(dates)
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy(dtype='datetime64[ns]')
+
+
+def _parse_each(values: pd.Series) -> np.ndarray:
+    """Parse entries one by one, for mixed formats or UTC offsets; failures become NaT."""
+    def parse(value):
+        try:
+            timestamp = pd.Timestamp(value)
+        except (ValueError, TypeError):
+            return np.datetime64('NaT', 'ns')
+        if timestamp is pd.NaT:
+            return np.datetime64('NaT', 'ns')
+        return timestamp.tz_localize(None).to_datetime64() if timestamp.tzinfo else timestamp.to_datetime64()
+    return np.array([parse(value) for value in values], dtype='datetime64[ns]')
+
+
+def parse_dates(values: pd.Series, date_format: Optional[str] = None,
+                to_day: bool = True, fallback: Optional[bool] = None) -> Tuple[np.ndarray, int]:
+    """Parse a date column in one pass, returning ``(dates, n_failed)``.
+
+    The format is detected once from a sample unless ``date_format`` is given.
+    With ``fallback``, the default for a detected format, entries that do not
+    match it (e.g. after the sample, or in a later chunk of a file whose
+    format was detected on the first one) are parsed one by one.
+    Timezone-aware dates keep their local wall time. With ``to_day`` the
+    result is floored to day resolution. Unparseable entries become NaT and
+    are counted in ``n_failed``.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        dates = _wall_time(values)
+        n_failed = 0
+    else:
+        fallback = date_format is None if fallback is None else fallback
+        date_format = date_format or detect_date_format(values)
+        try:
+            parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+        except ValueError:
+            parsed = None  # mixed UTC offsets, which newer pandas refuses to combine
+        if parsed is None or parsed.dtype == object:
+            dates = _parse_each(values)
+        else:
+            dates = _wall_time(parsed)
+        failed = _failures(values, np.isnat(dates))
+        if fallback and failed.any():
+            dates = dates.copy()
+            dates[failed] = _parse_each(values[failed])
+            failed &= np.isnat(dates)
+        n_failed = int(failed.sum())
+    if to_day:
+        dates = floor_to_day(dates)
+    return dates, n_failed
+
+
+def parse_numeric(values: pd.Series, dtype: str = 'float64') -> Tuple[np.ndarray, int]:
+    """Parse a value column in one pass, returning ``(values, n_failed)``.
+
+    Clean numeric text goes straight through ``to_numeric``; only the entries
+    that fail (quoted or padded numbers, null tokens, garbage) are stripped and
+    retried. Entries that still fail become NaN and are counted in ``n_failed``.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=dtype), 0
+
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=dtype, copy=True)
+    retry = np.isnan(numbers) & values.notna().to_numpy()
+    if retry.any():
+        cleaned = values[retry].str.strip(' \t"\'')
+        numbers[retry] = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=dtype)
+    n_failed = _count_failures(values, np.isnan(numbers))
+    return numbers, n_failed
@@ -0,0 +1,391 @@
+import os
+import json
+import copy
+import hashlib
+import pickle
+import tempfile
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from agents.time_series_agent import TimeSeriesAgent, NULL_STRATEGIES, VALUE_DTYPES
+from agents.artifact_cache import ArtifactCache
+from agents.data_io import read_series
+from agents.rendering import DATA_PLOTS, FORECAST_PLOTS, select_plots
+from agents.resampling import DUPLICATE_AGGREGATIONS, FILL_METHODS
+from agents.forecasters import FORECASTERS, PROPHET_PROFILES
+
+STAGES = ['stats', 'plots', 'interactive', 'forecast', 'backtest', 'report']
+
+# Options that change the cleaned series, and so every stage after it
+CLEAN_OPTIONS = ['date_column', 'value_column', 'date_format', 'chunksize', 'null_strategy',
+                 'frequency', 'duplicate_agg', 'low_memory', 'value_dtype']
+
+DEFAULT_CONFIG = {
+    'inputs': [],
+    'date_column': 'ds',
+    'value_column': 'y',
+    'date_format': None,
+    'chunksize': None,
+    # 'drop', 'mean', 'median', 'mode', 'interpolate', 'ffill', 'seasonal'
+    # or 'keep' to leave nulls in place
+    'null_strategy': 'drop',
+    # Regular grid to resample onto ('D', 'h', 'MS', ... or 'auto'); None keeps the series as is
+    'frequency': None,
+    'duplicate_agg': 'mean',
+    'periods': 30,
+    # 'prophet', or a fast NumPy baseline: 'fourier' or 'seasonal_naive'
+    'forecaster': 'prophet',
+    # Prophet speed settings: 'default', 'fast' or 'mcmc'
+    'prophet_profile': 'default',
+    # Backtest horizon in periods; None uses 'periods'
+    'backtest_horizon': None,
+    'output_dir': 'output',
+    'model_cache': '.model_cache',
+    # Stage outputs keyed by input contents and parameters ('' disables it), and its size bound
+    'artifact_cache': '.artifact_cache',
+    'artifact_cache_max_mb': 2048,
+    'plots': None,
+    'skip_plots': [],
+    'max_workers': 1,
+    # LLM report calls in flight at once, and where their responses are cached ('' disables it)
+    'report_concurrency': 4,
+    'report_cache': '.report_cache',
+    # Record per-stage and per-method timings; trace_memory adds tracemalloc peaks (slower)
+    'trace': False,
+    'trace_memory': False,
+    # Compact series (float32 with value_dtype='float32') and forecast, with fewer copies
+    'low_memory': False,
+    'value_dtype': 'float64',
+    'stages': {
+        'stats': True,
+        'plots': True,
+        'interactive': False,
+        'forecast': True,
+        'backtest': False,
+        'report': True,
+    },
+}
+
+
+def load_config(file_path: str) -> dict:
+    """Load a pipeline config from JSON or YAML (YAML needs PyYAML)."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        if file_path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML configs require PyYAML. Install it with 'pip install pyyaml' or use JSON.")
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+def merge_config(*overrides: dict) -> dict:
+    """Layer config dicts over the defaults; ``None`` values are ignored."""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    for override in overrides:
+        for key, value in (override or {}).items():
+            if value is None:
+                continue
+            if key == 'stages':
+                unknown = set(value) - set(STAGES)
+                if unknown:
+                    raise ValueError(f"Unknown stages: {sorted(unknown)}. Available stages: {STAGES}")
+                config['stages'].update(value)
+            elif key not in DEFAULT_CONFIG:
+                raise ValueError(f"Unknown config option: {key}")
+            else:
+                config[key] = value
+    if config['null_strategy'] not in NULL_STRATEGIES + ['keep']:
+        raise ValueError(f"Invalid null strategy. Please choose one of {NULL_STRATEGIES + ['keep']}.")
+    if config['forecaster'] not in FORECASTERS:
+        raise ValueError(f"Unknown forecaster: {config['forecaster']}. Available forecasters: {FORECASTERS}")
+    if config['prophet_profile'] not in PROPHET_PROFILES:
+        raise ValueError(f"Unknown Prophet profile: {config['prophet_profile']}. "
+                         f"Available profiles: {list(PROPHET_PROFILES)}")
+    if config['value_dtype'] not in VALUE_DTYPES:
+        raise ValueError(f"Invalid value dtype. Please choose one of {VALUE_DTYPES}.")
+    if config['duplicate_agg'] not in DUPLICATE_AGGREGATIONS:
+        raise ValueError(f"Invalid aggregation. Please choose one of {DUPLICATE_AGGREGATIONS}.")
+    return config
+
+
+def _output_dir(config: dict, file_path: str) -> str:
+    # The path hash keeps inputs with the same file name, e.g. a/data.csv and b/data.csv, apart
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    digest = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:8]
+    directory = os.path.join(config['output_dir'], f'{name}-{digest}')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _stage_span(tracer, stage: str):
+    return tracer.span(stage, category='pipeline') if tracer is not None else nullcontext()
+
+
+def _cached_files(artifacts: Optional[ArtifactCache], key: str, directory: str, produce,
+                  result: dict, name: str) -> List[str]:
+    """Restore a stage's output files into ``directory``, or ``produce()`` and cache them."""
+    if artifacts is not None:
+        paths = artifacts.restore(key, directory)
+        if paths is not None:
+            result['cached'].append(name)
+            return paths
+    paths = produce()
+    if artifacts is not None:
+        artifacts.put(key, files=paths)
+    return paths
+
+
+def _cached_plots(agent: TimeSeriesAgent, artifacts: Optional[ArtifactCache], upstream_key: str,
+                  names: List[str], plot_dir: str, result: dict) -> List[str]:
+    """Restore cached plots and render only the missing ones."""
+    paths, missing = {}, []
+    for name in names:
+        restored = artifacts.restore(ArtifactCache.key('plot', upstream_key, name), plot_dir) if artifacts else None
+        if restored is not None:
+            paths[name] = restored[0]
+            result['cached'].append(f'plot:{name}')
+        else:
+            missing.append(name)
+    if missing:
+        rendered = agent.render_plots(plots=missing, plot_dir=plot_dir)
+        if artifacts is not None:
+            for name, path in rendered.items():
+                artifacts.put(ArtifactCache.key('plot', upstream_key, name), files=[path])
+        paths.update(rendered)
+    return [paths[name] for name in names]
+
+
+def _clean(agent: TimeSeriesAgent, file_path: str, config: dict, result: dict, tracer) -> None:
+    """Load and clean one input into ``agent``."""
+    with _stage_span(tracer, 'load'):
+        agent.load_data(file_path, chunksize=config['chunksize'],
+                        date_column=config['date_column'], value_column=config['value_column'])
+        if agent.date_column is None:
+            agent.select_columns(config['date_column'], config['value_column'])
+
+    with _stage_span(tracer, 'clean'):
+        date_type, value_type = agent.check_formats()
+        if date_type != 'datetime64[ns]' or value_type not in ['float64', 'float32', 'int64']:
+            result['parse_report'] = agent.correct_formats(config['date_format'])
+        elif agent.parse_report is not None:
+            # Parsed while streaming the chunks
+            result['parse_report'] = agent.parse_report
+        if config['frequency']:
+            # Gap-filling strategies are applied while resampling
+            fill = config['null_strategy'] if config['null_strategy'] in FILL_METHODS else 'none'
+            freq = None if config['frequency'] == 'auto' else config['frequency']
+            result['regularize_report'] = agent.regularize(freq=freq, agg=config['duplicate_agg'], fill=fill)
+        if config['null_strategy'] != 'keep' and agent.data[agent.value_column].isnull().any():
+            agent.handle_null_values('correct', config['null_strategy'])
+
+
+def run_input(file_path: str, config: dict) -> dict:
+    """Run load -> clean -> stats -> plots -> forecast -> report for one input.
+
+    Never prompts. Returns a result record with the produced output paths;
+    a failing stage stops this input only and is reported in ``error``.
+    With ``trace`` enabled, stage and agent method timings are written to
+    ``trace.json`` (Chrome trace events) and ``metrics.prom`` (Prometheus text).
+
+    With an ``artifact_cache``, every stage output is stored under a key of
+    the input's contents, the stage parameters and the keys of the stages
+    it depends on. A rerun restores unchanged outputs instead of recomputing
+    them, and ``result['cached']`` lists the restored stages.
+    """
+    result = {'input': file_path, 'status': 'ok', 'error': None, 'outputs': {}}
+    stages = config['stages']
+    stage = 'load'
+    tracer = None
+    artifacts = None
+    try:
+        output_dir = _output_dir(config, file_path)
+        agent = TimeSeriesAgent(low_memory=config['low_memory'], value_dtype=config['value_dtype'])
+        if config['trace']:
+            tracer = agent.enable_tracing(memory=config['trace_memory'])
+        if config['artifact_cache']:
+            artifacts = ArtifactCache(config['artifact_cache'],
+                                      max_bytes=config['artifact_cache_max_mb'] * 1024 * 1024)
+            result['cached'] = []
+
+        clean_key = None
+        cleaned = None
+        if artifacts is not None:
+            clean_key = ArtifactCache.key('clean', ArtifactCache.file_key(file_path),
+                                          {name: config[name] for name in CLEAN_OPTIONS})
+            cleaned = artifacts.get(clean_key)
+        if cleaned is not None:
+            with _stage_span(tracer, 'load'):
+                agent.load_data(artifacts.path(clean_key, 'cleaned.feather'),
+                                date_column=config['date_column'], value_column=config['value_column'])
+                agent.frequency = cleaned['meta']['frequency']
+                result.update({name: value for name, value in cleaned['meta'].items() if name.endswith('_report')})
+            result['cached'].append('clean')
+        else:
+            _clean(agent, file_path, config, result, tracer)
+            if artifacts is not None:
+                with tempfile.TemporaryDirectory() as directory:
+                    cleaned_path = os.path.join(directory, 'cleaned.feather')
+                    agent.save_data(cleaned_path)
+                    meta = {name: result[name] for name in ['parse_report', 'regularize_report'] if name in result}
+                    artifacts.put(clean_key, files=[cleaned_path], meta=dict(meta, frequency=agent.frequency))
+
+        if stages['stats']:
+            stage = 'stats'
+            with _stage_span(tracer, stage):
+                def write_stats():
+                    stats = dict(agent.get_statistics())
+                    stats['outliers'] = len(agent.detect_outliers())
+                    stats_path = os.path.join(output_dir, 'stats.json')
+                    with open(stats_path, 'w', encoding='utf-8') as f:
+                        json.dump(stats, f, indent=2, default=str)
+                    return [stats_path]
+
+                result['outputs']['stats'] = _cached_files(
+                    artifacts, ArtifactCache.key('stats', clean_key), output_dir, write_stats, result, stage)[0]
+
+        plot_dir = os.path.join(output_dir, 'plots')
+        if stages['plots']:
+            stage = 'plots'
+            with _stage_span(tracer, stage):
+                names = [p for p in select_plots(config['plots'], config['skip_plots'], DATA_PLOTS)
+                         if p in DATA_PLOTS]
+                result['outputs']['plots'] = _cached_plots(agent, artifacts, clean_key, names, plot_dir, result)
+
+        forecast_key = None
+        profile = config['prophet_profile'] if config['forecaster'] == 'prophet' else 'default'
+        if stages['forecast']:
+            stage = 'forecast'
+            with _stage_span(tracer, stage):
+                agent.set_forecast_periods(config['periods'])
+                forecast_key = ArtifactCache.key('forecast', clean_key, config['forecaster'], profile,
+                                                 config['periods'])
+                forecast = artifacts.get(forecast_key) if artifacts is not None else None
+                paths = artifacts.restore(forecast_key, output_dir) if forecast is not None else None
+                if paths is not None:
+                    agent.forecast_results = read_series(paths[0])
+                    result['forecast_timings'] = forecast['meta']['forecast_timings']
+                    result['cached'].append(stage)
+                else:
+                    from agents.model_cache import ModelCache
+
+                    cache = ModelCache(config['model_cache']) if config['model_cache'] else None
+                    agent.train_prophet_model(cache=cache, forecaster=config['forecaster'], profile=profile)
+                    agent.make_forecast()
+                    result['forecast_timings'] = agent.forecast_timings
+                    paths = [os.path.join(output_dir, 'forecast.feather')]
+                    agent.save_forecast(paths[0])
+                    if artifacts is not None:
+                        artifacts.put(forecast_key, files=paths, meta={'forecast_timings': agent.forecast_timings})
+                result['outputs']['forecast'] = paths[0]
+            if stages['plots']:
+                stage = 'plots'
+                with _stage_span(tracer, stage):
+                    names = select_plots([p for p in FORECAST_PLOTS if config['plots'] is None or p in config['plots']],
+                                         config['skip_plots'])
+                    result['outputs']['plots'] += _cached_plots(agent, artifacts, forecast_key, names, plot_dir,
+                                                                result)
+
+        if stages['backtest']:
+            stage = 'backtest'
+            with _stage_span(tracer, stage):
+                horizon = config['backtest_horizon'] or config['periods']
+
+                def write_backtest():
+                    # Inputs already running in parallel keep their folds in-process
+                    _, metrics, errors = agent.backtest(horizon=horizon, forecaster=config['forecaster'],
+                                                        profile=profile,
+                                                        max_workers=1 if config['max_workers'] > 1 else None,
+                                                        cache_dir=config['model_cache'] or None)
+                    backtest_path = os.path.join(output_dir, 'backtest.json')
+                    with open(backtest_path, 'w', encoding='utf-8') as f:
+                        json.dump({'metrics': metrics.to_dict(orient='records'),
+                                   'errors': errors.to_dict(orient='records')}, f, indent=2, default=str)
+                    return [backtest_path]
+
+                key = ArtifactCache.key('backtest', clean_key, config['forecaster'], profile, horizon)
+                result['outputs']['backtest'] = _cached_files(artifacts, key, output_dir, write_backtest,
+                                                              result, stage)[0]
+
+        if stages['interactive']:
+            stage = 'interactive'
+            with _stage_span(tracer, stage):
+                result['outputs']['interactive'] = _cached_files(
+                    artifacts, ArtifactCache.key('interactive', clean_key, forecast_key), output_dir,
+                    lambda: [agent.plot_interactive(os.path.join(output_dir, 'report.html'))], result, stage)[0]
+
+        if stages['report']:
+            stage = 'report'
+            with _stage_span(tracer, stage):
+                from analyze_report import get_data_summary
+
+                # The LLM calls of all inputs run together in run_pipeline
+                key = ArtifactCache.key('report_summary', clean_key)
+                summary = artifacts.read(key, 'summary.pkl') if artifacts is not None else None
+                if summary is not None:
+                    result['report_summary'] = pickle.loads(summary)
+                    result['cached'].append(stage)
+                else:
+                    result['report_summary'] = get_data_summary(agent=agent)
+                    if artifacts is not None:
+                        artifacts.put(key, blobs={'summary.pkl': pickle.dumps(result['report_summary'])})
+
+        if artifacts is not None:
+            artifacts.evict()
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f"{stage}: {type(e).__name__}: {str(e)}"
+    if tracer is not None:
+        # Written for failed inputs too, to show where the time went before the failure
+        result['outputs']['trace'] = tracer.to_json(os.path.join(output_dir, 'trace.json'))
+        result['outputs']['metrics'] = tracer.to_prometheus(os.path.join(output_dir, 'metrics.prom'))
+    return result
+
+
+def run_pipeline(config: dict, inputs: Optional[List[str]] = None) -> List[dict]:
+    """Run the pipeline unattended over every input, optionally in parallel.
+
+    ``config`` is merged over DEFAULT_CONFIG; ``inputs`` overrides
+    ``config['inputs']``. With ``max_workers`` > 1 inputs run in a process pool.
+    """
+    config = merge_config(config)
+    inputs = inputs or config['inputs']
+    if not inputs:
+        raise ValueError("No inputs given")
+    if config['max_workers'] == 1 or len(inputs) == 1:
+        results = [run_input(file_path, config) for file_path in inputs]
+    else:
+        with ProcessPoolExecutor(max_workers=config['max_workers']) as executor:
+            results = list(executor.map(run_input, inputs, [config] * len(inputs)))
+    write_reports(results, config)
+    return results
+
+
+def write_reports(results: List[dict], config: dict) -> None:
+    """Generate the LLM reports of every input concurrently and save them.
+
+    Uses the summaries collected by ``run_input``; responses are cached so
+    unchanged data never queries the LLM again. Inputs whose report fails
+    are marked failed in their result.
+    """
+    summaries = {result['input']: result.pop('report_summary') for result in results if 'report_summary' in result}
+    if not summaries:
+        return
+    from analyze_report import ReportCache, generate_reports, save_analysis
+
+    cache = ReportCache(config['report_cache']) if config['report_cache'] else None
+    try:
+        analyses, errors = generate_reports(summaries, cache=cache, max_concurrency=config['report_concurrency'])
+    except Exception as e:
+        # E.g. the LLM client could not be created
+        analyses, errors = {}, {file_path: f"{type(e).__name__}: {str(e)}" for file_path in summaries}
+    for result in results:
+        file_path = result['input']
+        if file_path in errors:
+            result['status'] = 'failed'
+            result['error'] = f"report: {errors[file_path]}"
+        elif file_path in analyses:
+            report_path = os.path.join(_output_dir(config, file_path), 'insights.md')
+            save_analysis(analyses[file_path], report_path)
+            result['outputs']['report'] = report_path
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from agents._lazy import lazy_import
+from agents.downsampling import decimate
+
+np = lazy_import('numpy')
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+PLOT_DIR = 'plots'
+# Line decimation applied to every time-series line: 'minmax', 'lttb' or None
+DECIMATION_METHOD = 'minmax'
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def _new_figure(figsize) -> tuple:
+    """Create a standalone Agg figure and axes, without touching pyplot state."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def _max_points(fig: Figure) -> int:
+    """Points per line worth drawing: two per horizontal pixel of the figure."""
+    return int(fig.get_figwidth() * fig.dpi) * 2
+
+
+def _line_indices(fig: Figure, x: np.ndarray, *ys: np.ndarray) -> np.ndarray:
+    """Indices to draw for the given lines, decimated to the figure width.
+
+    Several ``ys`` sharing one x (e.g. an interval band) get the union of
+    their selections so they stay aligned.
+    """
+    if DECIMATION_METHOD is None or len(x) <= _max_points(fig):
+        return slice(None)
+    indices = [decimate(x, y, _max_points(fig), DECIMATION_METHOD) for y in ys]
+    return np.unique(np.concatenate(indices))
+
+
+def _plot_line(fig: Figure, ax, x: np.ndarray, y: np.ndarray, **kwargs) -> None:
+    keep = _line_indices(fig, x, y)
+    ax.plot(x[keep], y[keep], **kwargs)
+
+
+def _finish_time_axes(fig: Figure, ax, title: str, value_column: str) -> None:
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel(value_column)
+    ax.legend()
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+
+
+def boxplot_figure(values: np.ndarray, value_column: str) -> Figure:
+    """Boxplot to visualize outliers."""
+    import seaborn as sns
+
+    fig, ax = _new_figure((10, 6))
+    sns.boxplot(y=values, ax=ax)
+    ax.set_title(f'Boxplot of {value_column}')
+    ax.set_ylabel(value_column)
+    return fig
+
+
+def distribution_figure(values: np.ndarray, value_column: str) -> Figure:
+    """Distribution with histogram and KDE."""
+    import seaborn as sns
+
+    fig, ax = _new_figure((10, 6))
+    sns.histplot(x=values, kde=True, ax=ax)
+    ax.set_title(f'Distribution of {value_column}')
+    ax.set_xlabel(value_column)
+    return fig
+
+
+def monthly_boxplot_figure(months: np.ndarray, values: np.ndarray, value_column: str) -> Figure:
+    """Monthly boxplot to visualize seasonal patterns."""
+    import seaborn as sns
+
+    fig, ax = _new_figure((15, 7))
+    # Fixed order keeps one slot per calendar month even when some are missing
+    sns.boxplot(x=months, y=values, order=list(range(1, 13)), ax=ax)
+    ax.set_title('Monthly Distribution of Values')
+    ax.set_xlabel('Month')
+    ax.set_ylabel(value_column)
+    ax.set_xticks(range(12))
+    ax.set_xticklabels(MONTH_NAMES)
+    fig.tight_layout()
+    return fig
+
+
+def raw_data_figure(dates: np.ndarray, values: np.ndarray, stats: dict, value_column: str) -> Figure:
+    """Raw data with summary lines."""
+    fig, ax = _new_figure((15, 7))
+    _plot_line(fig, ax, dates, values, label='Raw Data')
+    for stat_name, stat_value in stats.items():
+        ax.axhline(y=stat_value, color='r', linestyle='--', label=f'{stat_name}: {stat_value:.2f}')
+    _finish_time_axes(fig, ax, 'Raw Data with Summary Lines', value_column)
+    return fig
+
+
+def moving_averages_figure(dates: np.ndarray, values: np.ndarray, averages: Dict[str, np.ndarray],
+                           value_column: str) -> Figure:
+    """Raw data with moving averages, one line per ``{label: values}`` entry."""
+    fig, ax = _new_figure((15, 7))
+    _plot_line(fig, ax, dates, values, label='Raw Data', alpha=0.5)
+    for label, average in averages.items():
+        _plot_line(fig, ax, dates, average, label=label, alpha=0.8)
+    _finish_time_axes(fig, ax, 'Raw Data with Moving Averages', value_column)
+    return fig
+
+
+def forecast_figure(dates: np.ndarray, values: np.ndarray, forecast_dates: np.ndarray,
+                    yhat: np.ndarray, yhat_lower: np.ndarray, yhat_upper: np.ndarray,
+                    value_column: str) -> Figure:
+    """Time series with forecast and confidence interval."""
+    fig, ax = _new_figure((15, 7))
+    _plot_line(fig, ax, dates, values, label='Actual', color='blue', alpha=0.5)
+    _plot_line(fig, ax, forecast_dates, yhat, label='Forecast', color='red')
+    band = _line_indices(fig, forecast_dates, yhat_lower, yhat_upper)
+    ax.fill_between(forecast_dates[band], yhat_lower[band], yhat_upper[band],
+                    color='red', alpha=0.2, label='Confidence Interval')
+    _finish_time_axes(fig, ax, 'Time Series with Forecast', value_column)
+    return fig
+
+
+def trend_figure(forecast_dates: np.ndarray, trend: np.ndarray, value_column: str) -> Figure:
+    """Trend component of the forecast."""
+    fig, ax = _new_figure((15, 7))
+    _plot_line(fig, ax, forecast_dates, trend, label='Trend', color='green')
+    _finish_time_axes(fig, ax, 'Trend Component', value_column)
+    return fig
+
+
+def seasonality_figure(forecast_dates: np.ndarray, yearly: np.ndarray, value_column: str) -> Figure:
+    """Yearly seasonality component of the forecast."""
+    fig, ax = _new_figure((15, 7))
+    _plot_line(fig, ax, forecast_dates, yearly, label='Yearly Seasonality', color='blue')
+    _finish_time_axes(fig, ax, 'Yearly Seasonality Component', value_column)
+    return fig
+
+
+# Plot name -> (figure builder, output file name)
+PLOTS: Dict[str, tuple] = {
+    'boxplot': (boxplot_figure, 'boxplot.png'),
+    'distribution': (distribution_figure, 'distribution.png'),
+    'monthly_boxplot': (monthly_boxplot_figure, 'monthly_boxplot.png'),
+    'raw_data': (raw_data_figure, 'raw_data.png'),
+    'moving_averages': (moving_averages_figure, 'moving_averages.png'),
+    'forecast': (forecast_figure, 'forecast.png'),
+    'trend': (trend_figure, 'trend.png'),
+    'seasonality': (seasonality_figure, 'seasonality.png'),
+}
+DATA_PLOTS = ['boxplot', 'distribution', 'monthly_boxplot', 'raw_data', 'moving_averages']
+FORECAST_PLOTS = ['forecast', 'trend', 'seasonality']
+
+
+def select_plots(plots: Optional[Iterable[str]] = None, skip: Optional[Iterable[str]] = None,
+                 available: Optional[List[str]] = None) -> List[str]:
+    """Resolve a plot selection against the known plot names."""
+    names = list(plots) if plots is not None else list(available if available is not None else PLOTS)
+    unknown = set(names) - set(PLOTS)
+    if skip is not None:
+        unknown |= set(skip) - set(PLOTS)
+    if unknown:
+        raise ValueError(f"Unknown plots: {sorted(unknown)}. Available plots: {list(PLOTS)}")
+    skipped = set(skip or [])
+    return [name for name in names if name not in skipped]
+
+
+def render_plot(name: str, payload: dict, plot_dir: str = PLOT_DIR) -> str:
+    """Build one figure from plain arrays and write it as PNG; returns the path."""
+    builder, file_name = PLOTS[name]
+    fig = builder(**payload)
+    os.makedirs(plot_dir, exist_ok=True)
+    path = os.path.join(plot_dir, file_name)
+    fig.savefig(path)
+    return path
+
+
+class PlotRenderer:
+    """Render plots concurrently in a worker pool while the caller keeps working.
+
+    ``submit`` snapshots the arrays each figure needs from the agent and
+    returns immediately with one future per plot; figures are built with the
+    object-oriented Matplotlib API on the Agg canvas, so workers share no
+    pyplot state. Processes are used by default since rendering is CPU bound.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, use_processes: bool = True,
+                 plot_dir: str = PLOT_DIR):
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.executor = executor_class(max_workers=max_workers)
+        self.plot_dir = plot_dir
+        self.futures: List[Future] = []
+
+    def submit(self, agent, plots: Optional[Iterable[str]] = None,
+               skip: Optional[Iterable[str]] = None,
+               plot_dir: Optional[str] = None) -> Dict[str, Future]:
+        """Queue the selected plots for ``agent``; returns ``{name: future}``.
+
+        By default every plot whose inputs exist is rendered: the data plots
+        always, the forecast plots once a forecast has been made. ``plot_dir``
+        overrides the renderer's output directory, e.g. one per series.
+        """
+        available = DATA_PLOTS + (FORECAST_PLOTS if agent.forecast_results is not None else [])
+        submitted = {}
+        for name in select_plots(plots, skip, available):
+            payload = agent.plot_payload(name)
+            submitted[name] = self.executor.submit(render_plot, name, payload,
+                                                   plot_dir or self.plot_dir)
+        self.futures.extend(submitted.values())
+        return submitted
+
+    def wait(self) -> List[str]:
+        """Block until all submitted plots are written; returns their paths.
+
+        Raises the first rendering error after every plot has finished.
+        """
+        futures, self.futures = self.futures, []
+        wait(futures)
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'PlotRenderer':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from agents._lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# How rows sharing a timestamp (after snapping to the grid) are combined
+DUPLICATE_AGGREGATIONS = ['mean', 'sum', 'min', 'max', 'median', 'first', 'last']
+# How missing grid points are filled; 'none' only reindexes
+FILL_METHODS = ['interpolate', 'ffill', 'seasonal', 'none']
+
+_NAT = -2**63  # int64 view of NaT
+# Spacings examined when inferring the frequency
+_FREQUENCY_SAMPLE = 100_000
+_DAY_NS = 24 * 3600 * 10**9
+# Default season lengths for seasonal fill, by grid step
+_SEASON_BY_STEP = {_DAY_NS: 7, _DAY_NS // 24: 24, 7 * _DAY_NS: 52}
+_UNITS = [('D', _DAY_NS), ('h', 3600 * 10**9), ('min', 60 * 10**9), ('s', 10**9),
+          ('ms', 10**6), ('us', 10**3)]
+_SEASON_BY_OFFSET = {'MS': 12, 'ME': 12, 'M': 12, 'QS': 4, 'QE': 4, 'Q': 4}
+
+
+def infer_frequency(ticks: np.ndarray) -> str:
+    """Most common spacing between consecutive timestamps, as a pandas frequency string.
+
+    ``ticks`` are int64 nanoseconds. Spacings of 28-31 days are read as
+    month starts and 365-366 days as year starts, since those are not
+    fixed-width.
+    """
+    ticks = ticks[ticks != _NAT]
+    if np.any(ticks[1:] < ticks[:-1]):
+        ticks = np.sort(ticks)
+    spacings = np.diff(ticks)
+    spacings = spacings[spacings > 0]
+    if len(spacings) == 0:
+        raise ValueError("At least two distinct timestamps are needed to infer the frequency.")
+    # The mode is stable on an even sample, which keeps this O(n) for sorted input
+    spacings = spacings[::max(len(spacings) // _FREQUENCY_SAMPLE, 1)]
+    steps, counts = np.unique(spacings, return_counts=True)
+    step = int(steps[np.argmax(counts)])
+    if 28 * _DAY_NS <= step <= 31 * _DAY_NS:
+        return 'MS'
+    if 365 * _DAY_NS <= step <= 366 * _DAY_NS:
+        return 'YS'
+    return _fixed_frequency(step)
+
+
+def _fixed_frequency(step: int) -> str:
+    """Frequency string for a fixed step in nanoseconds, in the largest whole unit."""
+    for unit, size in _UNITS:
+        if step % size == 0:
+            count = step // size
+            return unit if count == 1 else f'{count}{unit}'
+    return f'{step}ns'
+
+
+def _step_nanos(offset) -> Optional[int]:
+    """Width of a fixed-width offset in nanoseconds, or None for calendar offsets.
+
+    Days are not ``Tick`` offsets in every pandas version, so they are
+    handled explicitly, as are weeks without an anchor day.
+    """
+    if isinstance(offset, pd.offsets.Tick):
+        return offset.nanos
+    if isinstance(offset, pd.offsets.Day):
+        return offset.n * _DAY_NS
+    if isinstance(offset, pd.offsets.Week) and offset.weekday is None:
+        return offset.n * 7 * _DAY_NS
+    return None
+
+
+def _grid(ticks: np.ndarray, offset) -> Tuple[np.ndarray, np.ndarray]:
+    """Regular grid covering ``ticks`` and the grid slot of every tick.
+
+    Fixed-width grids are anchored at midnight of the first day, like
+    pandas' ``resample``, so e.g. hourly slots start on the hour however
+    the data starts (and agree with ``DatetimeIndex.floor`` for any step
+    that divides a day).
+    """
+    start, end = ticks.min(), ticks.max()
+    step = _step_nanos(offset)
+    if step is not None:
+        midnight = start - start % _DAY_NS
+        start = midnight + (start - midnight) // step * step
+        # Fixed-width step: slots are plain integer division, O(n)
+        buckets = (ticks - start) // step
+        grid = start + np.arange(int(buckets.max()) + 1, dtype=np.int64) * step
+        return grid, buckets
+    # Calendar offsets (months, years, ...) have uneven widths
+    first = offset.rollback(pd.Timestamp(start)).normalize()
+    grid = pd.date_range(first, pd.Timestamp(end), freq=offset).asi8
+    return grid, np.searchsorted(grid, ticks, side='right') - 1
+
+
+def _aggregate(buckets: np.ndarray, values: np.ndarray, size: int, agg: str) -> np.ndarray:
+    """One value per grid slot; slots without observations are NaN."""
+    counts = np.bincount(buckets, minlength=size)
+    result = np.full(size, np.nan)
+    if agg in ('mean', 'sum'):
+        sums = np.bincount(buckets, weights=values, minlength=size)
+        present = counts > 0
+        result[present] = sums[present] / counts[present] if agg == 'mean' else sums[present]
+        return result
+    if len(buckets) == 0:
+        return result
+
+    if agg == 'median':
+        order = np.lexsort((values, buckets))
+    elif np.all(buckets[1:] >= buckets[:-1]):
+        order = None  # already grouped, the usual case for time-ordered input
+    else:
+        order = np.argsort(buckets, kind='stable')
+    if order is not None:
+        buckets, values = buckets[order], values[order]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.append(starts[1:], len(buckets))
+    slots = buckets[starts]
+    if agg == 'min':
+        result[slots] = np.minimum.reduceat(values, starts)
+    elif agg == 'max':
+        result[slots] = np.maximum.reduceat(values, starts)
+    elif agg == 'first':
+        result[slots] = values[starts]
+    elif agg == 'last':
+        result[slots] = values[ends - 1]
+    else:
+        lengths = ends - starts
+        result[slots] = (values[starts + (lengths - 1) // 2] + values[starts + lengths // 2]) / 2
+    return result
+
+
+def interpolate_gaps(values: np.ndarray) -> np.ndarray:
+    """Linear interpolation over NaNs of a regular series.
+
+    On a regular grid position is proportional to time, so this is
+    time-aware interpolation. Leading and trailing gaps take the nearest
+    observed value.
+    """
+    valid = ~np.isnan(values)
+    if valid.all() or not valid.any():
+        return values.copy()
+    positions = np.arange(len(values))
+    filled = values.copy()
+    filled[~valid] = np.interp(positions[~valid], positions[valid], values[valid])
+    return filled
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last observed value forward; leading gaps stay NaN."""
+    last = np.where(~np.isnan(values), np.arange(len(values)), -1)
+    np.maximum.accumulate(last, out=last)
+    filled = values[np.maximum(last, 0)]
+    filled[last < 0] = np.nan
+    return filled
+
+
+def _fill_down(matrix: np.ndarray) -> np.ndarray:
+    """Forward fill each column of a 2-D array; leading gaps stay NaN."""
+    last = np.where(~np.isnan(matrix), np.arange(len(matrix))[:, None], -1)
+    np.maximum.accumulate(last, axis=0, out=last)
+    filled = matrix[np.maximum(last, 0), np.arange(matrix.shape[1])]
+    filled[last < 0] = np.nan
+    return filled
+
+
+def seasonal_fill(values: np.ndarray, season_length: int) -> np.ndarray:
+    """Fill each gap with the value one or more seasons earlier.
+
+    The series is laid out as a (cycles, season_length) matrix and forward
+    filled down each column. Gaps before a phase's first observation take
+    the next season's value instead, and phases never observed are
+    interpolated.
+    """
+    n = len(values)
+    cycles = -(-n // season_length)
+    matrix = np.full(cycles * season_length, np.nan)
+    matrix[:n] = values
+    matrix = _fill_down(matrix.reshape(cycles, season_length))
+    matrix = np.where(np.isnan(matrix), _fill_down(matrix[::-1])[::-1], matrix)
+    return interpolate_gaps(matrix.ravel()[:n])
+
+
+def default_season_length(freq: str) -> Optional[int]:
+    """Season length used by seasonal fill for common frequencies (weekly for daily data, ...)."""
+    offset = pd.tseries.frequencies.to_offset(freq)
+    step = _step_nanos(offset)
+    if step is not None:
+        return _SEASON_BY_STEP.get(step)
+    return _SEASON_BY_OFFSET.get(offset.name.split('-')[0])
+
+
+def regularize(dates: np.ndarray, values: np.ndarray, freq: Optional[str] = None,
+               agg: str = 'mean', fill: str = 'interpolate',
+               season_length: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, dict]:
+    """Put a series on a regular time grid.
+
+    Timestamps are snapped to the grid of ``freq`` (detected when omitted),
+    rows sharing a slot are combined with ``agg`` and empty or null slots are
+    filled with ``fill``. Everything is done with array operations; only
+    calendar frequencies and the 'median'/'min'/'max'/'first'/'last'
+    aggregations of unordered input need a sort. Returns the grid dates,
+    the regular values and a report of what was changed.
+    """
+    if agg not in DUPLICATE_AGGREGATIONS:
+        raise ValueError(f"Invalid aggregation. Please choose one of {DUPLICATE_AGGREGATIONS}.")
+    if fill not in FILL_METHODS:
+        raise ValueError(f"Invalid fill method. Please choose one of {FILL_METHODS}.")
+
+    ticks = np.asarray(dates).astype('datetime64[ns]').view('i8')
+    values = np.asarray(values, dtype='float64')
+    known = ticks != _NAT
+    ticks, values = ticks[known], values[known]
+    if len(ticks) == 0:
+        raise ValueError("No valid dates to regularize.")
+    if freq is None:
+        freq = infer_frequency(ticks)
+    offset = pd.tseries.frequencies.to_offset(freq)
+
+    grid, buckets = _grid(ticks, offset)
+    counts = np.bincount(buckets, minlength=len(grid))
+    present = ~np.isnan(values)
+    regular = _aggregate(buckets[present], values[present], len(grid), agg)
+    missing = int(np.isnan(regular).sum())
+
+    if fill == 'interpolate':
+        regular = interpolate_gaps(regular)
+    elif fill == 'ffill':
+        regular = forward_fill(regular)
+    elif fill == 'seasonal':
+        season_length = season_length or default_season_length(freq)
+        if not season_length:
+            raise ValueError(f"No default season length for frequency '{freq}'. Please pass season_length.")
+        regular = seasonal_fill(regular, season_length)
+
+    report = {
+        'freq': offset.freqstr,
+        'rows_in': int(len(ticks)),
+        'rows_out': int(len(grid)),
+        'duplicates': int(np.maximum(counts - 1, 0).sum()),
+        'missing_timestamps': int((counts == 0).sum()),
+        'filled': missing - int(np.isnan(regular).sum()),
+    }
+    return grid.view('datetime64[ns]'), regular, report
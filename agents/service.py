@@ -0,0 +1,357 @@
+"""Long-running forecast service around TimeSeriesAgent.
+
+Fitted models stay in an in-memory LRU registry, so repeated forecasts of the
+same series are answered from memory instead of a fresh process and refit.
+Fits run in a process pool and predictions in threads, so the asyncio event
+loop never blocks; concurrent identical requests share one computation.
+
+    python -m agents.service --port 8080 --fit-workers 4 --max-models 500
+
+    POST   /models/<id>                     fit: {"path": "data/a.csv"} or {"data": {"ds": [...], "y": [...]}}
+                                            plus optional date_column, value_column, forecaster, profile, frequency
+    GET    /models/<id>/forecast?periods=30 forecast rows (add history=1 to include the fitted history)
+    GET    /models                          registered models
+    DELETE /models/<id>                     drop a model
+    GET    /health
+"""
+from __future__ import annotations
+
+import json
+import time
+import hashlib
+import asyncio
+import argparse
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from agents._lazy import lazy_import
+from agents.forecasters import quiet_stan_logging
+from agents.model_cache import ModelCache
+from agents.time_series_agent import TimeSeriesAgent
+
+pd = lazy_import('pandas')
+
+# Encoded forecasts kept per model, for different periods/history requests
+MAX_CACHED_FORECASTS = 16
+# Largest request body accepted, e.g. inline series data of a fit
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def _fit_model(source, date_column: str, value_column: str, forecaster: str, profile: str,
+               frequency: Optional[str], cache_dir: Optional[str]) -> dict:
+    """Worker entry point: load, clean and fit one series, returning the fitted forecaster."""
+    agent = TimeSeriesAgent(low_memory=True)
+    if isinstance(source, str):
+        agent.load_data(source, date_column=date_column, value_column=value_column)
+    else:
+        agent.data = pd.DataFrame(source)
+    if agent.date_column is None:
+        agent.select_columns(date_column, value_column)
+    date_type, value_type = agent.check_formats()
+    if date_type != 'datetime64[ns]' or value_type not in ['float64', 'float32', 'int64']:
+        agent.correct_formats()
+    if frequency:
+        agent.regularize(freq=None if frequency == 'auto' else frequency)
+    agent.train_prophet_model(cache=ModelCache(cache_dir) if cache_dir else None,
+                              forecaster=forecaster, profile=profile)
+    return {'forecaster': agent.forecaster, 'frequency': agent.frequency, 'rows': len(agent.data),
+            'fit_seconds': agent.forecast_timings['fit'], 'cache_status': agent.cache_status}
+
+
+def _fit_digest(source, **options) -> str:
+    """Digest of everything a fit depends on, so only identical fits are coalesced."""
+    payload = json.dumps({'source': source, **options}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _predict(entry: dict, periods: int) -> pd.DataFrame:
+    """Forecast a registered model: its fitted history followed by ``periods`` rows."""
+    # Low-memory mode keeps only the FORECAST_COLUMNS of the forecast
+    agent = TimeSeriesAgent(low_memory=True)
+    agent.forecaster = entry['forecaster']
+    agent.frequency = entry['frequency']
+    agent.set_forecast_periods(periods)
+    return agent.make_forecast()
+
+
+def _encode(entry: dict, forecast: pd.DataFrame, horizon: int, periods: int, history: bool) -> bytes:
+    """Encode the first ``periods`` of a ``horizon``-period forecast as JSON."""
+    end = len(forecast) - horizon + periods
+    forecast = forecast.iloc[:end] if history else forecast.iloc[end - periods:end]
+    rows = forecast.to_json(orient='split', index=False, date_format='iso')
+    return f'{{"series_id": {json.dumps(entry["series_id"])}, "forecast": {rows}}}'.encode()
+
+
+class ModelRegistry:
+    """In-memory LRU registry of fitted models and their encoded forecasts."""
+
+    def __init__(self, max_models: int = 500):
+        self.max_models = max_models
+        self._models = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def get(self, series_id: str) -> Optional[dict]:
+        entry = self._models.get(series_id)
+        if entry is not None:
+            self._models.move_to_end(series_id)
+        return entry
+
+    def put(self, series_id: str, entry: dict) -> None:
+        self._models[series_id] = entry
+        self._models.move_to_end(series_id)
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+
+    def remove(self, series_id: str) -> bool:
+        return self._models.pop(series_id, None) is not None
+
+    def describe(self) -> list:
+        return [{name: entry[name] for name in ['series_id', 'forecaster_name', 'frequency', 'rows',
+                                                  'fit_seconds', 'fitted_at', 'cache_status']}
+                for entry in self._models.values()]
+
+
+class ForecastService:
+    """Fit and forecast series over HTTP, keeping fitted models in memory.
+
+    Fits run in a process pool of ``fit_workers``; forecasts run in the
+    default thread pool and are cached per model until it is refitted or
+    evicted. Concurrent identical fits of one series are coalesced into a
+    single call, while a different fit of the series waits for the one in
+    flight so the latest request wins. Concurrent forecasts of one model are
+    coalesced into a single prediction of the longest requested horizon.
+    Request bodies over ``max_body_bytes`` are refused.
+    """
+
+    def __init__(self, max_models: int = 500, fit_workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None, max_body_bytes: int = MAX_BODY_BYTES):
+        self.registry = ModelRegistry(max_models)
+        self.cache_dir = cache_dir
+        self.max_body_bytes = max_body_bytes
+        # Workers start on demand while connections are open; spawned ones do not
+        # inherit their sockets, which would keep closed connections alive
+        self.executor = ProcessPoolExecutor(max_workers=fit_workers, initializer=quiet_stan_logging,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        self._pending = {}
+        # series_id -> (digest, future) of its latest fit, queued or running
+        self._fitting = {}
+
+    async def _coalesce(self, key, factory):
+        """Run ``factory()`` once for all concurrent callers with the same key."""
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._pending[key] = future
+            future.add_done_callback(lambda _: self._pending.pop(key, None))
+        # One caller disconnecting must not cancel the others
+        return await asyncio.shield(future)
+
+    async def fit(self, series_id: str, source, date_column: str = 'ds', value_column: str = 'y',
+                  forecaster: str = 'prophet', profile: str = 'default', frequency: Optional[str] = None) -> dict:
+        """Fit a series (a file path or ``{column: values}``) and register it.
+
+        Fits of one series run in arrival order; a request identical to the
+        latest queued or running fit shares its result.
+        """
+        digest = _fit_digest(source, date_column=date_column, value_column=value_column,
+                             forecaster=forecaster, profile=profile, frequency=frequency)
+        latest = self._fitting.get(series_id)
+        if latest is not None and latest[0] == digest:
+            entry = await asyncio.shield(latest[1])
+        else:
+            async def run():
+                if latest is not None:
+                    # Its outcome belongs to its own callers
+                    await asyncio.gather(latest[1], return_exceptions=True)
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.executor, _fit_model, source, date_column, value_column,
+                                                    forecaster, profile, frequency, self.cache_dir)
+                entry = dict(result, series_id=series_id, forecaster_name=forecaster, fitted_at=time.time(),
+                             forecasts=OrderedDict())
+                self.registry.put(series_id, entry)
+                return entry
+            def forget(done):
+                if self._fitting.get(series_id, (None, None))[1] is done:
+                    del self._fitting[series_id]
+            future = asyncio.ensure_future(run())
+            self._fitting[series_id] = (digest, future)
+            future.add_done_callback(forget)
+            # One caller disconnecting must not cancel the others
+            entry = await asyncio.shield(future)
+        return {name: entry[name] for name in ['series_id', 'rows', 'frequency', 'fit_seconds', 'cache_status']}
+
+    async def forecast(self, series_id: str, periods: int, history: bool = False) -> bytes:
+        """Encoded forecast of a registered model, computed at most once per parameters."""
+        if periods <= 0:
+            raise ValueError("Number of periods must be positive")
+        entry = self.registry.get(series_id)
+        if entry is None:
+            raise KeyError(series_id)
+        cached = entry['forecasts'].get((periods, history))
+        if cached is not None:
+            return cached
+
+        async def run():
+            horizon, forecast = await self._prediction(entry, periods)
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(None, _encode, entry, forecast, horizon, periods, history)
+            entry['forecasts'][(periods, history)] = body
+            while len(entry['forecasts']) > MAX_CACHED_FORECASTS:
+                entry['forecasts'].popitem(last=False)
+            return body
+        # Keyed by the entry itself, so a refit never serves a stale computation
+        return await self._coalesce(('forecast', id(entry), periods, history), run)
+
+    async def _prediction(self, entry: dict, periods: int):
+        """``(horizon, forecast)`` of a model with ``horizon >= periods``.
+
+        Concurrent requests for one model share one ``make_forecast`` call:
+        every request raises the wanted horizon, the next prediction covers
+        the longest one, and requests that find a long enough prediction in
+        flight wait for it instead of starting their own.
+        """
+        entry['wanted'] = max(entry.get('wanted', 0), periods)
+        while True:
+            pending = entry.get('predicting')
+            if pending is None or pending.done():
+                pending = asyncio.ensure_future(self._predict_wanted(entry))
+                entry['predicting'] = pending
+                # Drop the finished prediction so the registry does not keep the frame
+                pending.add_done_callback(
+                    lambda done: entry.pop('predicting') if entry.get('predicting') is done else None)
+            horizon, forecast = await asyncio.shield(pending)
+            if horizon >= periods:
+                return horizon, forecast
+            # That prediction started before this request; the next one covers it
+            entry['wanted'] = max(entry.get('wanted', 0), periods)
+
+    async def _predict_wanted(self, entry: dict):
+        # Starts on the next loop iteration, after the requests arriving with it
+        horizon = entry.pop('wanted')
+        loop = asyncio.get_running_loop()
+        return horizon, await loop.run_in_executor(None, _predict, entry, horizon)
+
+    async def dispatch(self, method: str, target: str, body: bytes):
+        """Route one request; returns ``(status, JSON bytes)``."""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if parts == ['health'] and method == 'GET':
+                return 200, json.dumps({'status': 'ok', 'models': len(self.registry)}).encode()
+            if parts == ['models'] and method == 'GET':
+                return 200, json.dumps(self.registry.describe()).encode()
+            if len(parts) == 2 and parts[0] == 'models':
+                if method == 'POST':
+                    options = json.loads(body or b'{}')
+                    source = options.pop('path', None) or options.pop('data', None)
+                    if source is None:
+                        raise ValueError("Please provide a 'path' or 'data' to fit")
+                    return 200, json.dumps(await self.fit(parts[1], source, **options), default=str).encode()
+                if method == 'DELETE':
+                    if not self.registry.remove(parts[1]):
+                        raise KeyError(parts[1])
+                    return 200, json.dumps({'series_id': parts[1], 'status': 'removed'}).encode()
+                return 405, json.dumps({'error': f"{method} is not supported here"}).encode()
+            if len(parts) == 3 and parts[0] == 'models' and parts[2] == 'forecast' and method == 'GET':
+                periods = int(query.get('periods', 30))
+                history = query.get('history', '0').lower() in ('1', 'true', 'yes')
+                return 200, await self.forecast(parts[1], periods, history)
+            return 404, json.dumps({'error': f"Unknown endpoint: {method} {url.path}"}).encode()
+        except KeyError as e:
+            return 404, json.dumps({'error': f"Model not found: {e.args[0]}"}).encode()
+        except (ValueError, TypeError) as e:
+            return 400, json.dumps({'error': f"{type(e).__name__}: {str(e)}"}).encode()
+        except Exception as e:
+            return 500, json.dumps({'error': f"{type(e).__name__}: {str(e)}"}).encode()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection, with keep-alive."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    method = None
+                if method is None:
+                    # Where the body ends is unknown, so the connection cannot be reused
+                    status, keep_alive = 400, False
+                    payload = json.dumps({'error': "Malformed request line or Content-Length"}).encode()
+                elif not 0 <= length <= self.max_body_bytes:
+                    # The body is left unread, so the connection cannot be reused
+                    status, keep_alive = 413, False
+                    payload = json.dumps({'error': f"Request body over {self.max_body_bytes} bytes"}).encode()
+                else:
+                    body = await reader.readexactly(length)
+                    status, payload = await self.dispatch(method.upper(), target, body)
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080) -> None:
+        server = await asyncio.start_server(self._handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve forecasts over HTTP from an in-memory model registry.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-models', dest='max_models', type=int, default=500,
+                        help="Fitted models kept in memory (least recently used are dropped)")
+    parser.add_argument('--fit-workers', dest='fit_workers', type=int, help="Processes fitting models")
+    parser.add_argument('--model-cache', dest='model_cache',
+                        help="Also persist Prophet fits in this ModelCache directory")
+    parser.add_argument('--max-body-mb', dest='max_body_mb', type=float, default=MAX_BODY_BYTES / 2**20,
+                        help="Largest request body accepted")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    service = ForecastService(args.max_models, args.fit_workers, args.model_cache,
+                              max_body_bytes=int(args.max_body_mb * 2**20))
+    print(f"Serving forecasts on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from agents._lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+
+def _quantile(sorted_values: np.ndarray, q: float) -> float:
+    """Linear-interpolated quantile of an already sorted array (pandas' default)."""
+    n = len(sorted_values)
+    if n == 0:
+        return np.nan
+    position = q * (n - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, n - 1)
+    return float(sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower))
+
+
+def _mode(sorted_values: np.ndarray) -> float:
+    """Smallest most frequent value, from run lengths of a sorted array."""
+    if len(sorted_values) == 0:
+        return np.nan
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_values)) + 1))
+    counts = np.diff(np.concatenate((starts, [len(sorted_values)])))
+    return float(sorted_values[starts[np.argmax(counts)]])
+
+
+def compute_mode(values) -> float:
+    """Smallest most frequent non-null value of ``values``."""
+    values = np.asarray(values, dtype='float64')
+    return _mode(np.sort(values[~np.isnan(values)]))
+
+
+def shape_from_sums(n: int, m2: float, m3: float, m4: float) -> dict:
+    """Sample std, skew and kurtosis from central moment sums, as pandas computes them."""
+    std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+    if n < 3:
+        skew = np.nan
+    elif m2 == 0:
+        skew = 0.0
+    else:
+        skew = (n * (n - 1) ** 0.5 / (n - 2)) * (m3 / m2 ** 1.5)
+    if n < 4:
+        kurtosis = np.nan
+    elif m2 == 0:
+        kurtosis = 0.0
+    else:
+        numerator = n * (n + 1) * (n - 1) * m4
+        denominator = (n - 2) * (n - 3) * m2 ** 2
+        kurtosis = numerator / denominator - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+    return {'std': float(std), 'skew': float(skew), 'kurtosis': float(kurtosis)}
+
+
+def central_sums(values: np.ndarray) -> tuple:
+    """Return ``(n, mean, m2, m3, m4)``: count, mean and central moment sums."""
+    n = len(values)
+    if n == 0:
+        return 0, np.nan, 0.0, 0.0, 0.0
+    mean = values.mean()
+    deviations = values - mean
+    squared = deviations * deviations
+    return n, float(mean), float(squared.sum()), float((squared * deviations).sum()), float((squared * squared).sum())
+
+
+def _moments(values: np.ndarray) -> dict:
+    """Mean, sample std and pandas-compatible (bias-corrected) skew and kurtosis."""
+    n, mean, m2, m3, m4 = central_sums(values)
+    if n == 0:
+        return {'mean': np.nan, 'std': np.nan, 'skew': np.nan, 'kurtosis': np.nan}
+    moments = {'mean': mean}
+    moments.update(shape_from_sums(n, m2, m3, m4))
+    return moments
+
+
+def _group_stats(keys: np.ndarray, values: np.ndarray) -> dict:
+    """Mean, sample std and non-null count per integer key, via bincount."""
+    present = np.unique(keys)
+    offset = present.min() if len(present) else 0
+    codes = keys - offset
+    valid = ~np.isnan(values)
+    size = int(codes.max()) + 1 if len(codes) else 0
+    counts = np.bincount(codes[valid], minlength=size)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+        deviations = values[valid] - means[codes[valid]]
+        squares = np.bincount(codes[valid], weights=deviations * deviations, minlength=size)
+        stds = np.sqrt(squares / (counts - 1))
+    stds[counts < 2] = np.nan
+
+    result = {'mean': {}, 'std': {}, 'count': {}}
+    for key in present:
+        code = key - offset
+        result['mean'][int(key)] = float(means[code])
+        result['std'][int(key)] = float(stds[code])
+        result['count'][int(key)] = int(counts[code])
+    return result
+
+
+def compute_statistics(values, dates=None) -> dict:
+    """Compute every summary statistic of a series from a single sort.
+
+    Returns extremes, mean/median/mode, std/skew/kurtosis, quartiles with the
+    IQR outlier bounds and outlier count, and null counts. When ``dates`` are
+    given, per-month (mean/std/count) and per-year (mean) aggregates and the
+    date range are included too. Results match the equivalent pandas reductions.
+    """
+    values = np.asarray(values, dtype='float64')
+    observed = values[~np.isnan(values)]
+    ordered = np.sort(observed)
+    n = len(ordered)
+
+    q1 = _quantile(ordered, 0.25)
+    q3 = _quantile(ordered, 0.75)
+    iqr = q3 - q1
+    stats = {
+        'total': int(len(values)),
+        'count': int(n),
+        'nulls': int(len(values) - n),
+        'max': float(ordered[-1]) if n else np.nan,
+        'min': float(ordered[0]) if n else np.nan,
+        'median': _quantile(ordered, 0.5),
+        'mode': _mode(ordered),
+        'q1': q1,
+        'q3': q3,
+        'iqr': iqr,
+        'lower_bound': q1 - 1.5 * iqr,
+        'upper_bound': q3 + 1.5 * iqr,
+    }
+    # Outliers counted by binary search on the sorted values, no extra mask pass
+    stats['outlier_count'] = int(np.searchsorted(ordered, stats['lower_bound'], side='left')
+                                 + n - np.searchsorted(ordered, stats['upper_bound'], side='right'))
+    stats.update(_moments(observed))
+
+    if dates is not None:
+        index = pd.DatetimeIndex(dates)
+        valid_dates = ~index.isna()
+        stats['date_min'] = index.min()
+        stats['date_max'] = index.max()
+        months = index.month.to_numpy()[valid_dates].astype('int64')
+        years = index.year.to_numpy()[valid_dates].astype('int64')
+        stats['monthly'] = _group_stats(months, values[valid_dates])
+        stats['yearly'] = _group_stats(years, values[valid_dates])['mean']
+    return stats
@@ -1,24 +1,166 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from prophet import Prophet
-from datetime import datetime
-import plotly.graph_objects as go
+from __future__ import annotations
+
 from typing import Tuple, Optional
 import os
+import time
+from agents._lazy import lazy_import
+from agents.data_io import is_columnar, read_csv_chunked, read_series, write_series
+from agents.parsing import parse_dates, parse_numeric
+from agents.resampling import FILL_METHODS, regularize
+from agents.statistics import compute_mode, compute_statistics
+from agents.online_stats import OnlineStatistics
+from agents.features import rolling_features
+from agents.forecasters import ProphetForecaster, get_forecaster
+from agents.backtest import rolling_backtest
+from agents.anomalies import detect_anomalies
+from agents.instrumentation import Tracer, traced
+from agents.interactive import build_interactive_figures, write_html_report
+from agents.rendering import DATA_PLOTS, FORECAST_PLOTS, PLOT_DIR, PlotRenderer, render_plot, select_plots
+
+# Heavy dependencies load on first use, so importing the agent stays cheap
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+NULL_STRATEGIES = ['drop', 'mean', 'median', 'mode', 'interpolate', 'ffill', 'seasonal']
+
+# Forecast columns consumed by plot_forecast and downstream consumers
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper', 'trend', 'yearly']
+
+# Rolling mean windows drawn by plot_moving_averages
+MOVING_AVERAGE_WINDOWS = [10, 50]
+
+# Value dtypes of the series in low-memory mode
+VALUE_DTYPES = ['float64', 'float32']
 
 class TimeSeriesAgent:
-    def __init__(self):
-        self.data = None
+    def __init__(self, low_memory: bool = False, value_dtype: str = 'float64'):
+        """Create an agent; ``low_memory`` keeps the series and forecast compact.
+
+        In low-memory mode the series is stored as contiguous date/value
+        arrays with values in ``value_dtype`` ('float64' or 'float32'),
+        column selection and model preparation avoid copying it, and only the
+        FORECAST_COLUMNS of the forecast are kept. Statistics, features and
+        model fits still compute in float64.
+        """
+        if value_dtype not in VALUE_DTYPES:
+            raise ValueError(f"Invalid value dtype. Please choose one of {VALUE_DTYPES}.")
+        self.low_memory = low_memory
+        self.value_dtype = value_dtype
+        self._data = None
+        self._appended = []
+        self._statistics = None
+        self._online = None
+        self._features = {}
         self.date_column = None
         self.value_column = None
         self.forecast_periods = None
         self.prophet_model = None
+        self.forecaster = None
         self.forecast_results = None
+        self.cache_status = None
+        self.forecast_timings = {}
+        self.parse_report = None
+        self.frequency = None
+        self.regularize_report = None
+        self.tracer = None
+    
+    @property
+    def data(self) -> Optional[pd.DataFrame]:
+        if self._appended:
+            # Rows from ``append`` are concatenated on first use, not on every append
+            self._data = pd.concat([self._data, *self._appended], ignore_index=True)
+            self._appended = []
+        return self._data
+    
+    @data.setter
+    def data(self, value: Optional[pd.DataFrame]) -> None:
+        # Any new frame invalidates the memoized and incremental statistics
+        if self.low_memory and value is not None:
+            value = self._compact(value)
+        self._data = value
+        self._appended = []
+        self._statistics = None
+        self._features = {}
+        self._online = None
+    
+    def _compact(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """The selected series over contiguous arrays, values in ``value_dtype``.
+
+        Frames without the selected columns, or with values not parsed yet,
+        are returned unchanged.
+        """
+        if self.date_column not in frame.columns or self.value_column not in frame.columns:
+            return frame
+        values = frame[self.value_column]
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            return frame
+        return pd.DataFrame({
+            self.date_column: np.ascontiguousarray(frame[self.date_column].to_numpy()),
+            self.value_column: np.ascontiguousarray(values.to_numpy(dtype=self.value_dtype, na_value=np.nan)),
+        }, index=frame.index, copy=False)
+    
+    def memory_usage(self) -> dict:
+        """Bytes held by the series and the forecast results."""
+        return {name: int(frame.memory_usage(deep=True).sum()) if frame is not None else 0
+                for name, frame in [('data', self.data), ('forecast', self.forecast_results)]}
+    
+    def enable_tracing(self, memory: bool = False) -> Tracer:
+        """Record wall/CPU time, memory and rows of every instrumented method call.
+
+        Returns the Tracer; export it with ``to_json`` or ``to_prometheus``.
+        Set ``tracer`` back to None to stop recording.
+        """
+        self.tracer = Tracer(memory=memory)
+        return self.tracer
+    
+    def invalidate_statistics(self) -> None:
+        """Drop memoized statistics and features after modifying ``data`` in place."""
+        self._statistics = None
+        self._features = {}
         
-    def load_data(self, file_path: str) -> pd.DataFrame:
-        """Load CSV data and return first 5 rows for preview."""
+    @traced
+    def load_data(self, file_path: str, chunksize: Optional[int] = None,
+                  date_column: Optional[str] = None, value_column: Optional[str] = None,
+                  value_dtype: Optional[str] = None, resample_rule: Optional[str] = None,
+                  agg: str = 'mean') -> pd.DataFrame:
+        """Load CSV data and return first 5 rows for preview.
+
+        With ``chunksize`` set the file is streamed: only the date and value
+        columns are read, each chunk is parsed into compact datetime/float
+        arrays (``value_dtype`` defaults to the agent's), and
+        ``resample_rule``/``agg`` optionally downsample on the fly.
+        The columns are selected and formatted as part of the load, and the
+        parse failures are recorded in ``parse_report``.
+
+        Parquet, Arrow IPC/Feather and ``.npy`` files are read directly in their
+        typed form; if both columns are given only those are read.
+        """
+        if is_columnar(file_path):
+            try:
+                columns = [date_column, value_column] if date_column and value_column else None
+                self.data = read_series(file_path, columns=columns)
+            except Exception as e:
+                raise Exception(f"Error loading data: {str(e)}")
+            if columns is not None:
+                self.date_column = date_column
+                self.value_column = value_column
+            return self.data.head()
+
+        if chunksize is not None:
+            if date_column is None or value_column is None:
+                raise ValueError("Date and value columns are required for chunked loading")
+            try:
+                data, report = read_csv_chunked(file_path, date_column, value_column,
+                                                chunksize=chunksize, value_dtype=value_dtype or self.value_dtype,
+                                                resample_rule=resample_rule, agg=agg)
+            except Exception as e:
+                raise Exception(f"Error loading data: {str(e)}")
+            self.date_column = date_column
+            self.value_column = value_column
+            self.data = data
+            self.parse_report = report
+            return self.data.head()
+
         try:
             # Read CSV with explicit data types
             self.data = pd.read_csv(file_path, dtype={
@@ -29,6 +171,20 @@ class TimeSeriesAgent:
         except Exception as e:
             raise Exception(f"Error loading data: {str(e)}")
     
+    @traced
+    def save_data(self, file_path: str) -> None:
+        """Save the cleaned date/value series (format chosen by file extension)."""
+        if self.data is None:
+            raise ValueError("No data loaded")
+        write_series(self.data, file_path)
+    
+    @traced
+    def save_forecast(self, file_path: str, columns: Optional[list] = None) -> None:
+        """Save the forecast results (format chosen by file extension)."""
+        if self.forecast_results is None:
+            raise ValueError("No forecast results available")
+        write_series(self.forecast_results, file_path, columns=columns)
+    
     def select_columns(self, date_column: str, value_column: str) -> None:
         """Select and validate date and value columns."""
         if date_column not in self.data.columns or value_column not in self.data.columns:
@@ -38,7 +194,12 @@ class TimeSeriesAgent:
         self.value_column = value_column
         
         # Extract selected columns
-        self.data = self.data[[date_column, value_column]].copy()
+        if self.low_memory:
+            # A single copy of the two columns: take does not mark the result as a view
+            columns = self.data.columns
+            self.data = self.data.take([columns.get_loc(date_column), columns.get_loc(value_column)], axis=1)
+        else:
+            self.data = self.data[[date_column, value_column]].copy()
     
     def check_formats(self) -> Tuple[str, str]:
         """Check and return data types of date and value columns."""
@@ -46,31 +207,35 @@ class TimeSeriesAgent:
         value_type = str(self.data[self.value_column].dtype)
         return date_type, value_type
     
-    def correct_formats(self) -> None:
-        """Convert date to datetime and value to numeric if needed."""
+    @traced
+    def correct_formats(self, date_format: Optional[str] = None) -> dict:
+        """Convert date to datetime and value to numeric if needed.
+
+        The date format is detected once (or taken from ``date_format``) and
+        dates are floored to day resolution; values are cleaned and parsed in
+        a single vectorized pass. Returns the number of rows that failed to
+        parse in each column.
+        """
         try:
-            # Convert date column to datetime
-            self.data[self.date_column] = pd.to_datetime(self.data[self.date_column])
-            # Ensure date format is YYYY-MM-DD
-            self.data[self.date_column] = self.data[self.date_column].dt.strftime('%Y-%m-%d')
-            self.data[self.date_column] = pd.to_datetime(self.data[self.date_column])
-            
-            # Convert value column to numeric
-            # First, clean any quotes or whitespace
-            self.data[self.value_column] = self.data[self.value_column].str.strip().str.strip('"\'')
-            
-            # Replace 'Null' with NaN
-            self.data[self.value_column] = self.data[self.value_column].replace('Null', np.nan)
-            
-            # Convert to numeric
-            self.data[self.value_column] = pd.to_numeric(self.data[self.value_column], errors='coerce')
+            dates, date_failures = parse_dates(self.data[self.date_column], date_format)
+            values, value_failures = parse_numeric(self.data[self.value_column], dtype=self.value_dtype)
             
             # Check if conversion was successful
-            if self.data[self.value_column].isnull().all():
+            if np.isnat(dates).all():
+                raise ValueError("Unable to convert date column to datetime format. Please check your data.")
+            if np.isnan(values).all():
                 raise ValueError("Unable to convert value column to numeric format. Please check your data.")
-                
+            
+            self.data = pd.DataFrame({self.date_column: dates, self.value_column: values},
+                                     index=self.data.index, copy=not self.low_memory)
         except Exception as e:
             raise ValueError(f"It is not possible to proceed with the current data format. Please correct your data format and try again. Error: {str(e)}")
+        
+        self.parse_report = {
+            'date_failures': date_failures,
+            'value_failures': value_failures
+        }
+        return self.parse_report
     
     def get_data_info(self) -> dict:
         """Get data shape and null counts."""
@@ -79,44 +244,55 @@ class TimeSeriesAgent:
             'nulls': self.data.isnull().sum().to_dict()
         }
     
-    def handle_null_values(self, action: str) -> None:
-        """Handle null values based on user choice."""
+    @traced
+    def handle_null_values(self, action: str, strategy: Optional[str] = None) -> None:
+        """Handle null values based on user choice.
+        
+        Pass ``strategy`` ('drop', 'mean', 'median', 'mode', 'interpolate',
+        'ffill' or 'seasonal') to choose without prompting, e.g. in unattended
+        runs. The last three also fill missing timestamps, see ``regularize``.
+        """
         if action.lower() == 'correct':
-            print("\nPlease choose how to handle null values:")
-            print("1. Remove rows with null values")
-            print("2. Replace with mean")
-            print("3. Replace with median")
-            print("4. Replace with mode")
-            
-            while True:
-                try:
-                    choice = int(input("\nEnter your choice (1-4): "))
-                    if choice not in [1, 2, 3, 4]:
-                        print("Please enter a number between 1 and 4")
-                        continue
-                    break
-                except ValueError:
-                    print("Please enter a valid number")
+            if strategy is None:
+                print("\nPlease choose how to handle null values:")
+                print("1. Remove rows with null values")
+                print("2. Replace with mean")
+                print("3. Replace with median")
+                print("4. Replace with mode")
+                print("5. Interpolate over time (also fills missing dates)")
+                print("6. Forward fill (also fills missing dates)")
+                print("7. Seasonal fill (also fills missing dates)")
+                
+                while True:
+                    try:
+                        choice = int(input("\nEnter your choice (1-7): "))
+                        if choice not in range(1, len(NULL_STRATEGIES) + 1):
+                            print(f"Please enter a number between 1 and {len(NULL_STRATEGIES)}")
+                            continue
+                        break
+                    except ValueError:
+                        print("Please enter a valid number")
+                strategy = NULL_STRATEGIES[choice - 1]
+            elif strategy not in NULL_STRATEGIES:
+                raise ValueError(f"Invalid null strategy. Please choose one of {NULL_STRATEGIES}.")
             
-            if choice == 1:
+            if strategy == 'drop':
                 # Remove rows with null values
                 self.data = self.data.dropna()
                 print("Null values have been removed from the dataset.")
-            elif choice == 2:
-                # Replace with mean
-                mean_value = self.data[self.value_column].mean()
-                self.data[self.value_column] = self.data[self.value_column].fillna(mean_value)
-                print(f"Null values have been replaced with mean value: {mean_value:.2f}")
-            elif choice == 3:
-                # Replace with median
-                median_value = self.data[self.value_column].median()
-                self.data[self.value_column] = self.data[self.value_column].fillna(median_value)
-                print(f"Null values have been replaced with median value: {median_value:.2f}")
-            elif choice == 4:
-                # Replace with mode
-                mode_value = self.data[self.value_column].mode().iloc[0]
-                self.data[self.value_column] = self.data[self.value_column].fillna(mode_value)
-                print(f"Null values have been replaced with mode value: {mode_value:.2f}")
+            elif strategy in FILL_METHODS:
+                report = self.regularize(freq=self.frequency, fill=strategy)
+                print(f"Series regularized to frequency '{report['freq']}': "
+                      f"{report['missing_timestamps']} missing dates added, {report['filled']} values filled "
+                      f"({strategy}).")
+            else:
+                # Replace with mean, median or mode from the memoized statistics
+                fill_value = self.get_statistics()[strategy]
+                # Assigned through the setter so low-memory mode keeps the value dtype
+                self.data = self.data.assign(**{self.value_column: self.data[self.value_column].fillna(fill_value)})
+                print(f"Null values have been replaced with {strategy} value: {fill_value:.2f}")
+            
+            self.invalidate_statistics()
             
             # Show updated null value count
             null_count = self.data[self.value_column].isnull().sum()
@@ -127,85 +303,149 @@ class TimeSeriesAgent:
         else:
             raise ValueError("Invalid action. Please choose 'correct' or 'continue'.")
     
+    @traced
+    def regularize(self, freq: Optional[str] = None, agg: str = 'mean', fill: str = 'interpolate',
+                   season_length: Optional[int] = None) -> dict:
+        """Resample the series onto a regular time grid.
+
+        ``freq`` is a pandas frequency string ('D', 'h', '15min', 'MS', ...)
+        and is detected from the most common spacing when omitted. Duplicate
+        timestamps are combined with ``agg`` and gaps are filled with
+        ``fill`` ('interpolate', 'ffill', 'seasonal' or 'none'). Returns a
+        report with the frequency and the number of duplicates and filled gaps.
+        """
+        if not pd.api.types.is_datetime64_any_dtype(self.data[self.date_column]):
+            raise ValueError("The date column must be datetime. Please run correct_formats first.")
+        dates, values, report = regularize(self.data[self.date_column].to_numpy(),
+                                           self.data[self.value_column].to_numpy(dtype='float64', na_value=np.nan),
+                                           freq=freq, agg=agg, fill=fill, season_length=season_length)
+        self.data = pd.DataFrame({self.date_column: dates, self.value_column: values})
+        self.frequency = report['freq']
+        self.regularize_report = report
+        return report
+    
+    @traced
+    def get_statistics(self) -> dict:
+        """Return the full statistics of the value column, memoized until the data changes."""
+        key = (self.date_column, self.value_column)
+        if self._statistics is None or self._statistics[0] != key:
+            dates = None
+            if self.date_column in self.data.columns and \
+                    pd.api.types.is_datetime64_any_dtype(self.data[self.date_column]):
+                dates = self.data[self.date_column].to_numpy()
+            self._statistics = (key, compute_statistics(self.data[self.value_column].to_numpy(), dates))
+        stats = self._statistics[1]
+        if 'mode' not in stats:
+            # Running statistics without mode tracking; the exact mode is computed on first use
+            stats['mode'] = compute_mode(self.data[self.value_column].to_numpy(dtype='float64', na_value=np.nan))
+        return stats
+    
     def get_basic_stats(self) -> dict:
         """Calculate basic statistics."""
-        return {
-            'max': self.data[self.value_column].max(),
-            'min': self.data[self.value_column].min(),
-            'mean': self.data[self.value_column].mean(),
-            'median': self.data[self.value_column].median(),
-            'mode': self.data[self.value_column].mode().iloc[0]
-        }
+        stats = self.get_statistics()
+        return {name: stats[name] for name in ['max', 'min', 'mean', 'median', 'mode']}
     
+    @traced
     def detect_outliers(self) -> pd.DataFrame:
         """Detect outliers using IQR method."""
-        Q1 = self.data[self.value_column].quantile(0.25)
-        Q3 = self.data[self.value_column].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        
-        outliers = self.data[
-            (self.data[self.value_column] < lower_bound) | 
-            (self.data[self.value_column] > upper_bound)
-        ]
+        stats = self.get_statistics()
+        values = self.data[self.value_column].to_numpy()
+        outliers = self.data[(values < stats['lower_bound']) | (values > stats['upper_bound'])]
         return outliers
     
-    def plot_boxplot(self) -> None:
-        """Plot boxplot to visualize outliers."""
-        plt.figure(figsize=(10, 6))
-        sns.boxplot(y=self.data[self.value_column])
-        plt.title(f'Boxplot of {self.value_column}')
-        plt.ylabel(self.value_column)
-        plt.savefig('plots/boxplot.png')
-        plt.close()
+    @traced
+    def detect_anomalies(self, method: str = 'rolling_mad', threshold: Optional[float] = None,
+                         keep_all: bool = False, **options) -> pd.DataFrame:
+        """Score every point and return the anomalies with their scores.
+
+        Unlike the global IQR rule of ``detect_outliers``, 'rolling_mad'
+        compares each point with its local median and 'seasonal' with its
+        trend and season, so seasonal peaks are not flagged and local spikes
+        are; 'forecast_band' flags points outside the interval of
+        ``forecast_results``. See ``agents.anomalies.detect_anomalies`` for
+        the methods, thresholds and options.
+        """
+        forecast = None
+        if method == 'forecast_band':
+            if self.forecast_results is None:
+                raise ValueError("No forecast results available")
+            forecast = self.forecast_results
+        return detect_anomalies(self.data, method, threshold, date_column=self.date_column,
+                                value_column=self.value_column, forecast=forecast, freq=self.frequency,
+                                keep_all=keep_all, **options)
     
-    def plot_distribution(self) -> None:
-        """Plot distribution with histogram and KDE."""
-        plt.figure(figsize=(10, 6))
-        sns.histplot(data=self.data, x=self.value_column, kde=True)
-        plt.title(f'Distribution of {self.value_column}')
-        plt.savefig('plots/distribution.png')
-        plt.close()
+    def enable_incremental(self, compression: int = 200, track_mode: bool = False) -> None:
+        """Start tracking running statistics so ``append`` costs O(new rows).
+
+        After an append, ``get_statistics`` (and so ``get_basic_stats`` and
+        the outlier bounds) is served from the running statistics; quantiles
+        are then approximate. The mode needs a count per distinct value, so it
+        is only kept up to date with ``track_mode``; otherwise it is computed
+        from the full series when first asked for. Replacing ``data``
+        afterwards (e.g. via ``handle_null_values``) turns incremental mode
+        off again.
+        """
+        if self.data is None or self.value_column is None:
+            raise ValueError("Load data and select columns before enabling incremental mode")
+        self._online = OnlineStatistics(compression, track_mode=track_mode)
+        self._online.update(self.data[self.value_column].to_numpy(), self._date_values(self.data))
     
-    def plot_raw_data(self) -> None:
-        """Plot raw data with summary lines."""
-        plt.figure(figsize=(15, 7))
-        plt.plot(self.data[self.date_column], self.data[self.value_column], label='Raw Data')
-        
-        stats = self.get_basic_stats()
-        for stat_name, stat_value in stats.items():
-            plt.axhline(y=stat_value, color='r', linestyle='--', label=f'{stat_name}: {stat_value:.2f}')
-        
-        plt.title(f'Raw Data with Summary Lines')
-        plt.xlabel('Date')
-        plt.ylabel(self.value_column)
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('plots/raw_data.png')
-        plt.close()
+    def _date_values(self, frame: pd.DataFrame) -> Optional[np.ndarray]:
+        """Date column as datetime64 values, or None if it is not parsed yet."""
+        if pd.api.types.is_datetime64_any_dtype(frame[self.date_column]):
+            return frame[self.date_column].to_numpy()
+        return None
     
-    def plot_moving_averages(self) -> None:
-        """Plot raw data with moving averages."""
-        plt.figure(figsize=(15, 7))
-        plt.plot(self.data[self.date_column], self.data[self.value_column], label='Raw Data', alpha=0.5)
+    @traced
+    def append(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Append new observations and return the outliers among them.
+
+        Running moments, quantile sketch and monthly/yearly accumulators are
+        updated from the new rows only; the outlier bounds are the updated IQR
+        bounds. The rows are buffered and joined to ``data`` when it is next
+        used, so appending never copies the history. Raw text rows are parsed
+        with the same rules as ``correct_formats``.
+        """
+        if self._online is None:
+            raise ValueError("Incremental mode is not enabled. Please call enable_incremental first.")
+        if self.date_column not in rows.columns or self.value_column not in rows.columns:
+            raise ValueError("One or both columns not found in the new rows")
         
-        # Calculate moving averages
-        ma10 = self.data[self.value_column].rolling(window=10).mean()
-        ma50 = self.data[self.value_column].rolling(window=50).mean()
+        dates, _ = parse_dates(rows[self.date_column])
+        values, _ = parse_numeric(rows[self.value_column], dtype=self._data[self.value_column].dtype)
+        new_rows = pd.DataFrame({self.date_column: dates, self.value_column: values})
         
-        plt.plot(self.data[self.date_column], ma10, label='10-day MA', alpha=0.8)
-        plt.plot(self.data[self.date_column], ma50, label='50-day MA', alpha=0.8)
+        self._online.update(values, dates)
+        # Bypass the data setter so the incremental state survives
+        self._appended.append(new_rows)
+        self._features = {}
+        self._statistics = ((self.date_column, self.value_column), self._online.summary())
         
-        plt.title(f'Raw Data with Moving Averages')
-        plt.xlabel('Date')
-        plt.ylabel(self.value_column)
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('plots/moving_averages.png')
-        plt.close()
+        lower_bound, upper_bound = self._online.bounds()
+        return new_rows[(values < lower_bound) | (values > upper_bound)]
+    
+    def get_incremental_stats(self) -> dict:
+        """Return the running statistics maintained in incremental mode."""
+        if self._online is None:
+            raise ValueError("Incremental mode is not enabled. Please call enable_incremental first.")
+        return self._online.summary()
+    
+    @traced
+    def rolling_features(self, windows=MOVING_AVERAGE_WINDOWS, statistics=('mean',), quantiles=(0.5,),
+                         shift: int = 0, dtype: str = 'float64') -> pd.DataFrame:
+        """Rolling window features of the value column as one feature matrix.
+
+        Columns are named ``<statistic>_<window>`` (``q90_<window>`` for
+        quantiles), see ``agents.features.rolling_features``. Results are
+        memoized until the data changes, so plots and forecasting regressors
+        share one computation.
+        """
+        key = (tuple(windows), tuple(statistics), tuple(quantiles), shift, dtype)
+        if key not in self._features:
+            self._features[key] = rolling_features(
+                self.data[self.value_column].to_numpy(dtype='float64', na_value=np.nan),
+                windows, statistics, quantiles, shift=shift, dtype=dtype, index=self.data.index)
+        return self._features[key]
     
     def set_forecast_periods(self, periods: int) -> None:
         """Set the number of periods to forecast."""
@@ -215,93 +455,168 @@ class TimeSeriesAgent:
     
     def prepare_prophet_data(self) -> pd.DataFrame:
         """Prepare data in the format required by Prophet."""
+        if self.low_memory:
+            # Views of the stored arrays; only float32 values are widened for the model
+            return pd.DataFrame({
+                'ds': self.data[self.date_column].to_numpy(),
+                'y': self.data[self.value_column].to_numpy(dtype='float64', na_value=np.nan),
+            }, index=self.data.index, copy=False)
         prophet_data = self.data.copy()
         prophet_data.columns = ['ds', 'y']  # Prophet requires these column names
         return prophet_data
     
-    def train_prophet_model(self) -> None:
-        """Train the Prophet model."""
-        self.prophet_model = Prophet()
-        prophet_data = self.prepare_prophet_data()
-        self.prophet_model.fit(prophet_data)
+    @traced
+    def train_prophet_model(self, cache=None, forecaster=None, profile: str = 'default') -> None:
+        """Train the forecasting model, Prophet by default.
+
+        With a ModelCache, Prophet reuses a cached fit when possible.
+        ``profile`` picks Prophet's speed settings from PROPHET_PROFILES
+        ('default', 'fast' or 'mcmc'). ``forecaster`` selects another model:
+        a name from FORECASTERS ('fourier', 'seasonal_naive') or a Forecaster
+        instance. The fit time is recorded in ``forecast_timings['fit']``.
+        """
+        if forecaster is None or forecaster == 'prophet':
+            forecaster = ProphetForecaster(cache=cache, profile=profile)
+        elif profile != 'default':
+            raise ValueError("Prophet profiles only apply to the 'prophet' forecaster")
+        prepared = self.prepare_prophet_data()
+        start = time.perf_counter()
+        self.forecaster = get_forecaster(forecaster).fit(prepared)
+        self.forecast_timings = {'fit': time.perf_counter() - start}
+        self.prophet_model = getattr(self.forecaster, 'model', None)
+        self.cache_status = getattr(self.forecaster, 'cache_status', None)
     
+    @traced
     def make_forecast(self) -> pd.DataFrame:
-        """Generate forecast using the trained Prophet model."""
-        if self.prophet_model is None:
+        """Generate forecast using the trained model.
+
+        The prediction time, including Prophet's uncertainty sampling, is
+        recorded in ``forecast_timings['predict']``. In low-memory mode only
+        the FORECAST_COLUMNS are kept, with values in ``value_dtype``.
+        """
+        if self.forecaster is None:
             raise ValueError("Model has not been trained yet")
             
         if self.forecast_periods is None:
             raise ValueError("Number of forecast periods not set. Please set forecast periods first.")
             
-        future_dates = self.prophet_model.make_future_dataframe(periods=self.forecast_periods)
-        self.forecast_results = self.prophet_model.predict(future_dates)
+        # Forecast at the series' own frequency once it is known, daily otherwise
+        start = time.perf_counter()
+        forecast = self.forecaster.predict(self.forecast_periods, freq=self.frequency or 'D')
+        self.forecast_timings['predict'] = time.perf_counter() - start
+        if self.low_memory:
+            forecast = pd.DataFrame({
+                column: forecast[column].to_numpy(dtype=None if column == 'ds' else self.value_dtype)
+                for column in FORECAST_COLUMNS if column in forecast.columns
+            }, copy=False)
+        self.forecast_results = forecast
         return self.forecast_results
     
+    @traced
+    def backtest(self, horizon: Optional[int] = None, initial: Optional[int] = None,
+                 period: Optional[int] = None, cutoffs: Optional[list] = None, forecaster=None,
+                 profile: str = 'default', max_workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Measure forecast accuracy with a rolling-origin backtest.
+
+        The series is prepared once and the model is refitted at each cutoff
+        in parallel; ``horizon`` defaults to the forecast periods. Returns the
+        scored predictions, MAE/MAPE/RMSE/coverage per horizon and the failed
+        cutoffs, see ``agents.backtest.rolling_backtest``.
+        """
+        horizon = horizon or self.forecast_periods
+        if horizon is None:
+            raise ValueError("Number of forecast periods not set. Please set forecast periods first.")
+        return rolling_backtest(self.prepare_prophet_data(), horizon, freq=self.frequency or 'D',
+                                initial=initial, period=period, cutoffs=cutoffs, forecaster=forecaster,
+                                profile=profile, max_workers=max_workers, cache_dir=cache_dir)
+    
+    def plot_payload(self, name: str) -> dict:
+        """Snapshot the plain arrays and labels the named plot needs."""
+        dates = self.data[self.date_column].to_numpy()
+        values = self.data[self.value_column].to_numpy()
+        payload = {'value_column': self.value_column}
+        if name in ['boxplot', 'distribution']:
+            payload['values'] = values
+        elif name == 'monthly_boxplot':
+            payload['months'] = self.data[self.date_column].dt.month.to_numpy()
+            payload['values'] = values
+        elif name == 'raw_data':
+            payload.update(dates=dates, values=values, stats=self.get_basic_stats())
+        elif name == 'moving_averages':
+            features = self.rolling_features()
+            averages = {f'{window}-day MA': features[f'mean_{window}'].to_numpy()
+                        for window in MOVING_AVERAGE_WINDOWS}
+            payload.update(dates=dates, values=values, averages=averages)
+        elif name in FORECAST_PLOTS:
+            if self.forecast_results is None:
+                raise ValueError("No forecast results available")
+            forecast_dates = self.forecast_results['ds'].to_numpy()
+            if name == 'forecast':
+                payload.update(dates=dates, values=values, forecast_dates=forecast_dates,
+                               yhat=self.forecast_results['yhat'].to_numpy(),
+                               yhat_lower=self.forecast_results['yhat_lower'].to_numpy(),
+                               yhat_upper=self.forecast_results['yhat_upper'].to_numpy())
+            elif name == 'trend':
+                payload.update(forecast_dates=forecast_dates, trend=self.forecast_results['trend'].to_numpy())
+            else:
+                payload.update(forecast_dates=forecast_dates, yearly=self.forecast_results['yearly'].to_numpy())
+        else:
+            raise ValueError(f"Unknown plot: {name}")
+        return payload
+    
+    @traced
+    def render_plots(self, plots: Optional[list] = None, skip: Optional[list] = None,
+                     renderer: Optional[PlotRenderer] = None, plot_dir: Optional[str] = None) -> dict:
+        """Render the selected plots, skipping any listed in ``skip``.
+
+        Without a renderer plots are written serially and ``{name: path}`` is
+        returned. With a PlotRenderer they are queued on its worker pool and
+        ``{name: future}`` is returned immediately. ``plot_dir`` overrides
+        the output directory.
+        """
+        if renderer is not None:
+            return renderer.submit(self, plots, skip, plot_dir=plot_dir)
+        available = DATA_PLOTS + (FORECAST_PLOTS if self.forecast_results is not None else [])
+        return {name: render_plot(name, self.plot_payload(name), plot_dir or PLOT_DIR)
+                for name in select_plots(plots, skip, available)}
+    
+    @traced
+    def plot_boxplot(self) -> None:
+        """Plot boxplot to visualize outliers."""
+        render_plot('boxplot', self.plot_payload('boxplot'))
+    
+    @traced
+    def plot_distribution(self) -> None:
+        """Plot distribution with histogram and KDE."""
+        render_plot('distribution', self.plot_payload('distribution'))
+    
+    @traced
     def plot_monthly_boxplot(self) -> None:
         """Plot monthly boxplot to visualize seasonal patterns."""
-        # Extract month from date
-        self.data['month'] = self.data[self.date_column].dt.month
-        
-        plt.figure(figsize=(15, 7))
-        sns.boxplot(data=self.data, x='month', y=self.value_column)
-        plt.title('Monthly Distribution of Values')
-        plt.xlabel('Month')
-        plt.ylabel(self.value_column)
-        
-        # Add month names to x-axis
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-        plt.xticks(range(12), month_names)
-        
-        plt.tight_layout()
-        plt.savefig('plots/monthly_boxplot.png')
-        plt.close()
-        
-        # Remove the month column after plotting
-        self.data = self.data.drop('month', axis=1)
-
+        render_plot('monthly_boxplot', self.plot_payload('monthly_boxplot'))
+    
+    @traced
+    def plot_raw_data(self) -> None:
+        """Plot raw data with summary lines."""
+        render_plot('raw_data', self.plot_payload('raw_data'))
+    
+    @traced
+    def plot_moving_averages(self) -> None:
+        """Plot raw data with moving averages."""
+        render_plot('moving_averages', self.plot_payload('moving_averages'))
+    
+    @traced
     def plot_forecast(self) -> None:
         """Plot the forecast results."""
         if self.forecast_results is None:
             raise ValueError("No forecast results available")
-            
-        # Plot forecast
-        plt.figure(figsize=(15, 7))
-        plt.plot(self.data[self.date_column], self.data[self.value_column], label='Actual', color='blue', alpha=0.5)
-        plt.plot(self.forecast_results['ds'], self.forecast_results['yhat'], label='Forecast', color='red')
-        plt.fill_between(self.forecast_results['ds'], 
-                        self.forecast_results['yhat_lower'], 
-                        self.forecast_results['yhat_upper'], 
-                        color='red', alpha=0.2, label='Confidence Interval')
-        plt.title('Time Series with Forecast')
-        plt.xlabel('Date')
-        plt.ylabel(self.value_column)
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('plots/forecast.png')
-        plt.close()
-        
-        # Plot trend
-        plt.figure(figsize=(15, 7))
-        plt.plot(self.forecast_results['ds'], self.forecast_results['trend'], label='Trend', color='green')
-        plt.title('Trend Component')
-        plt.xlabel('Date')
-        plt.ylabel(self.value_column)
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('plots/trend.png')
-        plt.close()
-        
-        # Plot yearly seasonality
-        plt.figure(figsize=(15, 7))
-        plt.plot(self.forecast_results['ds'], self.forecast_results['yearly'], label='Yearly Seasonality', color='blue')
-        plt.title('Yearly Seasonality Component')
-        plt.xlabel('Date')
-        plt.ylabel(self.value_column)
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('plots/seasonality.png')
-        plt.close() 
\ No newline at end of file
+        for name in FORECAST_PLOTS:
+            render_plot(name, self.plot_payload(name))
+    
+    @traced
+    def plot_interactive(self, file_path: str = 'plots/report.html',
+                         plots: Optional[list] = None) -> str:
+        """Write zoomable WebGL versions of the plots into one self-contained HTML file."""
+        figures = build_interactive_figures(self, plots)
+        return write_html_report(figures, file_path)
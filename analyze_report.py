@@ -1,73 +1,27 @@
-from langchain_openai import OpenAI
-from langchain.prompts import PromptTemplate
 import os
+import json
+import time
+import pickle
+import asyncio
+import hashlib
 from dotenv import load_dotenv
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from contextlib import nullcontext
+from agents.artifact_cache import ArtifactCache
+from agents.data_io import is_columnar, read_series
+from agents.statistics import compute_statistics
 
-# Load environment variables
-load_dotenv()
+# Cleaned series written by main.py; reopened directly instead of re-parsing the CSV
+CLEANED_DATA_PATH = 'data/cleaned_series.feather'
 
-def get_data_summary():
-    """Get summary of the data and analysis results."""
-    # Read the data
-    data = pd.read_csv('data/example.csv')
-    data['ds'] = pd.to_datetime(data['ds'])
-    data['y'] = pd.to_numeric(data['y'], errors='coerce')  # Convert to numeric, handle errors gracefully
-    
-    # Calculate basic statistics
-    stats = {
-        'total_observations': len(data),
-        'date_range': f"{data['ds'].min().strftime('%Y-%m-%d')} to {data['ds'].max().strftime('%Y-%m-%d')}",
-        'max_value': float(data['y'].max()),
-        'min_value': float(data['y'].min()),
-        'mean_value': float(data['y'].mean()),
-        'median_value': float(data['y'].median()),
-        'mode_value': float(data['y'].mode().iloc[0]),
-        'null_values': int(data['y'].isnull().sum()),
-        'std_value': float(data['y'].std()),
-        'skew_value': float(data['y'].skew()),
-        'kurtosis_value': float(data['y'].kurtosis())
-    }
-    
-    # Calculate outliers
-    Q1 = data['y'].quantile(0.25)
-    Q3 = data['y'].quantile(0.75)
-    IQR = Q3 - Q1
-    outliers = data[(data['y'] < (Q1 - 1.5 * IQR)) | (data['y'] > (Q3 + 1.5 * IQR))]
-    stats['outlier_count'] = len(outliers)
-    stats['outlier_percentage'] = float((len(outliers) / len(data)) * 100)
-    
-    # Calculate monthly statistics
-    data['month'] = data['ds'].dt.month
-    monthly_stats = data.groupby('month')['y'].agg(['mean', 'std', 'count']).round(2).to_dict()
-    
-    # Calculate trend
-    data['year'] = data['ds'].dt.year
-    yearly_stats = data.groupby('year')['y'].mean().round(2).to_dict()
-    
-    # Calculate seasonality
-    data['month'] = data['ds'].dt.month
-    monthly_means = data.groupby('month')['y'].mean().round(2).to_dict()
-    
-    return stats, monthly_stats, yearly_stats, monthly_means
+# LLM responses keyed by a hash of the summary statistics, prompt and model
+REPORT_CACHE_DIR = '.report_cache'
 
-def analyze_report():
-    # Initialize OpenAI with higher max tokens and latest model
-    llm = OpenAI(
-        temperature=0.7,
-        max_tokens=2000,
-        model="gpt-3.5-turbo-instruct"
-    )
-    
-    # Get data summary
-    stats, monthly_stats, yearly_stats, monthly_means = get_data_summary()
-    
-    # Create prompt template
-    prompt_template = PromptTemplate(
-        input_variables=["stats", "monthly_stats", "yearly_stats", "monthly_means"],
-        template="""
+MODEL_NAME = "gpt-3.5-turbo-instruct"
+
+PROMPT_TEMPLATE = """
         You are an expert data analyst. Please analyze the following time series data and provide detailed insights:
 
         Data Summary:
@@ -124,30 +78,259 @@ def analyze_report():
         Use specific numbers from the data to support your analysis.
         Be thorough but concise.
         """
+
+# Load environment variables
+load_dotenv()
+
+def get_data_summary(file_path='data/example.csv', agent=None, artifacts=None):
+    """Get summary of the data and analysis results.
+
+    When an agent is given, its memoized statistics are reused instead of
+    reading and scanning the data again. Otherwise an ArtifactCache reuses
+    the summary of a file whose contents are unchanged.
+    """
+    if agent is None and artifacts is not None:
+        key = ArtifactCache.key('report_summary', ArtifactCache.file_key(file_path))
+        cached = artifacts.read(key, 'summary.pkl')
+        if cached is not None:
+            return pickle.loads(cached)
+        result = get_data_summary(file_path)
+        artifacts.put(key, blobs={'summary.pkl': pickle.dumps(result)})
+        return result
+    if agent is not None:
+        summary = agent.get_statistics()
+    else:
+        # Read the data; columnar files are already typed and skip the text parsing
+        if is_columnar(file_path):
+            data = read_series(file_path, columns=['ds', 'y'])
+        else:
+            data = pd.read_csv(file_path)
+            data['ds'] = pd.to_datetime(data['ds'])
+            data['y'] = pd.to_numeric(data['y'], errors='coerce')  # Convert to numeric, handle errors gracefully
+        summary = compute_statistics(data['y'].to_numpy(), data['ds'].to_numpy())
+    
+    # Basic statistics, all computed in a single pass by the statistics engine
+    stats = {
+        'total_observations': summary['total'],
+        'date_range': f"{summary['date_min'].strftime('%Y-%m-%d')} to {summary['date_max'].strftime('%Y-%m-%d')}",
+        'max_value': summary['max'],
+        'min_value': summary['min'],
+        'mean_value': summary['mean'],
+        'median_value': summary['median'],
+        'mode_value': summary['mode'],
+        'null_values': summary['nulls'],
+        'std_value': summary['std'],
+        'skew_value': summary['skew'],
+        'kurtosis_value': summary['kurtosis']
+    }
+    
+    # Outliers
+    stats['outlier_count'] = summary['outlier_count']
+    stats['outlier_percentage'] = float((summary['outlier_count'] / summary['total']) * 100)
+    
+    # Monthly statistics
+    monthly_stats = {
+        name: {month: round(value, 2) for month, value in values.items()}
+        for name, values in summary['monthly'].items()
+    }
+    
+    # Trend
+    yearly_stats = {year: round(value, 2) for year, value in summary['yearly'].items()}
+    
+    # Seasonality
+    monthly_means = monthly_stats['mean']
+    
+    return stats, monthly_stats, yearly_stats, monthly_means
+
+def get_llm():
+    """Return a new OpenAI client.
+
+    Its async HTTP session binds to the event loop it first runs on, so each
+    ``agenerate_reports`` run creates its own client instead of sharing one.
+    """
+    from langchain_openai import OpenAI
+
+    # Initialize OpenAI with higher max tokens and latest model
+    return OpenAI(
+        temperature=0.7,
+        max_tokens=2000,
+        model=MODEL_NAME
     )
+
+def build_prompt(summary):
+    """Fill the analysis prompt from a ``get_data_summary`` result."""
+    stats, monthly_stats, yearly_stats, monthly_means = summary
+    return PROMPT_TEMPLATE.format(stats=stats, monthly_stats=monthly_stats,
+                                  yearly_stats=yearly_stats, monthly_means=monthly_means)
+
+def _model_id(llm):
+    return getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or type(llm).__name__
+
+def _text(response):
+    # Chat models return a message, completion models a string
+    return getattr(response, 'content', response)
+
+class StubLLM:
+    """Offline stand-in for the OpenAI client, for tests and dry runs.
+
+    Returns ``response`` (or a short canned analysis echoing the prompt's
+    summary) after ``delay`` seconds. The first ``failures`` calls raise, to
+    exercise retries.
+    """
+
+    def __init__(self, response=None, delay=0.0, failures=0):
+        self.response = response
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+
+    def _respond(self, prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("Stub LLM failure")
+        if self.response is not None:
+            return self.response
+        summary = prompt.split('Data Summary:')[-1].split('Monthly Statistics:')[0]
+        return f"# Offline analysis\n\nGenerated by StubLLM from:\n{summary.strip()}\n"
+
+    def invoke(self, prompt):
+        time.sleep(self.delay)
+        return self._respond(prompt)
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.delay)
+        return self._respond(prompt)
+
+class ReportCache:
+    """On-disk cache of generated analyses.
+
+    Entries are keyed by a hash of the summary statistics, the prompt template
+    and the model, so a report for unchanged data never queries the LLM again.
+    """
+
+    def __init__(self, cache_dir=REPORT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(summary, model):
+        payload = json.dumps({'summary': summary, 'template': PROMPT_TEMPLATE, 'model': model},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.md')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, analysis):
+        # Write then rename so concurrent runs never read a partial report
+        tmp_path = f'{self._path(key)}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(analysis)
+        os.replace(tmp_path, self._path(key))
+
+async def _ainvoke(llm, prompt):
+    if hasattr(llm, 'ainvoke'):
+        return await llm.ainvoke(prompt)
+    # Blocking clients run in the default thread pool
+    return await asyncio.get_running_loop().run_in_executor(None, llm.invoke, prompt)
+
+async def agenerate_reports(summaries, llm=None, cache=None, max_concurrency=4, retries=3, backoff=1.0):
+    """Generate the analyses of many series concurrently.
+
+    ``summaries`` maps a series id to its ``get_data_summary`` result. At most
+    ``max_concurrency`` LLM calls are in flight; a failing call is retried
+    ``retries`` times with exponential backoff starting at ``backoff``
+    seconds. Cached analyses are returned without querying the LLM. ``llm``
+    defaults to a new client for this run. Returns ``(analyses, errors)``,
+    both keyed by series id.
+    """
+    llm = llm or get_llm()
+    model = _model_id(llm)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def generate(series_id, summary):
+        key = ReportCache.key(summary, model)
+        if cache is not None:
+            analysis = cache.get(key)
+            if analysis is not None:
+                return series_id, analysis, None
+        prompt = build_prompt(summary)
+        for attempt in range(retries + 1):
+            try:
+                async with semaphore:
+                    analysis = _text(await _ainvoke(llm, prompt))
+                break
+            except Exception as e:
+                if attempt == retries:
+                    return series_id, None, f"{type(e).__name__}: {str(e)}"
+                await asyncio.sleep(backoff * 2 ** attempt)
+        if cache is not None:
+            cache.put(key, analysis)
+        return series_id, analysis, None
+
+    results = await asyncio.gather(*(generate(series_id, summary) for series_id, summary in summaries.items()))
+    analyses = {series_id: analysis for series_id, analysis, error in results if error is None}
+    errors = {series_id: error for series_id, _, error in results if error is not None}
+    return analyses, errors
+
+def generate_reports(summaries, llm=None, cache=None, max_concurrency=4, retries=3, backoff=1.0):
+    """Blocking wrapper around ``agenerate_reports``."""
+    return asyncio.run(agenerate_reports(summaries, llm=llm, cache=cache, max_concurrency=max_concurrency,
+                                         retries=retries, backoff=backoff))
+
+def analyze_report(file_path='data/example.csv', agent=None, llm=None, cache=None, artifacts=None):
+    """Generate the analysis of one series; ``llm`` defaults to a new OpenAI client.
+
+    With a ReportCache, an unchanged summary reuses the cached analysis; with
+    an ArtifactCache, an unchanged file reuses its summary.
+    """
+    llm = llm or get_llm()
+    
+    # Time the summary and the LLM call separately when the agent is traced
+    tracer = getattr(agent, 'tracer', None)
+    
+    # Get data summary
+    with tracer.span('get_data_summary', category='report') if tracer else nullcontext():
+        summary = get_data_summary(file_path, agent, artifacts)
+    
+    key = ReportCache.key(summary, _model_id(llm))
+    if cache is not None:
+        analysis = cache.get(key)
+        if analysis is not None:
+            return analysis
     
     # Generate analysis
-    prompt = prompt_template.format(stats=stats, monthly_stats=monthly_stats, 
-                                  yearly_stats=yearly_stats, monthly_means=monthly_means)
+    prompt = build_prompt(summary)
     
     try:
-        analysis = llm.invoke(prompt)
-        return analysis
+        with tracer.span('llm_invoke', category='report') if tracer else nullcontext():
+            analysis = _text(llm.invoke(prompt))
     except Exception as e:
         print(f"Error generating analysis: {str(e)}")
         return None
+    if cache is not None:
+        cache.put(key, analysis)
+    return analysis
 
-def save_analysis(analysis):
+def save_analysis(analysis, file_path='time_series_analysis_insights.md'):
     if analysis is not None:
-        with open('time_series_analysis_insights.md', 'w', encoding='utf-8') as f:
+        with open(file_path, 'w', encoding='utf-8') as f:
             f.write(analysis)
-        print("Analysis has been saved to 'time_series_analysis_insights.md'")
+        print(f"Analysis has been saved to '{file_path}'")
     else:
         print("No analysis to save.")
 
 def main():
-    # Generate analysis
-    analysis = analyze_report()
+    # Generate analysis, preferring the cleaned series saved by main.py
+    file_path = CLEANED_DATA_PATH if os.path.exists(CLEANED_DATA_PATH) else 'data/example.csv'
+    analysis = analyze_report(file_path, cache=ReportCache(), artifacts=ArtifactCache())
     
     # Save analysis
     save_analysis(analysis)
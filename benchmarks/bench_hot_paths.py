@@ -0,0 +1,227 @@
+"""Benchmarks of the agent's hot paths on synthetic series.
+
+For every size a synthetic CSV is generated (see ``synthetic.py``) and each
+case is timed ``--repeat`` times: loading, format correction, statistics,
+outlier and anomaly detection, every plot, Prophet fit/predict and the report's data
+summary. Best and median wall time, CPU time, peak RSS and throughput are
+reported. With ``--baseline`` the best times are compared against a saved
+result file and the run fails when a case is slower than the tolerance.
+
+    python benchmarks/bench_hot_paths.py --rows 1e3 1e4 1e5 --json bench.json
+    python benchmarks/bench_hot_paths.py --rows 1e6 --cases load_data correct_formats --baseline bench.json
+    python benchmarks/bench_hot_paths.py --rows 1e8 --cases load_data_chunked --data-dir /data/bench
+"""
+import os
+import sys
+import json
+import shutil
+import platform
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import write_csv  # noqa: E402
+from agents.instrumentation import Tracer  # noqa: E402
+from agents.rendering import DATA_PLOTS, FORECAST_PLOTS  # noqa: E402
+from agents.time_series_agent import TimeSeriesAgent  # noqa: E402
+
+CASES = (['load_data', 'load_data_chunked', 'correct_formats', 'get_basic_stats', 'detect_outliers',
+          'anomalies_rolling_mad', 'anomalies_seasonal']
+         + [f'plot_{name}' for name in DATA_PLOTS]
+         + ['prophet_fit', 'prophet_predict']
+         + [f'plot_{name}' for name in FORECAST_PLOTS]
+         + ['get_data_summary'])
+
+
+def measure(case: str, rows: int, repeat: int, run, setup=None) -> dict:
+    """Time ``run`` ``repeat`` times, calling ``setup`` untimed before each run."""
+    tracer = Tracer()
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with tracer.span(case, category='benchmark', rows=rows):
+            run()
+    walls = sorted(record['wall_seconds'] for record in tracer.spans)
+    return {
+        'case': case,
+        'rows': rows,
+        'repeat': repeat,
+        'best_seconds': walls[0],
+        'median_seconds': walls[len(walls) // 2],
+        'cpu_seconds': min(record['cpu_seconds'] for record in tracer.spans),
+        'peak_rss_bytes': max(record['peak_rss_bytes'] or 0 for record in tracer.spans) or None,
+        'rows_per_second': rows / walls[0] if walls[0] > 0 else None,
+    }
+
+
+def _raw_agent(file_path: str) -> TimeSeriesAgent:
+    agent = TimeSeriesAgent()
+    agent.load_data(file_path)
+    agent.select_columns('ds', 'y')
+    return agent
+
+
+def run_size(rows: int, args, work_dir: str) -> list:
+    """Run the selected cases on one synthetic series of ``rows`` rows."""
+    cases = args.cases or CASES
+    name = f'synthetic_{rows}_g{args.gaps}_n{args.nulls}_o{args.outliers}_s{args.seed}.csv'
+    file_path = os.path.join(args.data_dir or work_dir, name)
+    if not os.path.exists(file_path):
+        write_csv(file_path, rows, freq=args.freq, gap_fraction=args.gaps, null_fraction=args.nulls,
+                  outlier_fraction=args.outliers, seed=args.seed)
+    plot_dir = os.path.join(work_dir, 'plots')
+    results = []
+
+    def bench(case, run, setup=None, repeat=args.repeat):
+        if case not in cases:
+            return
+        try:
+            result = measure(case, rows, repeat, run, setup)
+        except Exception as e:
+            result = {'case': case, 'rows': rows, 'error': f"{type(e).__name__}: {str(e)}"}
+        results.append(result)
+        _print_result(result)
+
+    bench('load_data', lambda: TimeSeriesAgent().load_data(file_path))
+    bench('load_data_chunked', lambda: TimeSeriesAgent().load_data(
+        file_path, chunksize=args.chunksize, date_column='ds', value_column='y'))
+
+    # Every later case needs the parsed series; format correction is timed on a fresh copy
+    agent = _raw_agent(file_path)
+    raw = agent.data
+    if 'correct_formats' in cases:
+        def reset():
+            agent.data = raw.copy()
+        bench('correct_formats', agent.correct_formats, setup=reset)
+    agent.data = raw
+    agent.correct_formats()
+    del raw
+
+    bench('get_basic_stats', agent.get_basic_stats, setup=agent.invalidate_statistics)
+    bench('detect_outliers', agent.detect_outliers, setup=agent.invalidate_statistics)
+    bench('anomalies_rolling_mad', lambda: agent.detect_anomalies('rolling_mad'))
+    bench('anomalies_seasonal', lambda: agent.detect_anomalies('seasonal'))
+
+    agent.data = agent.data.dropna()
+    for plot in DATA_PLOTS:
+        bench(f'plot_{plot}', lambda plot=plot: agent.render_plots(plots=[plot], plot_dir=plot_dir))
+
+    forecast_cases = ['prophet_fit', 'prophet_predict'] + [f'plot_{plot}' for plot in FORECAST_PLOTS]
+    if any(case in cases for case in forecast_cases):
+        # Prophet cost grows quickly with history, so it is fitted on the most recent rows
+        history = agent.data
+        agent.data = history.tail(args.fit_rows)
+        agent.set_forecast_periods(args.periods)
+
+        def fit():
+            agent.train_prophet_model(profile=args.prophet_profile)
+
+        bench('prophet_fit', fit, repeat=args.prophet_repeat)
+        try:
+            if agent.forecaster is None:
+                fit()
+            bench('prophet_predict', agent.make_forecast, repeat=args.prophet_repeat)
+            if agent.forecast_results is None:
+                agent.make_forecast()
+        except Exception as e:
+            # Without a forecast the remaining forecast cases cannot run
+            for case in forecast_cases[1:]:
+                if case in cases and not any(r['case'] == case for r in results):
+                    results.append({'case': case, 'rows': rows, 'error': f"skipped: {type(e).__name__}: {str(e)}"})
+                    _print_result(results[-1])
+        else:
+            for plot in FORECAST_PLOTS:
+                bench(f'plot_{plot}', lambda plot=plot: agent.render_plots(plots=[plot], plot_dir=plot_dir))
+        agent.data = history
+
+    if 'get_data_summary' in cases:
+        try:
+            # analyze_report needs the LLM dependencies installed, even for the summary alone
+            from analyze_report import get_data_summary
+        except ImportError as e:
+            results.append({'case': 'get_data_summary', 'rows': rows, 'error': f"skipped: {str(e)}"})
+            _print_result(results[-1])
+        else:
+            bench('get_data_summary', lambda: get_data_summary(agent=agent), setup=agent.invalidate_statistics)
+    return results
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> int:
+    """Annotate results with their baseline ratio; returns the number of regressions."""
+    previous = {(r['case'], r['rows']): r['best_seconds'] for r in baseline['results'] if 'best_seconds' in r}
+    regressions = 0
+    for result in results:
+        best = previous.get((result['case'], result['rows']))
+        if best is None or 'best_seconds' not in result or best <= 0:
+            continue
+        result['baseline_seconds'] = best
+        result['ratio'] = result['best_seconds'] / best
+        result['regression'] = result['ratio'] > 1 + tolerance
+        regressions += result['regression']
+        if result['regression']:
+            print(f"REGRESSION {result['case']} ({result['rows']} rows): "
+                  f"{best * 1000:.1f} ms -> {result['best_seconds'] * 1000:.1f} ms ({result['ratio']:.2f}x)")
+    return regressions
+
+
+def _print_result(result: dict) -> None:
+    if 'error' in result:
+        print(f"{result['case']:>24} {result['rows']:>11}  {result['error']}")
+        return
+    throughput = f"{result['rows_per_second']:,.0f} rows/s" if result['rows_per_second'] else ''
+    print(f"{result['case']:>24} {result['rows']:>11}  best {result['best_seconds'] * 1000:10.1f} ms  "
+          f"median {result['median_seconds'] * 1000:10.1f} ms  {throughput}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the agent's hot paths on synthetic series.")
+    parser.add_argument('--rows', nargs='+', type=float, default=[1e3, 1e4, 1e5],
+                        help="Series sizes, e.g. 1e3 1e6 1e8")
+    parser.add_argument('--cases', nargs='+', choices=CASES, help="Only run these cases")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case (best and median are reported)")
+    parser.add_argument('--freq', help="Fixed frequency of the synthetic series (default depends on size)")
+    parser.add_argument('--gaps', type=float, default=0.0, help="Probability of a missing timestamp per step")
+    parser.add_argument('--nulls', type=float, default=0.01, help="Fraction of null values")
+    parser.add_argument('--outliers', type=float, default=0.005, help="Fraction of outliers")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help="Rows per chunk for load_data_chunked")
+    parser.add_argument('--fit-rows', dest='fit_rows', type=int, default=5000,
+                        help="Most recent rows Prophet is fitted on")
+    parser.add_argument('--periods', type=int, default=30, help="Forecast periods for prophet_predict")
+    parser.add_argument('--prophet-profile', dest='prophet_profile', default='default')
+    parser.add_argument('--prophet-repeat', dest='prophet_repeat', type=int, default=1)
+    parser.add_argument('--data-dir', dest='data_dir',
+                        help="Keep generated CSV files here and reuse them in later runs")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against a result file written with --json")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed slowdown against the baseline before failing (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix='bench_')
+    try:
+        results = []
+        for rows in args.rows:
+            results += run_size(int(rows), args, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    regressions = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    if args.json:
+        meta = {'python': platform.python_version(), 'platform': platform.platform(),
+                'processor': platform.processor(), 'cpus': os.cpu_count()}
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
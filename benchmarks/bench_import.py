@@ -0,0 +1,83 @@
+"""Import-time benchmark for the agent modules.
+
+Each measurement imports the target module in a fresh interpreter, so the
+timings reflect a cold start. The run fails when the best time exceeds
+``--max-seconds`` or when any heavy dependency is loaded at import time.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --module main --repeat 10 --json import_time.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that must only load when a code path actually needs them
+HEAVY_MODULES = ['pandas', 'numpy', 'matplotlib', 'seaborn', 'prophet', 'cmdstanpy',
+                 'plotly', 'pyarrow', 'langchain', 'langchain_openai']
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed,
+                  'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """Import ``module`` once in a fresh interpreter and report time and loaded heavy modules."""
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(module: str, repeat: int) -> dict:
+    runs = [measure(module) for _ in range(repeat)]
+    times = sorted(r['seconds'] for r in runs)
+    return {
+        'module': module,
+        'repeat': repeat,
+        'best_seconds': times[0],
+        'median_seconds': times[len(times) // 2],
+        'heavy_modules_loaded': sorted({m for r in runs for m in r['loaded']}),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the agent modules.")
+    parser.add_argument('--module', action='append',
+                        help="Module to import (repeatable, default: agents.time_series_agent and main)")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per module (best is reported)")
+    parser.add_argument('--max-seconds', type=float, default=0.25, help="Fail when the best import time is above this")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    modules = args.module or ['agents.time_series_agent', 'main']
+    results = [run(module, args.repeat) for module in modules]
+    failed = False
+    for result in results:
+        over_budget = result['best_seconds'] > args.max_seconds
+        failed |= over_budget or bool(result['heavy_modules_loaded'])
+        print(f"{result['module']}: best {result['best_seconds'] * 1000:.1f} ms, "
+              f"median {result['median_seconds'] * 1000:.1f} ms"
+              + (" (over budget)" if over_budget else ""))
+        if result['heavy_modules_loaded']:
+            print(f"  heavy modules loaded at import: {', '.join(result['heavy_modules_loaded'])}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'max_seconds': args.max_seconds, 'results': results}, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Synthetic time series for benchmarks.
+
+Series are generated chunk by chunk, so even 1e8-row CSV files are written
+with bounded memory. Every series is a level plus a linear trend, sine
+seasonalities and Gaussian noise, with optional gaps (missing timestamps),
+nulls and outliers:
+
+    from synthetic import make_series, write_csv
+    frame = make_series(10_000, null_fraction=0.01, outlier_fraction=0.005)
+    write_csv('data/synthetic.csv', 10**7, freq='min', gap_fraction=0.05)
+"""
+import os
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Default seasonalities as (period in days, amplitude): weekly and yearly
+SEASONALITY = ((7.0, 2.0), (365.25, 5.0))
+# Timestamps must stay within pandas' datetime64[ns] range (years 1677-2262)
+_MAX_SPAN_DAYS = 250 * 365
+_DAY_NS = 24 * 3600 * 10**9
+
+
+def default_frequency(n_rows: int) -> str:
+    """Daily data where it fits into the datetime range, else hourly or minutely."""
+    for freq, per_day in (('D', 1), ('h', 24), ('min', 24 * 60)):
+        if n_rows / per_day <= _MAX_SPAN_DAYS:
+            return freq
+    return 's'
+
+
+def generate_chunks(n_rows: int, freq: Optional[str] = None, start: str = '2000-01-01',
+                    seasonality: Sequence[Tuple[float, float]] = SEASONALITY, level: float = 100.0,
+                    trend: float = 0.01, noise: float = 1.0, gap_fraction: float = 0.0,
+                    null_fraction: float = 0.0, outlier_fraction: float = 0.0, outlier_scale: float = 10.0,
+                    chunk_rows: int = 1_000_000, seed: int = 0) -> Iterator[pd.DataFrame]:
+    """Yield ``ds/y`` frames that together hold ``n_rows`` observations.
+
+    ``freq`` is a fixed pandas frequency ('D', 'h', '15min', ...), chosen by
+    ``default_frequency`` when omitted. ``trend`` is per day and seasonal
+    periods are in days, so the shape does not depend on the frequency.
+    With ``gap_fraction`` each step skips further timestamps with that
+    probability; ``null_fraction`` of the values are NaN and
+    ``outlier_fraction`` are shifted by ``outlier_scale`` noise deviations.
+    """
+    rng = np.random.default_rng(seed)
+    step_ns = pd.Timedelta(pd.tseries.frequencies.to_offset(freq or default_frequency(n_rows))).value
+    origin = pd.Timestamp(start).value
+    position = 0
+    for offset in range(0, n_rows, chunk_rows):
+        size = min(chunk_rows, n_rows - offset)
+        steps = rng.geometric(1 - gap_fraction, size) if gap_fraction > 0 else np.ones(size, dtype='int64')
+        positions = position + np.cumsum(steps)
+        position = positions[-1]
+        days = positions * (step_ns / _DAY_NS)
+        y = level + trend * days + noise * rng.standard_normal(size)
+        for period, amplitude in seasonality:
+            y += amplitude * np.sin(2 * np.pi * days / period)
+        if outlier_fraction > 0:
+            outliers = rng.random(size) < outlier_fraction
+            y[outliers] += outlier_scale * noise * rng.choice([-1.0, 1.0], outliers.sum())
+        if null_fraction > 0:
+            y[rng.random(size) < null_fraction] = np.nan
+        ds = (origin + positions * step_ns).astype('datetime64[ns]')
+        yield pd.DataFrame({'ds': ds, 'y': y})
+
+
+def make_series(n_rows: int, **kwargs) -> pd.DataFrame:
+    """Generate a whole synthetic series in memory, see ``generate_chunks``."""
+    return pd.concat(generate_chunks(n_rows, **kwargs), ignore_index=True)
+
+
+def write_csv(file_path: str, n_rows: int, **kwargs) -> str:
+    """Write a synthetic series to CSV chunk by chunk, see ``generate_chunks``.
+
+    Dates are written as text like ``data/example.csv`` (day resolution for
+    daily data, with the time of day otherwise) and nulls as empty cells.
+    """
+    freq = kwargs.get('freq') or default_frequency(n_rows)
+    date_format = '%Y-%m-%d' if freq == 'D' else '%Y-%m-%d %H:%M:%S'
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for i, chunk in enumerate(generate_chunks(n_rows, **{**kwargs, 'freq': freq})):
+            chunk.to_csv(f, header=i == 0, index=False, date_format=date_format, float_format='%.6f')
+    os.replace(tmp_path, file_path)
+    return file_path
@@ -1,5 +1,14 @@
 import os
-from agents.time_series_agent import TimeSeriesAgent
+import sys
+import json
+import argparse
+from agents.time_series_agent import TimeSeriesAgent, NULL_STRATEGIES, VALUE_DTYPES
+from agents.model_cache import ModelCache
+from agents.data_io import write_series
+from agents.rendering import FORECAST_PLOTS, PlotRenderer
+from agents.resampling import DUPLICATE_AGGREGATIONS
+from agents.forecasters import FORECASTERS, PROPHET_PROFILES
+from agents.pipeline import STAGES, load_config, merge_config, run_pipeline
 
 def main():
     try:
@@ -39,7 +48,7 @@ def main():
         
         # Check if formats are appropriate
         date_is_appropriate = date_type == 'datetime64[ns]'
-        value_is_appropriate = value_type in ['float64', 'int64']
+        value_is_appropriate = value_type in ['float64', 'float32', 'int64']
         
         if not (date_is_appropriate and value_is_appropriate):
             print("\nThe data formats are not appropriate for time series analysis.")
@@ -50,7 +59,8 @@ def main():
                 choice = input("\nWould you like to correct the formats? (yes/no): ")
                 if choice.lower() == 'yes':
                     try:
-                        agent.correct_formats()
+                        report = agent.correct_formats()
+                        print(f"\nRows that failed to parse: {report['date_failures']} dates, {report['value_failures']} values")
                         # Check and print new formats
                         new_date_type, new_value_type = agent.check_formats()
                         print("\nNew data formats:")
@@ -69,7 +79,8 @@ def main():
                             return
                         elif exit_choice.lower() == 'change':
                             try:
-                                agent.correct_formats()
+                                report = agent.correct_formats()
+                                print(f"\nRows that failed to parse: {report['date_failures']} dates, {report['value_failures']} values")
                                 new_date_type, new_value_type = agent.check_formats()
                                 print("\nNew data formats:")
                                 print(f"Date column format: {new_date_type}")
@@ -132,51 +143,64 @@ def main():
             print(f"\nError detecting outliers: {str(e)}")
             return
         
-        # Plot visualizations
+        # Plot visualizations in the background while forecasting continues
         print("\nGenerating plots...")
+        renderer = PlotRenderer()
         try:
-            agent.plot_boxplot()
-            agent.plot_distribution()
-            agent.plot_monthly_boxplot()
-            agent.plot_raw_data()
-            agent.plot_moving_averages()
-        except Exception as e:
-            print(f"\nError generating plots: {str(e)}")
-            return
+            try:
+                agent.render_plots(renderer=renderer)
+            except Exception as e:
+                print(f"\nError generating plots: {str(e)}")
+                return
         
-        # Set forecast periods
-        try:
-            periods = int(input("\nEnter the number of periods to forecast: "))
-            agent.set_forecast_periods(periods)
-        except ValueError as e:
-            print(f"\nError setting forecast periods: {str(e)}")
-            return
+            # Set forecast periods
+            try:
+                periods = int(input("\nEnter the number of periods to forecast: "))
+                agent.set_forecast_periods(periods)
+            except ValueError as e:
+                print(f"\nError setting forecast periods: {str(e)}")
+                return
         
-        # Prepare data for Prophet
-        try:
-            prophet_data = agent.prepare_prophet_data()
-        except Exception as e:
-            print(f"\nError preparing Prophet data: {str(e)}")
-            return
+            # Prepare data for Prophet
+            try:
+                prophet_data = agent.prepare_prophet_data()
+            except Exception as e:
+                print(f"\nError preparing Prophet data: {str(e)}")
+                return
         
-        # Train Prophet model and make predictions
-        try:
-            agent.train_prophet_model()
-            forecast = agent.make_forecast()
-        except Exception as e:
-            print(f"\nError training model and making predictions: {str(e)}")
-            return
+            # Train Prophet model and make predictions
+            try:
+                agent.train_prophet_model(cache=ModelCache())
+                if agent.cache_status == 'hit':
+                    print("\nData unchanged since last run, reusing the cached model.")
+                elif agent.cache_status == 'warm':
+                    print("\nNew rows detected, refitted from the cached model.")
+                forecast = agent.make_forecast()
+                print(f"\nFit: {agent.forecast_timings['fit']:.2f}s, predict: {agent.forecast_timings['predict']:.2f}s")
+            except Exception as e:
+                print(f"\nError training model and making predictions: {str(e)}")
+                return
         
-        # Display forecast table
-        print("\nForecast Results:")
-        print(forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail())
+            # Save the cleaned history and forecast so later runs and the report reopen them directly
+            try:
+                write_series(prophet_data, 'data/cleaned_series.feather')
+                agent.save_forecast('data/forecast_results.feather')
+            except Exception as e:
+                print(f"\nWarning: could not save cleaned data and forecast: {str(e)}")
         
-        # Plot forecast
-        try:
-            agent.plot_forecast()
-        except Exception as e:
-            print(f"\nError plotting forecast: {str(e)}")
-            return
+            # Display forecast table
+            print("\nForecast Results:")
+            print(forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail())
+        
+            # Plot forecast and wait for all plots to be written
+            try:
+                agent.render_plots(plots=FORECAST_PLOTS, renderer=renderer)
+                renderer.wait()
+            except Exception as e:
+                print(f"\nError plotting forecast: {str(e)}")
+                return
+        finally:
+            renderer.shutdown()
         
         print("\nForecasting complete!")
         
@@ -184,5 +208,80 @@ def main():
         print(f"\nUnexpected error: {str(e)}")
         print("Please check your data format and try again.")
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Run the time series pipeline unattended. Without arguments the interactive mode starts.")
+    parser.add_argument('inputs', nargs='*', help="Input files (CSV, Parquet, Feather/Arrow or .npy)")
+    parser.add_argument('--config', help="JSON or YAML config file; command line flags override it")
+    parser.add_argument('--date-column', dest='date_column')
+    parser.add_argument('--value-column', dest='value_column')
+    parser.add_argument('--date-format', dest='date_format', help="strftime format, detected if omitted")
+    parser.add_argument('--chunksize', type=int, help="Stream CSV inputs in chunks of this many rows")
+    parser.add_argument('--null-strategy', dest='null_strategy',
+                        choices=NULL_STRATEGIES + ['keep'])
+    parser.add_argument('--frequency', help="Resample onto this regular frequency ('D', 'h', 'MS', ... or 'auto')")
+    parser.add_argument('--duplicate-agg', dest='duplicate_agg', choices=DUPLICATE_AGGREGATIONS,
+                        help="How rows sharing a timestamp are combined when resampling")
+    parser.add_argument('--periods', type=int, help="Number of periods to forecast")
+    parser.add_argument('--forecaster', choices=FORECASTERS,
+                        help="Forecasting model; 'fourier' and 'seasonal_naive' are fast NumPy baselines")
+    parser.add_argument('--prophet-profile', dest='prophet_profile', choices=list(PROPHET_PROFILES),
+                        help="Prophet speed settings; 'fast' fits a smaller model and simulates fewer intervals")
+    parser.add_argument('--backtest-horizon', dest='backtest_horizon', type=int,
+                        help="Periods scored after each backtest cutoff (defaults to --periods)")
+    parser.add_argument('--output-dir', dest='output_dir')
+    parser.add_argument('--model-cache', dest='model_cache', help="Model cache directory ('' disables it)")
+    parser.add_argument('--only-plots', dest='plots', nargs='+', help="Only render these plots")
+    parser.add_argument('--skip-plots', dest='skip_plots', nargs='+', help="Do not render these plots")
+    parser.add_argument('--workers', dest='max_workers', type=int, help="Inputs processed in parallel")
+    parser.add_argument('--report-concurrency', dest='report_concurrency', type=int,
+                        help="LLM report requests in flight at once")
+    parser.add_argument('--report-cache', dest='report_cache', help="Report cache directory ('' disables it)")
+    parser.add_argument('--artifact-cache', dest='artifact_cache',
+                        help="Stage output cache directory; unchanged stages are restored on reruns ('' disables it)")
+    parser.add_argument('--artifact-cache-max-mb', dest='artifact_cache_max_mb', type=int,
+                        help="Size bound of the stage output cache")
+    parser.add_argument('--trace', action='store_true', default=None,
+                        help="Write per-stage timings to trace.json and metrics.prom for each input")
+    parser.add_argument('--trace-memory', dest='trace_memory', action='store_true', default=None,
+                        help="Also measure peak Python memory per stage with tracemalloc (slower)")
+    parser.add_argument('--low-memory', dest='low_memory', action='store_true', default=None,
+                        help="Keep the series and forecast compact and avoid copying them")
+    parser.add_argument('--value-dtype', dest='value_dtype', choices=VALUE_DTYPES,
+                        help="Value dtype of the series in low-memory mode")
+    for stage in STAGES:
+        parser.add_argument(f'--{stage}', dest=stage, action='store_true', default=None,
+                            help=f"Run the {stage} stage")
+        parser.add_argument(f'--no-{stage}', dest=stage, action='store_false',
+                            help=f"Skip the {stage} stage")
+    return parser.parse_args(argv)
+
+
+def run_headless(argv):
+    """Run the pipeline from command line flags and/or a config file, without prompts."""
+    args = vars(parse_args(argv))
+    config = load_config(args.pop('config')) if args.get('config') else {}
+    stages = {stage: args.pop(stage) for stage in STAGES if args.get(stage) is not None}
+    for stage in STAGES:
+        args.pop(stage, None)
+    if not args['inputs']:
+        args.pop('inputs')
+    config = merge_config(config, args, {'stages': stages})
+    
+    results = run_pipeline(config)
+    for result in results:
+        if result['status'] == 'ok' and result.get('cached'):
+            print(f"{result['input']}: ok (cached: {', '.join(result['cached'])})")
+        elif result['status'] == 'ok':
+            print(f"{result['input']}: ok")
+        else:
+            print(f"{result['input']}: failed ({result['error']})")
+    summary_path = os.path.join(config['output_dir'], 'pipeline_results.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, default=str)
+    return 0 if all(result['status'] == 'ok' for result in results) else 1
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_headless(sys.argv[1:]))
     main()
@@ -0,0 +1,100 @@
+import asyncio
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+from analyze_report import ReportCache, StubLLM, agenerate_reports, generate_reports, get_data_summary
+
+
+def _summary(tmp_path, name='a', level=10.0):
+    dates = pd.date_range('2022-01-01', periods=400, freq='D')
+    values = level + np.sin(np.arange(400) / 365 * 2 * np.pi) + np.random.default_rng(0).normal(0, 0.1, 400)
+    path = tmp_path / f'{name}.csv'
+    pd.DataFrame({'ds': dates.strftime('%Y-%m-%d'), 'y': values}).to_csv(path, index=False)
+    return get_data_summary(str(path))
+
+
+def test_cache_hits_are_keyed_by_the_summary(tmp_path):
+    cache = ReportCache(str(tmp_path / 'reports'))
+    summaries = {'a': _summary(tmp_path, 'a'), 'b': _summary(tmp_path, 'b', level=20.0)}
+    first = StubLLM()
+    analyses, errors = generate_reports(summaries, llm=first, cache=cache)
+    assert errors == {} and first.calls == 2
+    assert 'Mean Value: 10.' in analyses['a'] and 'Mean Value: 20.' in analyses['b']
+
+    # Same summaries: served from the cache without calling the model
+    second = StubLLM(response='unused')
+    assert generate_reports(summaries, llm=second, cache=cache) == (analyses, {})
+    assert second.calls == 0
+
+    # A changed summary misses, the unchanged one still hits
+    summaries['b'] = _summary(tmp_path, 'b', level=30.0)
+    third = StubLLM(response='fresh')
+    analyses, _ = generate_reports(summaries, llm=third, cache=cache)
+    assert third.calls == 1 and analyses['b'] == 'fresh'
+    assert ReportCache.key(summaries['b'], 'StubLLM') != ReportCache.key(summaries['a'], 'StubLLM')
+
+
+def test_failed_calls_are_retried(tmp_path):
+    llm = StubLLM(response='ok', failures=2)
+    analyses, errors = generate_reports({'a': _summary(tmp_path)}, llm=llm, retries=3, backoff=0)
+    assert analyses == {'a': 'ok'} and errors == {}
+    assert llm.calls == 3
+
+
+def test_exhausted_retries_report_the_error_and_cache_nothing(tmp_path):
+    cache = ReportCache(str(tmp_path / 'reports'))
+    llm = StubLLM(failures=10)
+    analyses, errors = generate_reports({'a': _summary(tmp_path)}, llm=llm, cache=cache, retries=2, backoff=0)
+    assert analyses == {}
+    assert errors == {'a': 'RuntimeError: Stub LLM failure'}
+    assert llm.calls == 3
+    assert list((tmp_path / 'reports').iterdir()) == []
+
+
+class _CountingLLM(StubLLM):
+    """Records the most calls in flight at once."""
+
+    def __init__(self):
+        super().__init__(response='ok', delay=0.01)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def ainvoke(self, prompt):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await super().ainvoke(prompt)
+        finally:
+            self.in_flight -= 1
+
+
+def test_concurrency_stays_within_the_limit(tmp_path):
+    summary = _summary(tmp_path)
+    llm = _CountingLLM()
+    analyses, _ = asyncio.run(agenerate_reports({i: summary for i in range(12)}, llm=llm, max_concurrency=3))
+    assert len(analyses) == 12
+    assert llm.peak == 3
+
+
+def test_each_run_gets_its_own_client(tmp_path, monkeypatch):
+    class LoopBoundClient:
+        """Like an async HTTP client, it only works on the event loop it first ran on."""
+        model_name = 'fake'
+
+        def __init__(self, **options):
+            self.loop = None
+
+        async def ainvoke(self, prompt):
+            loop = asyncio.get_running_loop()
+            if self.loop not in (None, loop):
+                raise RuntimeError('Event loop is closed')
+            self.loop = loop
+            return 'ok'
+
+    monkeypatch.setitem(sys.modules, 'langchain_openai', types.SimpleNamespace(OpenAI=LoopBoundClient))
+    summaries = {'a': _summary(tmp_path)}
+    for _ in range(2):
+        assert generate_reports(summaries, retries=0) == ({'a': 'ok'}, {})
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.anomalies import (_rolling_median, detect_anomalies, detect_anomalies_batch, iqr_scores,
+                              rolling_mad_scores, seasonal_scores)
+
+SPIKES = {100: 40.0, 250: -35.0}
+
+
+def _weekly_series(n=365, seed=0, spikes=SPIKES, gap=(180, 190)):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    truth = 50 + 0.05 * t + 10 * np.sin(2 * np.pi * t / 7)
+    # Bounded noise keeps ordinary points well inside the threshold
+    y = truth + rng.uniform(-1, 1, n)
+    for position, size in spikes.items():
+        y[position] += size
+    if gap is not None:
+        y[gap[0]:gap[1]] = np.nan
+    return pd.DataFrame({'ds': pd.date_range('2021-01-01', periods=n, freq='D'), 'y': y}), truth
+
+
+@pytest.mark.parametrize('method', ['seasonal', 'rolling_mad'])
+def test_spikes_are_flagged_without_their_neighbours(method):
+    data, _ = _weekly_series()
+    flagged = detect_anomalies(data, method, window=15).index
+    assert sorted(flagged) == sorted(SPIKES)
+
+
+def test_seasonal_expected_value_ignores_spikes_and_gaps():
+    data, truth = _weekly_series()
+    expected, _ = seasonal_scores(data['y'].to_numpy(), 7)
+    error = np.abs(expected[:, 0] - truth)
+    for position in SPIKES:
+        assert error[position - 3:position + 4].max() < 1.0
+    # Rows next to the gap keep the trend instead of a window biased by the missing part of the season
+    assert error[175:195].max() < 1.0
+
+
+def test_seasonal_needs_two_seasons():
+    with pytest.raises(ValueError, match='two seasons'):
+        seasonal_scores(np.arange(10.0), 7)
+
+
+@pytest.mark.parametrize('window,min_periods', [(7, 4), (8, 2), (25, 12)])
+def test_rolling_median_matches_pandas(window, min_periods):
+    values = np.random.default_rng(3).normal(size=(200, 3))
+    values[20:35, 0] = np.nan
+    values[::9, 2] = np.nan
+    reference = pd.DataFrame(values).rolling(window, center=True, min_periods=min_periods).median()
+    np.testing.assert_allclose(_rolling_median(values, window, min_periods), reference.to_numpy())
+
+
+def test_rolling_mad_matches_pandas_hampel_filter():
+    values = np.random.default_rng(4).normal(size=300)
+    rolling = pd.Series(values).rolling(25, center=True, min_periods=12)
+    median = rolling.median()
+    expected, score = rolling_mad_scores(values, 25)
+    np.testing.assert_allclose(expected[:, 0], median.to_numpy())
+    # The MAD is taken over each window's own deviations from its median
+    window_mad = np.array([np.median(np.abs(values[max(i - 12, 0):i + 13] - median[i])) for i in range(300)])
+    np.testing.assert_allclose(score[:, 0], (values - median.to_numpy()) / (1.4826 * window_mad))
+
+
+def test_iqr_scores_follow_the_outlier_rule():
+    values = np.random.default_rng(5).standard_t(3, size=500)
+    q1, q3 = np.quantile(values, [0.25, 0.75])
+    iqr = q3 - q1
+    _, score = iqr_scores(values)
+    outside = (values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)
+    np.testing.assert_array_equal(np.abs(score[:, 0]) > 1.5, outside)
+
+
+@pytest.mark.parametrize('method', ['seasonal', 'rolling_mad', 'iqr'])
+def test_batch_matches_one_series_at_a_time(method):
+    frames = []
+    for seed, series_id in enumerate(['a', 'b', 'c']):
+        data, _ = _weekly_series(n=120, seed=seed, spikes={30 + seed: 25.0}, gap=None)
+        frames.append(data.assign(series_id=series_id))
+    long = pd.concat(frames, ignore_index=True)
+
+    batch = detect_anomalies_batch(long, method, season_length=7)
+    for series_id, data in long.groupby('series_id'):
+        single = detect_anomalies(data.reset_index(drop=True), method, season_length=7)
+        rows = batch[batch['series_id'] == series_id]
+        np.testing.assert_array_equal(rows['ds'].to_numpy(), single['ds'].to_numpy())
+        np.testing.assert_allclose(rows['score'].to_numpy(), single['score'].to_numpy())
@@ -0,0 +1,119 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.artifact_cache import ArtifactCache
+from agents.pipeline import run_pipeline
+
+
+def _write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def _entries(cache):
+    return sorted(name for name in os.listdir(cache.cache_dir))
+
+
+def test_put_get_restore_round_trip(tmp_path):
+    cache = ArtifactCache(str(tmp_path / 'cache'))
+    source = _write(tmp_path / 'stats.json', '{"mean": 1.5}')
+    key = ArtifactCache.key('stats', 'upstream')
+    assert cache.get(key) is None and cache.restore(key, str(tmp_path / 'out')) is None
+
+    cache.put(key, files=[source], blobs={'summary.pkl': b'\x00\x01'}, meta={'rows': 3})
+    assert cache.get(key) == {'files': ['stats.json'], 'meta': {'rows': 3}}
+    assert cache.read(key, 'summary.pkl') == b'\x00\x01'
+    restored = cache.restore(key, str(tmp_path / 'out'))
+    assert restored == [str(tmp_path / 'out' / 'stats.json')]
+    assert open(restored[0]).read() == '{"mean": 1.5}'
+
+
+def test_keys_follow_inputs_and_parameters(tmp_path):
+    first = _write(tmp_path / 'a.csv', 'ds,y\n2024-01-01,1\n')
+    same = _write(tmp_path / 'b.csv', 'ds,y\n2024-01-01,1\n')
+    changed = _write(tmp_path / 'c.csv', 'ds,y\n2024-01-01,2\n')
+    # Contents, not paths, identify an input
+    assert ArtifactCache.file_key(first) == ArtifactCache.file_key(same)
+    assert ArtifactCache.file_key(first) != ArtifactCache.file_key(changed)
+
+    root = ArtifactCache.file_key(first)
+    clean = ArtifactCache.key('clean', root, {'frequency': 'D', 'null_strategy': 'drop'})
+    assert clean == ArtifactCache.key('clean', root, {'null_strategy': 'drop', 'frequency': 'D'})
+    assert clean != ArtifactCache.key('clean', root, {'frequency': 'h', 'null_strategy': 'drop'})
+    assert clean != ArtifactCache.key('clean', ArtifactCache.file_key(changed),
+                                      {'frequency': 'D', 'null_strategy': 'drop'})
+    # Downstream keys change with their upstream key
+    assert ArtifactCache.key('stats', clean) != ArtifactCache.key('stats', root)
+
+
+def test_put_is_atomic(tmp_path):
+    cache = ArtifactCache(str(tmp_path / 'cache'))
+    key = ArtifactCache.key('plots')
+    # A file vanishing halfway through leaves neither an entry nor a temporary directory
+    present = _write(tmp_path / 'present.png', 'png')
+    with pytest.raises(OSError):
+        cache.put(key, files=[present, str(tmp_path / 'missing.png')])
+    assert cache.get(key) is None and _entries(cache) == []
+
+    # Another process publishing the key first wins; a second put keeps its entry
+    cache.put(key, blobs={'plot.png': b'first'})
+    cache.put(key, blobs={'plot.png': b'second'})
+    assert cache.read(key, 'plot.png') == b'first'
+    assert _entries(cache) == [key]
+
+
+def test_evict_respects_the_size_bound(tmp_path):
+    cache = ArtifactCache(str(tmp_path / 'cache'), max_bytes=3_500)
+    keys = [ArtifactCache.key('blob', i) for i in range(5)]
+    now = time.time()
+    for age, key in enumerate(keys):
+        cache.put(key, blobs={'data.bin': bytes(1_000)})
+        # Last use times in whole seconds, so coarse clocks still order the entries
+        meta = os.path.join(cache.cache_dir, key, 'meta.json')
+        os.utime(meta, (now - 100 + age, now - 100 + age))
+    assert cache.get(keys[0]) is not None  # reading marks the oldest entry as used
+    cache.evict()
+
+    kept = set(_entries(cache))
+    sizes = sum(os.path.getsize(os.path.join(cache.cache_dir, key, name))
+                for key in kept for name in os.listdir(os.path.join(cache.cache_dir, key)))
+    assert sizes <= 3_500
+    assert kept == {keys[0], keys[3], keys[4]}
+
+
+def test_second_pipeline_run_restores_every_stage(tmp_path):
+    pytest.importorskip('matplotlib')
+    dates = pd.date_range('2022-01-01', periods=200, freq='D')
+    values = 10 + np.sin(np.arange(200) / 7 * 2 * np.pi) + np.random.default_rng(0).normal(0, 0.1, 200)
+    path = tmp_path / 'series.csv'
+    pd.DataFrame({'ds': dates.strftime('%Y-%m-%d'), 'y': values}).to_csv(path, index=False)
+    config = {
+        'output_dir': str(tmp_path / 'output'),
+        'artifact_cache': str(tmp_path / 'cache'),
+        'model_cache': '',
+        'report_cache': '',
+        'forecaster': 'fourier',
+        'periods': 14,
+        'backtest_horizon': 14,
+        'plots': ['raw_data', 'forecast'],
+        'stages': {'stats': True, 'plots': True, 'forecast': True, 'backtest': True, 'report': False},
+    }
+
+    first, = run_pipeline(config, [str(path)])
+    assert first['status'] == 'ok', first['error']
+    assert first['cached'] == []
+    outputs = {name: open(output, 'rb').read() for name, output in first['outputs'].items() if name != 'plots'}
+
+    second, = run_pipeline(config, [str(path)])
+    assert second['status'] == 'ok', second['error']
+    assert second['cached'] == ['clean', 'stats', 'plot:raw_data', 'forecast', 'plot:forecast', 'backtest']
+    assert {name: open(output, 'rb').read() for name, output in second['outputs'].items() if name != 'plots'} \
+        == outputs
+
+    # A new forecast horizon only misses the stages that depend on it
+    third, = run_pipeline(dict(config, periods=7), [str(path)])
+    assert third['cached'] == ['clean', 'stats', 'plot:raw_data', 'backtest']
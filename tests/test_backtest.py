@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.backtest import horizon_metrics, rolling_backtest, rolling_cutoffs
+
+
+def _dates(n, freq='D'):
+    return pd.date_range('2024-01-01', periods=n, freq=freq).to_numpy()
+
+
+def test_cutoffs_step_back_from_the_last_full_horizon():
+    # 100 days up to 2024-04-09: the last cutoff leaves 10 days, earlier ones step
+    # back 5 days while 30 days of history precede them
+    cutoffs = rolling_cutoffs(_dates(100), horizon=10)
+    assert cutoffs[-1] == pd.Timestamp('2024-03-30')
+    assert cutoffs[0] == pd.Timestamp('2024-02-04')
+    assert cutoffs == list(pd.date_range(end='2024-03-30', periods=12, freq='5D'))
+    assert all(cutoff >= pd.Timestamp('2024-01-31') for cutoff in cutoffs)
+
+
+def test_cutoff_step_and_frequency():
+    assert rolling_cutoffs(_dates(100), horizon=10, period=20) == \
+        [pd.Timestamp(day) for day in ['2024-02-19', '2024-03-10', '2024-03-30']]
+    # A horizon of one still steps by one period
+    assert rolling_cutoffs(_dates(10), horizon=1) == list(pd.date_range('2024-01-04', '2024-01-09', freq='D'))
+    hourly = rolling_cutoffs(_dates(48, 'h'), horizon=6, freq='h', initial=24, period=6)
+    assert hourly == list(pd.date_range('2024-01-02 05:00', periods=3, freq='6h'))
+
+
+def test_initial_window_bounds():
+    # Exactly ``initial`` periods before the only cutoff is enough
+    assert rolling_cutoffs(_dates(40), horizon=10, initial=29) == [pd.Timestamp('2024-01-30')]
+    with pytest.raises(ValueError, match='Not enough history'):
+        rolling_cutoffs(_dates(40), horizon=10, initial=30)
+    with pytest.raises(ValueError, match='Not enough history'):
+        rolling_cutoffs(_dates(20), horizon=10)
+
+
+def test_horizon_metrics_reference_values():
+    predictions = pd.DataFrame({
+        'horizon': [1, 1, 2, 2],
+        'y': [10.0, 20.0, 0.0, 4.0],
+        'yhat': [12.0, 18.0, 3.0, 0.0],
+        'yhat_lower': [11.0, 15.0, -1.0, 4.0],
+        'yhat_upper': [13.0, 25.0, 1.0, 5.0],
+    })
+    metrics = horizon_metrics(predictions).set_index('horizon')
+    np.testing.assert_allclose(metrics['mae'], [2.0, 3.5])
+    np.testing.assert_allclose(metrics['rmse'], [2.0, np.sqrt(12.5)])
+    # Zero actuals are skipped by MAPE; interval bounds count as covered
+    np.testing.assert_allclose(metrics['mape'], [0.15, 1.0])
+    np.testing.assert_allclose(metrics['coverage'], [0.5, 1.0])
+    assert metrics['count'].tolist() == [2, 2]
+
+    without_intervals = horizon_metrics(predictions.drop(columns=['yhat_lower', 'yhat_upper']))
+    assert without_intervals['coverage'].isna().all()
+
+
+def test_backtest_scores_every_horizon_of_every_cutoff():
+    n = 70
+    prepared = pd.DataFrame({'ds': _dates(n), 'y': 10 + np.arange(n) % 7})
+    predictions, metrics, errors = rolling_backtest(prepared, horizon=7, forecaster='seasonal_naive')
+    cutoffs = rolling_cutoffs(prepared['ds'].to_numpy(), horizon=7)
+    assert errors.empty
+    assert sorted(predictions['cutoff'].unique()) == cutoffs
+    assert (predictions['ds'] > predictions['cutoff']).all()
+    assert (predictions['ds'] - predictions['cutoff'] == predictions['horizon'] * pd.Timedelta('1D')).all()
+    # A purely weekly series is forecast exactly by the seasonal naive model
+    assert metrics['horizon'].tolist() == list(range(1, 8))
+    assert metrics['count'].tolist() == [len(cutoffs)] * 7
+    np.testing.assert_allclose(metrics['mae'], 0, atol=1e-9)
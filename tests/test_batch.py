@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.anomalies import detect_anomalies_batch
+from agents.batch import forecast_batch, grid_matrix, series_codes
+
+
+def _long_frame(n_series=4, periods=60, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2021-01-01', periods=periods, freq='D')
+    return pd.DataFrame({
+        'series_id': np.repeat([f's{i}' for i in range(n_series)], periods),
+        'ds': np.tile(dates, n_series),
+        'y': rng.normal(20, 2, n_series * periods),
+    })
+
+
+def test_grid_matrix_matches_pivot():
+    data = _long_frame().sample(frac=0.8, random_state=1)
+    codes, uniques = series_codes(data, 'series_id')
+    grid, freq, matrix = grid_matrix(codes, len(uniques), data['ds'], data['y'])
+    expected = data.pivot(index='ds', columns='series_id', values='y').asfreq('D')
+    assert freq == 'D'
+    np.testing.assert_array_equal(grid.view('datetime64[ns]'), expected.index.to_numpy(dtype='datetime64[ns]'))
+    np.testing.assert_array_equal(matrix, expected[list(uniques)].to_numpy())
+
+
+def test_batched_forecast_keeps_series_apart():
+    data = _long_frame()
+    data.loc[data['series_id'] == 's3', 'y'] += 1000
+    forecasts, errors = forecast_batch(data, periods=5, forecaster='fourier')
+    assert errors.empty
+    future = forecasts.groupby('series_id').tail(5)
+    assert (future.loc[future['series_id'] == 's3', 'yhat'] > 900).all()
+    assert (future.loc[future['series_id'] != 's3', 'yhat'] < 100).all()
+
+
+def test_rows_without_series_id_are_rejected():
+    data = _long_frame()
+    data.loc[7, 'series_id'] = np.nan
+    with pytest.raises(ValueError, match="rows have no 'series_id'"):
+        forecast_batch(data, periods=5, forecaster='fourier')
+    with pytest.raises(ValueError, match="rows have no 'series_id'"):
+        detect_anomalies_batch(data, method='iqr')
+    with pytest.raises(ValueError, match='series code'):
+        grid_matrix(np.array([0, -1]), 1, pd.Series(pd.to_datetime(['2021-01-01', '2021-01-02'])),
+                    pd.Series([1.0, 2.0]))
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.data_io import RESAMPLE_AGGREGATIONS, read_csv_chunked, read_series, write_series
+from agents.parsing import parse_dates, parse_numeric
+from agents.time_series_agent import TimeSeriesAgent
+
+
+def _write_mixed_csv(path, n=3_000, freq='D'):
+    """A CSV whose date format changes after the first chunks, with a few bad cells."""
+    dates = pd.date_range('2020-01-01', periods=n, freq=freq)
+    iso = '%Y-%m-%d' if freq == 'D' else '%Y-%m-%d %H:%M:%S'
+    text = np.where(np.arange(n) < n // 2, dates.strftime(iso), dates.strftime(iso.replace('-', '/')))
+    values = np.round(np.random.default_rng(0).normal(100, 10, n), 3).astype(str).astype(object)
+    text[[n // 3 + 1, n * 2 // 3]] = 'not a date'
+    values[[20, n * 5 // 6]] = 'n/a'
+    values[[30, n * 7 // 8]] = 'abc'
+    pd.DataFrame({'ds': text, 'y': values, 'other': 1}).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('chunksize', [100, 1_000, 10_000])
+def test_chunked_load_matches_the_unchunked_path(tmp_path, chunksize):
+    path = _write_mixed_csv(tmp_path / 'series.csv')
+    unchunked = TimeSeriesAgent()
+    unchunked.load_data(path)
+    unchunked.select_columns('ds', 'y')
+    unchunked.correct_formats()
+
+    chunked = TimeSeriesAgent()
+    chunked.load_data(path, chunksize=chunksize, date_column='ds', value_column='y')
+    pd.testing.assert_frame_equal(chunked.data, unchunked.data)
+    # The later format is parsed, only the bad cells fail
+    assert chunked.data['ds'].isna().sum() == 2
+    assert chunked.parse_report == unchunked.parse_report == {'date_failures': 2, 'value_failures': 2}
+
+
+@pytest.mark.parametrize('agg', RESAMPLE_AGGREGATIONS)
+@pytest.mark.parametrize('chunksize', [37, 250])
+def test_chunked_resampling_matches_resampling_everything(tmp_path, agg, chunksize):
+    path = _write_mixed_csv(tmp_path / 'series.csv', n=600, freq='h')
+    raw = pd.read_csv(path, dtype=str)
+    dates, _ = parse_dates(raw['ds'], to_day=False)
+    values, _ = parse_numeric(raw['y'])
+    expected = pd.Series(values).groupby(pd.DatetimeIndex(dates).floor('D')).agg(agg)
+
+    frame, report = read_csv_chunked(path, 'ds', 'y', chunksize=chunksize, resample_rule='D', agg=agg)
+    np.testing.assert_array_equal(frame['ds'].to_numpy(), expected.index.to_numpy(dtype='datetime64[ns]'))
+    np.testing.assert_allclose(frame['y'].to_numpy(), expected.to_numpy(dtype='float64'), rtol=1e-12)
+    assert report == {'date_failures': 2, 'value_failures': 2}
+
+
+def test_chunked_load_reports_failures_through_the_agent(tmp_path):
+    path = _write_mixed_csv(tmp_path / 'series.csv')
+    agent = TimeSeriesAgent()
+    agent.load_data(path, chunksize=250, date_column='ds', value_column='y', resample_rule='7D', agg='sum')
+    assert agent.parse_report == {'date_failures': 2, 'value_failures': 2}
+    assert agent.check_formats() == ('datetime64[ns]', 'float64')
+
+
+def _frame(n=50):
+    values = np.random.default_rng(0).normal(100, 10, n)
+    values[[3, 17]] = np.nan
+    return pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=n, freq='h'),
+                         'y': values.astype('float32'), 'z': values})
+
+
+@pytest.mark.parametrize('name', ['series.parquet', 'series.feather', 'series.arrow', 'series.npy'])
+def test_columnar_round_trips_keep_values_and_dtypes(tmp_path, name):
+    if not name.endswith('.npy'):
+        pytest.importorskip('pyarrow')
+    frame = _frame()
+    path = str(tmp_path / 'nested' / name)
+    write_series(frame, path)
+    reread = read_series(path)
+    pd.testing.assert_frame_equal(reread, frame)
+    assert reread['y'].dtype == 'float32'
+
+    # Projection reads only the requested columns, in the requested order
+    pd.testing.assert_frame_equal(read_series(path, columns=['y', 'ds']), frame[['y', 'ds']])
+    write_series(frame, path, columns=['ds', 'y'])
+    assert list(read_series(path).columns) == ['ds', 'y']
+
+
+def test_npy_files_must_hold_named_fields(tmp_path):
+    write_series(_frame(), str(tmp_path / 'series.npy'))
+    with pytest.raises(ValueError, match='Columns not found'):
+        read_series(str(tmp_path / 'series.npy'), columns=['ds', 'value'])
+    np.save(tmp_path / 'plain.npy', np.arange(5.0))
+    with pytest.raises(ValueError, match='structured array'):
+        read_series(str(tmp_path / 'plain.npy'))
+    with pytest.raises(ValueError, match='Unsupported file format'):
+        write_series(_frame(), str(tmp_path / 'series.xlsx'))
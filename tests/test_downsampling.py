@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.downsampling import decimate, lttb_indices, minmax_indices
+
+
+def _series_with_gaps(n=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = pd.date_range('2020-01-01', periods=n, freq='h').to_numpy()
+    y = np.cumsum(rng.normal(size=n))
+    gaps = [(2_000, 2_500), (6_000, 6_001), (8_000, 9_000)]
+    for start, stop in gaps:
+        y[start:stop] = np.nan
+    return x, y, gaps
+
+
+def _segments(y):
+    """Runs of finite values, as (first, last) row pairs, in the order a line plot draws them."""
+    finite = np.isfinite(y)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], finite.astype(np.int8), [0]))))
+    return list(zip(edges[::2], edges[1::2] - 1))
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_decimated_lines_break_at_every_gap(method):
+    x, y, gaps = _series_with_gaps()
+    keep = decimate(x, y, 400, method)
+    assert np.all(np.diff(keep) > 0)
+    drawn = y[keep]
+    # No segment of the decimated line spans a gap of the original one
+    for first, last in _segments(drawn):
+        assert np.isfinite(y[keep[first]:keep[last] + 1]).all()
+    assert len(_segments(drawn)) == len(gaps) + 1
+    assert np.isfinite(drawn).sum() <= 400
+
+
+def test_minmax_keeps_extremes_of_every_bin():
+    x, y, _ = _series_with_gaps()
+    keep = minmax_indices(x, y, 100)
+    assert np.nanargmax(y) in keep and np.nanargmin(y) in keep
+
+
+def test_gap_rows_are_only_added_between_selected_points():
+    y = np.array([np.nan, 1.0, 2.0, np.nan, np.nan, 3.0, 4.0, np.nan])
+    x = np.arange(len(y))
+    np.testing.assert_array_equal(minmax_indices(x, y, 10), [1, 2, 3, 5, 6])
+    np.testing.assert_array_equal(lttb_indices(x, y, 10), [1, 2, 3, 5, 6])
+
+
+def test_many_small_gaps_at_most_double_the_selection():
+    y = np.random.default_rng(1).normal(size=100_000)
+    y[::7] = np.nan
+    keep = decimate(np.arange(len(y)), y, 1_000, 'lttb')
+    assert np.isfinite(y[keep]).sum() == 1_000
+    assert len(keep) <= 2_000
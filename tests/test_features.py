@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.features import ewm_mean, feature_names, rolling_features
+
+STATISTICS = ['mean', 'std', 'min', 'max', 'ewm', 'quantile']
+
+
+def _reference(values, windows, quantiles):
+    """The same features computed column by column with pandas (std exactly, window by window)."""
+    series = pd.Series(values)
+    columns = {}
+    for stat in STATISTICS:
+        for window in windows:
+            rolling = series.rolling(window)
+            if stat == 'ewm':
+                columns[f'ewm_{window}'] = series.ewm(span=window).mean()
+            elif stat == 'std':
+                columns[f'std_{window}'] = _exact_std(values, window)
+            elif stat == 'quantile':
+                for q in quantiles:
+                    columns[f'q{q * 100:g}_{window}'] = rolling.quantile(q)
+            else:
+                columns[f'{stat}_{window}'] = getattr(rolling, stat)()
+    return pd.DataFrame(columns)
+
+
+def _exact_std(values, window):
+    """Two-pass std of every trailing window; pandas' running update drifts on trending series."""
+    std = np.full(len(values), np.nan)
+    if window > 1:
+        std[window - 1:] = np.std(np.lib.stride_tricks.sliding_window_view(values, window), axis=1, ddof=1)
+    return std
+
+
+def _values(n=2_000, gaps=True, seed=0):
+    rng = np.random.default_rng(seed)
+    # A strong trend with small noise is where a global cumulative sum loses precision
+    values = 1e6 + 50 * np.arange(n) + rng.normal(0, 1, n)
+    if gaps:
+        values[100:104] = np.nan
+        values[::97] = np.nan
+    return values
+
+
+@pytest.mark.parametrize('gaps', [False, True])
+def test_rolling_features_match_pandas(gaps):
+    values = _values(gaps=gaps)
+    windows, quantiles = [1, 3, 10, 64], [0.1, 0.5, 0.9]
+    features = rolling_features(values, windows, STATISTICS, quantiles)
+    reference = _reference(values, windows, quantiles)[features.columns]
+    np.testing.assert_array_equal(features.isna().to_numpy(), reference.isna().to_numpy())
+    pd.testing.assert_frame_equal(features, reference, check_exact=False, rtol=1e-9, atol=1e-9)
+
+
+def test_shift_lags_every_feature():
+    values = _values(200, gaps=False)
+    features = rolling_features(values, [5], ['mean', 'max'], shift=2)
+    reference = pd.DataFrame({'mean_5': pd.Series(values).rolling(5).mean().shift(2),
+                              'max_5': pd.Series(values).rolling(5).max().shift(2)})
+    pd.testing.assert_frame_equal(features, reference)
+
+
+def test_windows_longer_than_the_series_are_all_missing():
+    features = rolling_features(np.arange(5.0), [10], ['mean', 'ewm'])
+    assert features['mean_10'].isna().all()
+    np.testing.assert_allclose(features['ewm_10'], pd.Series(np.arange(5.0)).ewm(span=10).mean())
+
+
+def test_ewm_of_span_one_forward_fills():
+    values = np.array([np.nan, 1.0, np.nan, 3.0, np.nan])
+    np.testing.assert_array_equal(ewm_mean(values, 1, np.empty(5)), [np.nan, 1.0, 1.0, 3.0, 3.0])
+
+
+def test_ewm_on_long_series_stays_accurate():
+    values = _values(50_000)
+    np.testing.assert_allclose(ewm_mean(values, 500, np.empty(len(values))),
+                               pd.Series(values).ewm(span=500).mean(), rtol=1e-10)
+
+
+def test_compact_dtype_and_names():
+    features = rolling_features(_values(100), [4], ['mean', 'quantile'], quantiles=[0.25], dtype='float32')
+    assert list(features.columns) == feature_names([4], ['mean', 'quantile'], [0.25]) == ['mean_4', 'q25_4']
+    assert (features.dtypes == 'float32').all()
+    with pytest.raises(ValueError, match='Invalid statistic'):
+        feature_names([4], ['median'])
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.forecasters import (PROPHET_PROFILES, Forecaster, FourierForecaster, ProphetForecaster, _BatchForecaster,
+                                get_forecaster, prophet_profile)
+
+
+def test_incomplete_forecasters_cannot_be_instantiated():
+    class FitOnly(Forecaster):
+        def fit(self, prepared):
+            return self
+
+    class NoBatchPredict(_BatchForecaster):
+        def fit_batch(self, dates, values):
+            return self
+
+    for cls in (Forecaster, FitOnly, _BatchForecaster, NoBatchPredict):
+        with pytest.raises(TypeError, match='abstract'):
+            cls()
+
+
+def test_batch_forecasters_get_the_single_series_methods():
+    class Constant(_BatchForecaster):
+        name = 'constant'
+
+        def fit_batch(self, dates, values):
+            self.dates, self.level = dates, np.nanmean(values, axis=0)
+            return self
+
+        def predict_batch(self, periods, freq='D'):
+            dates = pd.date_range(self.dates[0], periods=len(self.dates) + periods, freq=freq).to_numpy()
+            return dates, {'yhat': np.tile(self.level, (len(dates), 1))}
+
+    prepared = pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=10, freq='D'), 'y': np.arange(10.0)})
+    model = get_forecaster(Constant())
+    forecast = model.fit(prepared).predict(5)
+    assert list(forecast.columns) == ['ds', 'yhat'] and len(forecast) == 15
+    assert (forecast['yhat'] == 4.5).all()
+    assert isinstance(get_forecaster('fourier'), FourierForecaster)
+
+
+def test_prophet_profiles_split_into_model_and_fit_arguments():
+    assert prophet_profile() == ({}, {})
+    model_kwargs, fit_kwargs = prophet_profile('fast')
+    assert model_kwargs == {'uncertainty_samples': 200, 'n_changepoints': 10, 'daily_seasonality': False}
+    assert fit_kwargs == {'algorithm': 'LBFGS', 'iter': 1000}
+    # Sampling takes no optimizer arguments
+    assert prophet_profile('mcmc') == ({'mcmc_samples': 300}, {})
+    assert prophet_profile('mcmc', iter=50) == ({'mcmc_samples': 300}, {})
+    for name in PROPHET_PROFILES:
+        prophet_profile(name)
+
+
+def test_prophet_profile_overrides_replace_single_settings():
+    model_kwargs, fit_kwargs = prophet_profile('fast', uncertainty_samples=0, stan_backend='CMDSTANPY', iter=200)
+    assert model_kwargs == {'uncertainty_samples': 0, 'n_changepoints': 10, 'daily_seasonality': False,
+                            'stan_backend': 'CMDSTANPY'}
+    assert fit_kwargs == {'algorithm': 'LBFGS', 'iter': 200}
+    assert PROPHET_PROFILES['fast']['uncertainty_samples'] == 200
+
+    # Explicit forecaster arguments go on top of the profile; Prophet is only imported to fit
+    forecaster = ProphetForecaster(model_kwargs={'n_changepoints': 5}, fit_kwargs={'iter': 10}, profile='fast')
+    assert forecaster.model_kwargs['n_changepoints'] == 5 and forecaster.model_kwargs['uncertainty_samples'] == 200
+    assert forecaster.fit_kwargs == {'algorithm': 'LBFGS', 'iter': 10}
+
+
+def test_unknown_profiles_and_options_are_rejected():
+    with pytest.raises(ValueError, match='Unknown Prophet profile: turbo'):
+        prophet_profile('turbo')
+    with pytest.raises(ValueError, match='Unknown Prophet profile'):
+        ProphetForecaster(profile='turbo')
+    with pytest.raises(ValueError, match=r"Unknown Prophet options: \['growth'\]"):
+        prophet_profile('fast', growth='flat')
@@ -0,0 +1,86 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.hierarchy import Hierarchy, TOTAL, forecast_hierarchy
+
+
+def _long_frame(regions, stores, periods=40, seed=0):
+    rng = np.random.default_rng(seed)
+    n = regions * stores
+    return pd.DataFrame({
+        'region': np.repeat([f'r{r}' for r in range(regions)], stores * periods),
+        'store': np.tile(np.repeat([f's{s}' for s in range(stores)], periods), regions),
+        'ds': np.tile(pd.date_range('2022-01-01', periods=periods, freq='D'), n),
+        'y': rng.gamma(2.0, 10.0, n * periods),
+    })
+
+
+def _dense_reconcile(hierarchy, base, weights):
+    """Textbook GLS reconciliation, (S'WS)^-1 S'W y, on dense matrices."""
+    levels = [level for level in hierarchy.levels if level in base]
+    S = np.vstack([hierarchy.S[hierarchy.slices[level]].toarray() for level in levels])
+    forecasts = np.hstack([base[level] for level in levels])
+    weights = np.where(np.isnan(forecasts).any(axis=0), 0.0, weights)
+    normal = S.T @ (weights[:, None] * S)
+    normal += np.eye(len(normal)) * 1e-9 * normal.diagonal().mean()
+    return np.linalg.solve(normal, S.T @ (weights[:, None] * np.nan_to_num(forecasts).T)).T
+
+
+@pytest.mark.parametrize('method', ['ols', 'wls', 'mint'])
+def test_reconcile_matches_dense_gls(method):
+    hierarchy = Hierarchy(_long_frame(3, 4), ['region', 'store'])
+    rng = np.random.default_rng(1)
+    base = {level: rng.normal(50, 10, (5, hierarchy.slices[level].stop - hierarchy.slices[level].start))
+            for level in hierarchy.levels}
+    base['store'][:, 2] = np.nan  # a leaf without a base forecast follows its parents
+    variance = {level: rng.uniform(1, 5, forecasts.shape[1]) for level, forecasts in base.items()}
+
+    if method == 'ols':
+        weights = np.ones(len(hierarchy.nodes))
+    elif method == 'wls':
+        weights = 1.0 / np.asarray(hierarchy.S.sum(axis=1)).ravel()
+    else:
+        weights = 1.0 / np.concatenate([variance[level] for level in hierarchy.levels])
+
+    reconciled = hierarchy.reconcile(base, method, variance)
+    np.testing.assert_allclose(reconciled, _dense_reconcile(hierarchy, base, weights), rtol=1e-6, atol=1e-6)
+
+
+def test_reconcile_tens_of_thousands_of_leaves_in_bounded_memory():
+    n_regions, n_stores, horizon = 200, 100, 12
+    hierarchy = Hierarchy(_long_frame(n_regions, n_stores, periods=3), ['region', 'store'])
+    assert hierarchy.S.shape[1] == n_regions * n_stores
+    rng = np.random.default_rng(2)
+    base = {level: rng.normal(100, 5, (horizon, hierarchy.slices[level].stop - hierarchy.slices[level].start))
+            for level in hierarchy.levels}
+    variance = {level: rng.uniform(1, 2, forecasts.shape[1]) for level, forecasts in base.items()}
+
+    tracemalloc.start()
+    try:
+        reconciled = hierarchy.reconcile(base, 'mint', variance)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 200 * 1024 * 1024
+
+    nodes = hierarchy.aggregate(reconciled)
+    np.testing.assert_allclose(nodes[:, hierarchy.slices[TOTAL]].ravel(), reconciled.sum(axis=1), rtol=1e-9)
+    regions = nodes[:, hierarchy.slices['region']]
+    np.testing.assert_allclose(regions, reconciled.reshape(horizon, n_regions, n_stores).sum(axis=2), rtol=1e-9)
+
+
+def test_forecast_hierarchy_is_coherent():
+    forecast = forecast_hierarchy(_long_frame(2, 3), ['region', 'store'], periods=7, method='wls')
+    by_level = forecast.groupby(['level', 'ds'])['yhat'].sum().unstack('level')
+    np.testing.assert_allclose(by_level[TOTAL], by_level['store'])
+    np.testing.assert_allclose(by_level['region'], by_level['store'])
+
+
+def test_missing_level_values_are_rejected():
+    data = _long_frame(2, 2)
+    data.loc[3, 'store'] = np.nan
+    with pytest.raises(ValueError, match='missing level values'):
+        Hierarchy(data, ['region', 'store'])
@@ -0,0 +1,124 @@
+import json
+import re
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from agents.instrumentation import Tracer
+from agents.time_series_agent import TimeSeriesAgent
+
+
+def _nested_trace(memory=False):
+    tracer = Tracer(memory=memory)
+    with tracer.span('run_input', category='stage', rows=10):
+        for rows in (100, 200):
+            with tracer.span('load_data', rows=rows):
+                data = bytearray(4 * 1024 * 1024)
+                del data
+        with pytest.raises(KeyError):
+            with tracer.span('get_statistics'):
+                raise KeyError('y')
+    return tracer
+
+
+def test_spans_record_nesting_and_errors():
+    tracer = _nested_trace()
+    # Spans are recorded when they end, so children come before their parent
+    assert [(r['name'], r['depth']) for r in tracer.spans] == \
+        [('load_data', 1), ('load_data', 1), ('get_statistics', 1), ('run_input', 0)]
+    parent = tracer.spans[-1]
+    for child in tracer.spans[:-1]:
+        assert parent['start'] <= child['start']
+        assert child['start'] + child['wall_seconds'] <= parent['start'] + parent['wall_seconds']
+    assert tracer.spans[2]['error'] == 'KeyError' and parent['error'] is None
+    assert all(r['peak_traced_bytes'] is None for r in tracer.spans)
+
+
+def test_traced_memory_includes_nested_spans():
+    tracing = tracemalloc.is_tracing()
+    try:
+        tracer = _nested_trace(memory=True)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    allocated = 4 * 1024 * 1024
+    assert all(r['peak_traced_bytes'] >= allocated for r in tracer.spans if r['name'] == 'load_data')
+    # The parent's peak covers its children even though they reset the peak
+    assert tracer.spans[-1]['peak_traced_bytes'] >= allocated
+
+
+def test_summary_totals_per_category_and_name():
+    tracer = _nested_trace()
+    summary = tracer.summary()
+    assert set(summary) == {('stage', 'run_input'), ('agent', 'load_data'), ('agent', 'get_statistics')}
+    load = summary[('agent', 'load_data')]
+    assert load['calls'] == 2 and load['rows'] == 300
+    assert load['wall_seconds'] == pytest.approx(sum(r['wall_seconds'] for r in tracer.spans[:2]))
+    assert summary[('agent', 'get_statistics')]['rows'] == 0
+    assert summary[('stage', 'run_input')]['peak_traced_bytes'] is None
+
+
+def test_to_json_writes_chrome_trace_events(tmp_path):
+    tracer = _nested_trace()
+    with open(tracer.to_json(str(tmp_path / 'trace.json')), encoding='utf-8') as f:
+        trace = json.load(f)
+    assert trace['displayTimeUnit'] == 'ms'
+    events = trace['traceEvents']
+    assert len(events) == len(tracer.spans)
+    for event, record in zip(events, tracer.spans):
+        # Complete events with microsecond timestamps and durations
+        assert event['ph'] == 'X' and event['tid'] == 0 and isinstance(event['pid'], int)
+        assert (event['name'], event['cat']) == (record['name'], record['category'])
+        assert event['ts'] == pytest.approx(record['start'] * 1e6)
+        assert event['dur'] == pytest.approx(record['wall_seconds'] * 1e6)
+        assert set(event['args']) == {'cpu_seconds', 'rows', 'peak_rss_bytes', 'peak_traced_bytes', 'error'}
+    assert events[2]['args']['error'] == 'KeyError'
+
+
+def test_to_prometheus_writes_the_text_exposition_format(tmp_path):
+    tracer = _nested_trace()
+    text = open(tracer.to_prometheus(str(tmp_path / 'metrics.prom'), prefix='agent'), encoding='utf-8').read()
+    assert text.endswith('\n')
+    lines = text.splitlines()
+    sample = re.compile(r'^(agent_[a-z_]+)\{category="([a-z]+)",name="([a-z_]+)"\} (\S+)$')
+    samples = {}
+    declared = {}
+    for line in lines:
+        if line.startswith('# HELP '):
+            assert len(line.split(' ', 3)) == 4
+        elif line.startswith('# TYPE '):
+            _, _, metric, kind = line.split(' ')
+            assert kind in ('counter', 'gauge')
+            declared[metric] = kind
+        else:
+            match = sample.match(line)
+            assert match, line
+            metric, category, name, value = match.groups()
+            assert metric in declared
+            samples[metric, category, name] = float(value)
+    # Counters follow the _total naming convention
+    assert all(metric.endswith('_total') for metric, kind in declared.items() if kind == 'counter')
+    assert samples['agent_calls_total', 'agent', 'load_data'] == 2
+    assert samples['agent_rows_total', 'agent', 'load_data'] == 300
+    # Without tracemalloc the metric is declared but has no samples
+    assert 'agent_peak_traced_bytes' in declared
+    assert not any(key[0] == 'agent_peak_traced_bytes' for key in samples)
+
+    assert tracer.export(str(tmp_path / 'metrics.txt')).endswith('.txt')
+    assert open(tmp_path / 'metrics.txt', encoding='utf-8').read() == text.replace('agent_', 'time_series_agent_')
+    json.load(open(tracer.export(str(tmp_path / 'trace.json')), encoding='utf-8'))
+
+
+def test_agent_methods_are_traced_with_their_rows(tmp_path):
+    path = tmp_path / 'series.csv'
+    pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=30).strftime('%Y-%m-%d'), 'y': range(30)}) \
+        .to_csv(path, index=False)
+    agent = TimeSeriesAgent()
+    tracer = agent.enable_tracing()
+    agent.load_data(str(path))
+    agent.select_columns('ds', 'y')
+    agent.correct_formats()
+    agent.get_statistics()
+    assert [(r['name'], r['rows']) for r in tracer.spans] == \
+        [('load_data', 30), ('correct_formats', 30), ('get_statistics', 30)]
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.time_series_agent import TimeSeriesAgent
+
+
+def _write_csv(path, n=120):
+    values = (100 + np.arange(n) % 7).astype(str).astype(object)
+    values[[5, 40, 41]] = ''
+    dates = pd.date_range('2023-01-01', periods=n, freq='D').strftime('%Y-%m-%d').to_numpy(dtype=object)
+    # One missing day, so the filling strategies also have a timestamp to add
+    keep = np.arange(n) != 60
+    pd.DataFrame({'ds': dates[keep], 'y': values[keep]}).to_csv(path, index=False)
+    return path
+
+
+def _check_compact(agent, dtype):
+    data = agent.data
+    assert data['ds'].dtype == 'datetime64[ns]'
+    assert data['y'].dtype == dtype
+    assert data['y'].to_numpy().flags['C_CONTIGUOUS']
+
+
+@pytest.mark.parametrize('dtype', ['float32', 'float64'])
+@pytest.mark.parametrize('strategy', ['drop', 'mean', 'median', 'mode', 'interpolate', 'ffill', 'seasonal'])
+def test_cleaning_steps_keep_the_compact_dtype(tmp_path, dtype, strategy):
+    agent = TimeSeriesAgent(low_memory=True, value_dtype=dtype)
+    agent.load_data(str(_write_csv(tmp_path / 'series.csv')))
+    agent.select_columns('ds', 'y')
+    agent.correct_formats()
+    _check_compact(agent, dtype)
+
+    agent.handle_null_values('correct', strategy)
+    _check_compact(agent, dtype)
+    assert agent.data['y'].notna().all()
+
+    agent.regularize(freq='D')
+    _check_compact(agent, dtype)
+    # The model always gets float64 values
+    assert agent.prepare_prophet_data()['y'].dtype == 'float64'
+
+
+def test_chunked_and_columnar_loads_are_compact(tmp_path):
+    path = _write_csv(tmp_path / 'series.csv')
+    agent = TimeSeriesAgent(low_memory=True, value_dtype='float32')
+    agent.load_data(str(path), chunksize=25, date_column='ds', value_column='y')
+    _check_compact(agent, 'float32')
+
+    agent.save_data(str(tmp_path / 'series.parquet'))
+    reloaded = TimeSeriesAgent(low_memory=True, value_dtype='float32')
+    reloaded.load_data(str(tmp_path / 'series.parquet'), date_column='ds', value_column='y')
+    _check_compact(reloaded, 'float32')
+    pd.testing.assert_frame_equal(reloaded.data, agent.data)
+
+
+def test_memory_usage_shrinks_with_float32(tmp_path):
+    path = str(_write_csv(tmp_path / 'series.csv'))
+    usage = {}
+    for dtype in ['float64', 'float32']:
+        agent = TimeSeriesAgent(low_memory=True, value_dtype=dtype)
+        agent.load_data(path, chunksize=50, date_column='ds', value_column='y')
+        usage[dtype] = agent.memory_usage()['data']
+    assert usage['float32'] < usage['float64']
+
+
+@pytest.mark.parametrize('strategy', ['mean', 'median', 'mode'])
+def test_numpy_fill_values_do_not_widen_the_series(tmp_path, monkeypatch, strategy):
+    agent = TimeSeriesAgent(low_memory=True, value_dtype='float32')
+    agent.load_data(str(_write_csv(tmp_path / 'series.csv')))
+    agent.select_columns('ds', 'y')
+    agent.correct_formats()
+    # A float64 scalar that float32 cannot hold exactly upcasts fillna on pandas 2
+    monkeypatch.setattr(agent, 'get_statistics', lambda: {strategy: np.float64(100.1)})
+    agent.handle_null_values('correct', strategy)
+    _check_compact(agent, 'float32')
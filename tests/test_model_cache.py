@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('prophet')
+
+from agents.forecasters import quiet_stan_logging
+from agents.model_cache import ModelCache
+
+quiet_stan_logging()
+
+FIT = {'model_kwargs': {'daily_seasonality': False, 'weekly_seasonality': True, 'yearly_seasonality': False}}
+
+
+def _prepared(n=120, seed=0, start='2022-01-01'):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'ds': pd.date_range(start, periods=n, freq='D'),
+                         'y': 10 + np.sin(np.arange(n) / 7 * 2 * np.pi) + rng.normal(0, 0.1, n)})
+
+
+def _files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+
+
+def test_identical_rows_hit(tmp_path):
+    cache = ModelCache(str(tmp_path))
+    model, status = cache.fit(_prepared(), **FIT)
+    assert status == 'miss'
+    cached, status = ModelCache(str(tmp_path)).fit(_prepared(), **FIT)
+    assert status == 'hit'
+    np.testing.assert_allclose(cached.params['k'], model.params['k'])
+
+
+def test_appended_rows_warm_start(tmp_path):
+    cache = ModelCache(str(tmp_path))
+    cache.fit(_prepared(100), **FIT)
+    # The first 100 rows are unchanged, so the cached fit seeds the refit
+    _, status = cache.fit(_prepared(110), **FIT)
+    assert status == 'warm'
+    # Changed history is not a continuation
+    changed = _prepared(120)
+    changed.loc[5, 'y'] += 1
+    assert cache.fit(changed, **FIT)[1] == 'miss'
+
+
+def test_config_change_misses(tmp_path):
+    cache = ModelCache(str(tmp_path))
+    cache.fit(_prepared(), **FIT)
+    _, status = cache.fit(_prepared(), model_kwargs=dict(FIT['model_kwargs'], changepoint_prior_scale=0.5))
+    assert status == 'miss'
+    assert len(_files(cache.models_dir)) == 2
+
+
+def test_eviction_drops_least_recent_models_and_their_lineage(tmp_path):
+    cache = ModelCache(str(tmp_path), max_entries=2)
+    series = [_prepared(seed=seed, start=f'202{seed}-01-01') for seed in range(3)]
+    for prepared in series:
+        cache.fit(prepared, **FIT)
+        # Modification times order the entries; keep them distinct on coarse clocks
+        for name in _files(cache.models_dir):
+            path = os.path.join(cache.models_dir, name)
+            os.utime(path, (os.path.getatime(path), os.path.getmtime(path) - 1))
+
+    assert len(_files(cache.models_dir)) == 2
+    # The lineage of the evicted first series went with its model
+    assert len(_files(cache.lineage_dir)) == 2
+    assert cache.fit(series[2], **FIT)[1] == 'hit'
+    assert cache.fit(series[0], **FIT)[1] == 'miss'
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ModelCache(str(tmp_path), max_age_days=1)
+    cache.fit(_prepared(), **FIT)
+    for name in _files(cache.models_dir):
+        path = os.path.join(cache.models_dir, name)
+        os.utime(path, (0, 0))
+    cache.evict()
+    assert _files(cache.models_dir) == [] and _files(cache.lineage_dir) == []
+    assert cache.fit(_prepared(), **FIT)[1] == 'miss'
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.parsing import detect_date_format, floor_to_day, parse_dates, parse_numeric
+
+
+def test_detected_format_matches_pandas():
+    values = pd.Series(pd.date_range('2020-01-01', periods=400, freq='D').strftime('%d/%m/%Y'))
+    assert detect_date_format(values) == '%d/%m/%Y'
+    dates, failed = parse_dates(values)
+    expected = pd.to_datetime(values, format='%d/%m/%Y').to_numpy(dtype='datetime64[ns]')
+    np.testing.assert_array_equal(dates, expected)
+    assert failed == 0
+
+
+def test_floor_to_day_matches_pandas():
+    stamps = pd.Series(pd.date_range('2020-01-01 07:13', periods=500, freq='37min'))
+    stamps[5] = pd.NaT
+    np.testing.assert_array_equal(floor_to_day(stamps.to_numpy()), stamps.dt.floor('D').to_numpy())
+
+
+@pytest.mark.parametrize('text, day', [
+    ('2020-01-01 00:00:00+02:00', '2020-01-01'),
+    ('2020-01-01 23:30:00-05:00', '2020-01-01'),
+])
+def test_timezone_aware_dates_keep_their_local_day(text, day):
+    dates, failed = parse_dates(pd.Series([text, text]))
+    assert failed == 0
+    assert (dates == np.datetime64(day, 'ns')).all()
+
+
+def test_mixed_utc_offsets_keep_wall_time():
+    dates, failed = parse_dates(pd.Series(['2020-01-01 00:00:00+02:00', '2020-01-02 23:30:00-05:00']),
+                                to_day=False)
+    assert failed == 0
+    np.testing.assert_array_equal(dates, np.array(['2020-01-01T00:00', '2020-01-02T23:30'], dtype='datetime64[ns]'))
+
+
+def test_timezone_aware_datetime_column_keeps_wall_time():
+    values = pd.Series(pd.to_datetime(['2020-03-01 01:00']).tz_localize('Europe/Berlin'))
+    dates, _ = parse_dates(values, to_day=False)
+    assert dates[0] == np.datetime64('2020-03-01T01:00', 'ns')
+
+
+def test_rows_after_the_detection_sample_in_another_format_are_parsed():
+    values = pd.Series(list(pd.date_range('2020-01-01', periods=1500, freq='h').strftime('%Y-%m-%d'))
+                       + ['03/15/2021', 'garbage', 'null', None])
+    dates, failed = parse_dates(values)
+    assert dates[1500] == np.datetime64('2021-03-15', 'ns')
+    assert np.isnat(dates[1501:]).all()
+    assert failed == 1
+
+
+def test_explicit_format_is_not_second_guessed():
+    dates, failed = parse_dates(pd.Series(['2020-01-01', '01/05/2020']), date_format='%Y-%m-%d')
+    assert np.isnat(dates[1])
+    assert failed == 1
+
+
+def test_parse_numeric_matches_pandas_and_counts_failures():
+    values = pd.Series(['1.5', ' "2" ', "'3.25'", 'Null', '', 'abc', None, '-4e2'])
+    numbers, failed = parse_numeric(values)
+    np.testing.assert_array_equal(numbers, [1.5, 2.0, 3.25, np.nan, np.nan, np.nan, np.nan, -400.0])
+    assert failed == 1
+    numbers, _ = parse_numeric(values, dtype='float32')
+    assert numbers.dtype == np.float32
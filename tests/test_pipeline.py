@@ -0,0 +1,98 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.pipeline import DEFAULT_CONFIG, STAGES, merge_config, run_pipeline
+from main import parse_args, run_headless
+
+FAST = {'forecaster': 'fourier', 'periods': 7, 'model_cache': '', 'artifact_cache': '',
+        'stages': {'plots': False, 'report': False}}
+
+
+def _write_series(path, level=10.0, n=120):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    dates = pd.date_range('2023-01-01', periods=n, freq='D')
+    values = level + np.sin(np.arange(n) / 7 * 2 * np.pi)
+    pd.DataFrame({'ds': dates.strftime('%Y-%m-%d'), 'y': values}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_merge_config_layers_overrides_over_the_defaults():
+    config = merge_config({'periods': 10, 'stages': {'backtest': True}}, {'periods': 20, 'null_strategy': None})
+    assert config['periods'] == 20
+    # None means "not given" and keeps the earlier value
+    assert config['null_strategy'] == DEFAULT_CONFIG['null_strategy']
+    assert config['stages'] == dict(DEFAULT_CONFIG['stages'], backtest=True)
+    # The defaults themselves are never modified
+    assert DEFAULT_CONFIG['stages']['backtest'] is False
+    assert merge_config() == DEFAULT_CONFIG
+
+
+@pytest.mark.parametrize('override, message', [
+    ({'periodz': 10}, 'Unknown config option'),
+    ({'stages': {'plot': False}}, 'Unknown stages'),
+    ({'null_strategy': 'zero'}, 'Invalid null strategy'),
+    ({'forecaster': 'arima'}, 'Unknown forecaster'),
+    ({'prophet_profile': 'turbo'}, 'Unknown Prophet profile'),
+    ({'value_dtype': 'float16'}, 'Invalid value dtype'),
+    ({'duplicate_agg': 'mode'}, 'Invalid aggregation'),
+])
+def test_merge_config_rejects_invalid_options(override, message):
+    with pytest.raises(ValueError, match=message):
+        merge_config(override)
+
+
+def test_inputs_with_the_same_file_name_get_separate_folders(tmp_path):
+    inputs = [_write_series(tmp_path / 'a' / 'data.csv', 10.0), _write_series(tmp_path / 'b' / 'data.csv', 50.0)]
+    results = run_pipeline(dict(FAST, output_dir=str(tmp_path / 'output')), inputs)
+    assert [result['status'] for result in results] == ['ok', 'ok']
+
+    folders = [os.path.dirname(result['outputs']['forecast']) for result in results]
+    assert folders[0] != folders[1]
+    assert all(os.path.basename(folder).startswith('data-') for folder in folders)
+    means = [pd.read_feather(result['outputs']['forecast'])['yhat'].mean() for result in results]
+    assert means[0] < 20 < means[1]
+    # Reruns write to the same folders
+    rerun = run_pipeline(dict(FAST, output_dir=str(tmp_path / 'output')), inputs)
+    assert [os.path.dirname(result['outputs']['forecast']) for result in rerun] == folders
+
+
+def test_a_failing_input_does_not_stop_the_others(tmp_path):
+    good = _write_series(tmp_path / 'good.csv')
+    bad = tmp_path / 'bad.csv'
+    bad.write_text('ds,y\nnot a date,abc\n')
+    results = run_pipeline(dict(FAST, output_dir=str(tmp_path / 'output')),
+                           [str(bad), good, str(tmp_path / 'missing.csv')])
+    assert [result['status'] for result in results] == ['failed', 'ok', 'failed']
+    assert results[2]['error'].startswith('load:')
+
+    with pytest.raises(ValueError, match='No inputs given'):
+        run_pipeline(FAST)
+
+
+def test_parse_args_leaves_unset_options_to_the_config():
+    args = vars(parse_args(['a.csv', 'b.csv', '--periods', '14', '--no-plots', '--backtest']))
+    assert args['inputs'] == ['a.csv', 'b.csv']
+    assert args['periods'] == 14
+    assert args['plots'] is False and args['backtest'] is True
+    # Flags that were not given stay None, so merge_config keeps the config file's values
+    assert all(args[stage] is None for stage in STAGES if stage not in ('plots', 'backtest'))
+    assert args['null_strategy'] is None and args['trace'] is None
+
+    with pytest.raises(SystemExit):
+        parse_args(['a.csv', '--forecaster', 'arima'])
+
+
+def test_run_headless_merges_the_config_file_and_flags(tmp_path, capsys):
+    data = _write_series(tmp_path / 'series.csv')
+    config_path = tmp_path / 'pipeline.json'
+    config_path.write_text(json.dumps(dict(FAST, inputs=[data], output_dir=str(tmp_path / 'output'))))
+    assert run_headless(['--config', str(config_path), '--no-forecast', '--no-stats']) == 0
+
+    results = json.loads((tmp_path / 'output' / 'pipeline_results.json').read_text())
+    assert [result['input'] for result in results] == [data]
+    assert 'forecast' not in results[0]['outputs'] and 'stats' not in results[0]['outputs']
+    assert f'{data}: ok' in capsys.readouterr().out
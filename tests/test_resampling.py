@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.resampling import infer_frequency, interpolate_gaps, regularize
+
+
+def _irregular_series(start, freq, periods, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=periods, freq=freq)
+    keep = np.sort(rng.choice(periods, size=periods * 3 // 4, replace=False))
+    values = rng.normal(10, 3, len(keep))
+    values[::17] = np.nan
+    return dates[keep], values
+
+
+@pytest.mark.parametrize('start, data_freq, freq', [
+    ('2020-01-01 00:15', '15min', 'h'),
+    ('2020-01-01 00:07', '7min', '30min'),
+    ('2020-01-01 13:00', 'h', 'D'),
+    ('2020-01-03 06:00', '6h', '7D'),
+    ('2020-01-17', 'D', 'MS'),
+])
+@pytest.mark.parametrize('agg', ['mean', 'sum', 'median', 'max', 'first', 'last'])
+def test_regularize_matches_pandas_resample(start, data_freq, freq, agg):
+    dates, values = _irregular_series(start, data_freq, 600)
+    grid, regular, report = regularize(dates.to_numpy(), values, freq=freq, agg=agg, fill='none')
+
+    expected = getattr(pd.Series(values, index=dates).resample(freq), agg)()
+    if agg == 'sum':
+        # pandas sums empty buckets to 0; regularize leaves them missing
+        counts = pd.Series(values, index=dates).resample(freq).count()
+        expected = expected.where(counts > 0)
+    np.testing.assert_array_equal(grid, expected.index.to_numpy(dtype='datetime64[ns]'))
+    np.testing.assert_allclose(regular, expected.to_numpy(), equal_nan=True)
+    assert report['rows_out'] == len(expected)
+
+
+def test_unordered_input_matches_ordered():
+    dates, values = _irregular_series('2021-06-01 00:20', '10min', 500, seed=3)
+    order = np.random.default_rng(4).permutation(len(dates))
+    ordered = regularize(dates.to_numpy(), values, freq='h', agg='median', fill='none')
+    shuffled = regularize(dates.to_numpy()[order], values[order], freq='h', agg='median', fill='none')
+    np.testing.assert_array_equal(ordered[0], shuffled[0])
+    np.testing.assert_allclose(ordered[1], shuffled[1], equal_nan=True)
+
+
+def _ticks(start, periods, freq):
+    return pd.date_range(start, periods=periods, freq=freq).to_numpy(dtype='datetime64[ns]').view('i8')
+
+
+def test_infer_frequency():
+    assert infer_frequency(_ticks('2020-01-01', 50, '15min')) == '15min'
+    assert infer_frequency(_ticks('2020-01-01', 50, 'MS')) == 'MS'
+    assert infer_frequency(_ticks('2020-01-06', 50, '7D')) == '7D'
+
+
+def test_interpolate_gaps_matches_pandas_time_interpolation():
+    values = np.array([np.nan, 1.0, np.nan, np.nan, 4.0, 8.0, np.nan])
+    expected = pd.Series(values).interpolate(limit_direction='both').to_numpy()
+    np.testing.assert_allclose(interpolate_gaps(values), expected)
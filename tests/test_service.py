@@ -0,0 +1,128 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import service
+from agents.service import ForecastService, _fit_model
+
+
+def _service_with_model(series_id='a'):
+    dates = pd.date_range('2022-01-01', periods=120, freq='D')
+    values = 10 + np.sin(np.arange(120) / 7 * 2 * np.pi)
+    source = {'ds': dates.strftime('%Y-%m-%d').tolist(), 'y': values.tolist()}
+    fitted = _fit_model(source, 'ds', 'y', 'fourier', 'default', None, None)
+    forecast_service = ForecastService(max_models=4, fit_workers=1)
+    forecast_service.registry.put(series_id, dict(fitted, series_id=series_id, forecaster_name='fourier',
+                                                  fitted_at=time.time(), forecasts=OrderedDict()))
+    return forecast_service
+
+
+def test_concurrent_horizons_share_one_prediction(monkeypatch):
+    calls = []
+    predict = service._predict
+    monkeypatch.setattr(service, '_predict', lambda entry, periods: calls.append(periods) or predict(entry, periods))
+    forecast_service = _service_with_model()
+
+    async def run():
+        return await asyncio.gather(*[forecast_service.forecast('a', periods, history)
+                                      for periods, history in [(7, False), (30, False), (14, True), (30, False)]])
+    try:
+        bodies = [json.loads(body) for body in asyncio.run(run())]
+    finally:
+        forecast_service.close()
+
+    assert calls == [30]
+    short, long, with_history, repeated = [body['forecast']['data'] for body in bodies]
+    assert (len(short), len(long), len(with_history)) == (7, 30, 120 + 14)
+    assert short == long[:7] and with_history[-14:] == long[:14] and repeated == long
+
+
+def test_oversized_request_body_is_refused():
+    forecast_service = ForecastService(max_models=1, fit_workers=1, max_body_bytes=16)
+
+    async def run():
+        server = await asyncio.start_server(forecast_service._handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'POST /models/a HTTP/1.1\r\nContent-Length: 1000000\r\n\r\n')
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+    try:
+        response = asyncio.run(run())
+    finally:
+        forecast_service.close()
+    assert response.startswith(b'HTTP/1.1 413')
+    assert b'Connection: close' in response
+
+
+def _raw_request(forecast_service, request: bytes) -> bytes:
+    async def run():
+        server = await asyncio.start_server(forecast_service._handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('request_bytes', [
+    b'GARBAGE\r\n\r\n',
+    b'GET /health HTTP/1.1\r\nContent-Length: ten\r\n\r\n',
+])
+def test_malformed_requests_get_a_json_400(request_bytes):
+    forecast_service = ForecastService(max_models=1, fit_workers=1)
+    try:
+        response = _raw_request(forecast_service, request_bytes)
+    finally:
+        forecast_service.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 400')
+    assert b'Connection: close' in head
+    assert 'Malformed' in json.loads(body)['error']
+
+
+def test_fits_coalesce_only_when_identical(monkeypatch):
+    calls = []
+
+    def fake_fit(source, date_column, value_column, forecaster, profile, frequency, cache_dir):
+        time.sleep(0.05)
+        calls.append((source, forecaster))
+        return {'forecaster': None, 'frequency': 'D', 'rows': len(source['y']), 'fit_seconds': 0.0,
+                'cache_status': None}
+    forecast_service = ForecastService(max_models=4, fit_workers=1)
+    # Threads instead of processes, so the stub does not need to be importable by workers
+    forecast_service.executor.shutdown()
+    forecast_service.executor = ThreadPoolExecutor(2)
+    monkeypatch.setattr(service, '_fit_model', fake_fit)
+    first, second = {'ds': ['2024-01-01'], 'y': [1]}, {'ds': ['2024-01-01', '2024-01-02'], 'y': [1, 2]}
+
+    async def run():
+        return await asyncio.gather(forecast_service.fit('a', first, forecaster='fourier'),
+                                    forecast_service.fit('a', dict(first), forecaster='fourier'),
+                                    forecast_service.fit('a', first, forecaster='seasonal_naive'),
+                                    forecast_service.fit('a', second, forecaster='seasonal_naive'))
+    try:
+        results = asyncio.run(run())
+    finally:
+        forecast_service.close()
+
+    # Identical requests share a fit; the others run one after another, in arrival order
+    assert calls == [(first, 'fourier'), (first, 'seasonal_naive'), (second, 'seasonal_naive')]
+    assert [result['rows'] for result in results] == [1, 1, 1, 2]
+    entry = forecast_service.registry.get('a')
+    assert (entry['forecaster_name'], entry['rows']) == ('seasonal_naive', 2)
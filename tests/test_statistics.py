@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.online_stats import OnlineStatistics, QuantileSketch
+from agents.statistics import compute_statistics
+from agents.time_series_agent import TimeSeriesAgent
+
+
+def _series(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2019-01-01', periods=n, freq='D')
+    values = np.round(rng.gamma(2.0, 5.0, n), 1)
+    values[rng.choice(n, 40, replace=False)] = np.nan
+    values[:3] = [250.0, -80.0, 300.0]
+    return pd.DataFrame({'ds': dates, 'y': values})
+
+
+def _chunks(data, n):
+    return [data.iloc[part] for part in np.array_split(np.arange(len(data)), n)]
+
+
+def test_compute_statistics_matches_pandas():
+    data = _series()
+    stats = compute_statistics(data['y'].to_numpy(), data['ds'].to_numpy())
+    y = data['y']
+    q1, q3 = y.quantile(0.25), y.quantile(0.75)
+    for name, expected in [('count', y.count()), ('nulls', y.isnull().sum()), ('min', y.min()), ('max', y.max()),
+                           ('mean', y.mean()), ('median', y.median()), ('mode', y.mode().iloc[0]),
+                           ('std', y.std()), ('skew', y.skew()), ('kurtosis', y.kurt()), ('q1', q1), ('q3', q3)]:
+        assert stats[name] == pytest.approx(expected, rel=1e-9), name
+    iqr = q3 - q1
+    assert stats['outlier_count'] == int(((y < q1 - 1.5 * iqr) | (y > q3 + 1.5 * iqr)).sum())
+    monthly = y.groupby(data['ds'].dt.month)
+    assert stats['monthly']['mean'] == pytest.approx(monthly.mean().to_dict())
+    assert stats['monthly']['std'] == pytest.approx(monthly.std().to_dict())
+    assert stats['yearly'] == pytest.approx(y.groupby(data['ds'].dt.year).mean().to_dict())
+
+
+def test_online_statistics_match_batch_statistics():
+    data = _series()
+    online = OnlineStatistics(track_mode=True)
+    for chunk in _chunks(data, 13):
+        online.update(chunk['y'].to_numpy(), chunk['ds'].to_numpy())
+    exact = compute_statistics(data['y'].to_numpy(), data['ds'].to_numpy())
+    summary = online.summary()
+    for name in ['total', 'count', 'nulls', 'min', 'max', 'mode', 'date_min', 'date_max']:
+        assert summary[name] == exact[name], name
+    for name in ['mean', 'std', 'skew', 'kurtosis']:
+        assert summary[name] == pytest.approx(exact[name], rel=1e-9), name
+    assert summary['monthly']['mean'] == pytest.approx(exact['monthly']['mean'])
+    assert summary['yearly'] == pytest.approx(exact['yearly'])
+    # Sketch quantiles are approximate
+    spread = exact['q3'] - exact['q1']
+    for name in ['median', 'q1', 'q3']:
+        assert abs(summary[name] - exact[name]) < 0.05 * spread, name
+    assert abs(summary['outlier_count'] - exact['outlier_count']) <= 0.1 * exact['outlier_count'] + 3
+
+
+def test_quantile_sketch_is_exact_below_compression():
+    values = np.random.default_rng(1).normal(size=150)
+    sketch = QuantileSketch(compression=200)
+    sketch.update(values)
+    for q in [0.1, 0.25, 0.5, 0.9]:
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q))
+
+
+def test_append_is_buffered_and_serves_running_statistics():
+    data = _series()
+    agent = TimeSeriesAgent()
+    agent.data = data.iloc[:2000].reset_index(drop=True)
+    agent.date_column, agent.value_column = 'ds', 'y'
+    agent.enable_incremental()
+
+    new_outliers = [agent.append(chunk) for chunk in _chunks(data.iloc[2000:], 5)]
+    assert len(agent._data) == 2000  # nothing copied until the data is used
+    stats = agent.get_basic_stats()
+    exact = compute_statistics(data['y'].to_numpy())
+    assert stats['mean'] == pytest.approx(exact['mean'], rel=1e-9)
+    assert (stats['min'], stats['max'], stats['mode']) == (exact['min'], exact['max'], exact['mode'])
+
+    pd.testing.assert_frame_equal(agent.data, data.reset_index(drop=True), check_dtype=False)
+    lower, upper = agent.get_statistics()['lower_bound'], agent.get_statistics()['upper_bound']
+    outliers = agent.detect_outliers()
+    assert ((outliers['y'] < lower) | (outliers['y'] > upper)).all()
+    assert sum(len(rows) for rows in new_outliers) <= len(outliers)
+
+
+@pytest.mark.parametrize('track_mode', [False, True])
+def test_mode_tracking_is_opt_in(track_mode):
+    data = _series()
+    agent = TimeSeriesAgent()
+    agent.data = data.iloc[:2000].reset_index(drop=True)
+    agent.date_column, agent.value_column = 'ds', 'y'
+    agent.enable_incremental(track_mode=track_mode)
+    for chunk in _chunks(data.iloc[2000:], 5):
+        agent.append(chunk)
+
+    # Without tracking no per-value counts are kept, and the running summary has no mode
+    assert (agent._online.values is not None) == track_mode
+    assert ('mode' in agent.get_incremental_stats()) == track_mode
+    assert agent.get_basic_stats()['mode'] == compute_statistics(data['y'].to_numpy())['mode']